@@ -1 +1,102 @@
-# Auto-generated file
+"""
+Pre-forking server for the chatbot.
+
+    python -m app --workers 4 --preload
+
+With --preload the master process loads the embedding model (when
+queries are embedded locally, i.e. VECTOR_STORE: local; the Pinecone path
+calls EMBEDDING_MODEL_URL) and the re-ranking cross-encoder (when
+enabled) into the process-wide ModelRegistry, then binds the socket and
+forks the workers. The workers inherit the weights as copy-on-write pages instead of each
+loading their own copy, so N workers cost about one model's worth of RSS.
+Everything with threads, sockets or an event loop (Pinecone, httpx, Redis)
+is still created per worker by the app lifespan, after the fork.
+
+Plain `uvicorn app.main:app --workers N` spawns its workers instead of
+forking them, so it cannot share the preloaded pages.
+"""
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.models import EmbeddingModel, CrossEncoderReranker
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import uvicorn
+
+
+def serving_embeds_locally(config: ConfigurationManager) -> bool:
+    """
+    Whether the workers embed questions with the local model (torch or ONNX,
+    per embedding_runtime_config) rather than the remote endpoint.
+    """
+    return config.get_chatbot_config().vector_store == "local"
+
+
+def serve(sock: socket.socket, args) -> None:
+    config = uvicorn.Config("app.main:app", log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--preload", action="store_true", help="load the embedding model before forking the workers")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.preload:
+        config = ConfigurationManager()
+        # load weights only: running inference here would start thread pools that do not survive fork()
+        if serving_embeds_locally(config):
+            EmbeddingModel().preload()
+        else:
+            logger.info("Skipping the embedding model preload: questions are embedded by EMBEDDING_MODEL_URL")
+        if config.get_rerank_config().enabled:
+            CrossEncoderReranker().preload()
+        # keep the preloaded objects out of the cyclic GC so it does not write to (and copy) their pages
+        gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    if args.workers <= 1:
+        serve(sock, args)
+        return
+
+    children = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(sock, args)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    logger.info(f"Master {os.getpid()} forked workers {children} on {args.host}:{args.port}")
+
+    def forward(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    exit_code = 0
+    for child in children:
+        _, status = os.waitpid(child, 0)
+        exit_code = exit_code or os.waitstatus_to_exitcode(status)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
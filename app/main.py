@@ -5,6 +5,8 @@ from fastapi.templating import Jinja2Templates
 from app.routers import chatbot
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from E2EMedicalChatBotWithRAG.utils import REGISTRY
 
 app = FastAPI(title="E2E Medical ChatBot", 
             description="An end-to-end medical chatbot application.",
@@ -30,4 +32,9 @@ async def read_root(request: Request):
 
 @app.get("/about")
 async def about():
-    return {"message": "About the E2E Medical ChatBot"}
\ No newline at end of file
+    return {"message": "About the E2E Medical ChatBot"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text exposition format, for this worker process
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
\ No newline at end of file
@@ -1,37 +1,135 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from pydantic import BaseModel
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import HTTPConnection
+from pydantic import BaseModel, Field
 from E2EMedicalChatBotWithRAG.chains.rag_chain import RAGChain
+from E2EMedicalChatBotWithRAG.models.embedding_client import EmbeddingHTTPClient
+from E2EMedicalChatBotWithRAG.models.embedding_model import EmbeddingModel
 from E2EMedicalChatBotWithRAG.logger import logger
 from contextlib import asynccontextmanager
-from app.services import PineCone
+from typing import AsyncIterator, List
+import asyncio
+import contextlib
+import functools
+import ipaddress
+import json
+import time
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.utils import REGISTRY
+from app.services import PineCone, QuestionSession, PROTOCOL_V2, LLMScheduler, SchedulerRejected
+
+websocket_config = ConfigurationManager().get_websocket_config()
+http_api_config = ConfigurationManager().get_http_api_config()
 
 
 class Question(BaseModel):
-    question: str
+    question: str = Field(min_length=1)
+
+
+class QuestionBatch(BaseModel):
+    questions: List[str] = Field(min_length=1, max_length=http_api_config.max_batch_questions)
 
 @asynccontextmanager
 async def lifespan(router: APIRouter):
     logger.info("Starting the Medical Chatbot")
     try:
+        embedding_client = EmbeddingHTTPClient()
+        embedding_client.init()
+
         pc = PineCone()
         
         client = pc.init()
         global rag_chain
         rag_chain = await RAGChain.make_async(client=client)
         logger.info("pinecone client initialized successfully")
+
+        pinecone_store = rag_chain.avector_store if rag_chain.config.vector_store != "local" else None
+        keep_warm = None
+        if pinecone_store is not None:
+            # open the index and embedding connections now instead of on the first question
+            await pinecone_store.warm_up()
+            keep_warm = asyncio.create_task(pinecone_store.keep_warm())
     except Exception as e:
         logger.error(f"Error initializing pinecone client: {e}")
         raise e
 
     yield
 
+    if keep_warm is not None:
+        keep_warm.cancel()
+        # let it stop before its index handle is closed under it
+        with contextlib.suppress(asyncio.CancelledError):
+            await keep_warm
     try:
+        if pinecone_store is not None:
+            await pinecone_store.close_indexes()
         await client.close()
         logger.info("pinecone client closed successfully")
     except Exception as e:
         logger.error(f"Error closing pinecone client: {e}")
+
+    try:
+        await embedding_client.close()
+        await EmbeddingModel.close_cache()
+    except Exception as e:
+        logger.error(f"Error closing embedding client: {e}")
     logger.info("Medical Chatbot is shutting down")
 
+scheduler_config = ConfigurationManager().get_llm_scheduler_config()
+# every answer, from any connection, goes through the one scheduler of this worker
+scheduler = LLMScheduler(max_in_flight=scheduler_config.max_in_flight,
+                         max_queue=scheduler_config.max_queue,
+                         per_client_in_flight=scheduler_config.per_client_in_flight,
+                         per_client_queue=scheduler_config.per_client_queue,
+                         deadline_seconds=scheduler_config.deadline_seconds)
+trusted_proxies = [ipaddress.ip_network(proxy, strict=False)
+                   for proxy in scheduler_config.trusted_proxies if proxy != "*"]
+trust_any_proxy = "*" in scheduler_config.trusted_proxies
+
+
+def _trusted(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in trusted_proxies)
+
+
+def _client_id(connection: HTTPConnection) -> str:
+    """
+    The address the scheduler's per-client limits apply to: the peer, or
+    behind TRUSTED_PROXIES the last X-Forwarded-For hop that is not a
+    trusted proxy, so users behind the same proxy do not share one budget.
+
+    Hops are read from the right, as only the ones appended by trusted
+    proxies can be believed; the leftmost ones are whatever the client
+    sent. With "*" any peer is trusted but none of the hops, so the client
+    is the hop the peer appended.
+    """
+    peer = connection.client.host if connection.client else "unknown"
+    if not (trust_any_proxy or _trusted(peer)):
+        return peer
+    hops = [hop.strip() for header in connection.headers.getlist("x-forwarded-for")
+            for hop in header.split(",") if hop.strip()]
+    nearest = peer
+    for hop in reversed(hops):
+        if not _trusted(hop):
+            return hop
+        nearest = hop
+    # every hop is a trusted proxy: take the one nearest the client they vouch for
+    return nearest
+
+
+# read at scrape time through the module global, so a replaced scheduler is reported
+REGISTRY.gauge("medchat_scheduler_in_flight", "Answers admitted by the LLM scheduler and streaming.",
+               function=lambda: scheduler.in_flight)
+REGISTRY.gauge("medchat_scheduler_queued", "Questions waiting for an LLM slot.",
+               function=lambda: scheduler.queued)
+REGISTRY.counter("medchat_scheduler_rejected_total", "Questions rejected as busy by the LLM scheduler.",
+                 function=lambda: scheduler.counters["rejected_busy"])
+REGISTRY.counter("medchat_scheduler_expired_total", "Questions that passed their deadline.",
+                 function=lambda: scheduler.counters["expired_queued"] + scheduler.counters["expired_streaming"])
+
 router = APIRouter(lifespan=lifespan,
                    tags=["chatbot"]
                    )
@@ -39,31 +137,28 @@ router = APIRouter(lifespan=lifespan,
 @router.websocket("/ws/ask")
 async def ask_ws(websocket: WebSocket):
     try:
-        # Step 1: accept the connection
-        await websocket.accept()
-        while True:
-            # Step 2: receive the client’s question (JSON or plain text)
-            data = await websocket.receive_json()
-            question = data.get("question")
-            if not question:
-                await websocket.send_text("[[ERROR]] No question provided.")
-                continue
-            
-
-            # Step 3: stream the response tokens back to the client
-            async for token in rag_chain.ainvoke(question):
-                # print(token)
-                await websocket.send_text(token)
-
-            # Step 4: optionally signal completion
-            await websocket.send_text("[[END]]")
+        # Step 1: accept the connection, switching to coalesced JSON frames
+        # if the client asks for them (the bundled page speaks the legacy protocol)
+        offered = PROTOCOL_V2 in websocket.scope.get("subprotocols", [])
+        protocol = PROTOCOL_V2 if offered or websocket.query_params.get("protocol") == "v2" else None
+        await websocket.accept(subprotocol=PROTOCOL_V2 if offered else None)
+
+        # Step 2: answer each question as its own task; a new question, a
+        # cancel message or a disconnect cancels the streams it replaces
+        client_id = _client_id(websocket)
+        session = QuestionSession(websocket, lambda question: scheduler.stream(client_id, rag_chain.ainvoke, question),
+                                  max_concurrent=websocket_config.max_concurrent_questions,
+                                  protocol=protocol,
+                                  flush_ms=websocket_config.flush_ms,
+                                  flush_bytes=websocket_config.flush_bytes)
+        await session.run()
 
     except WebSocketDisconnect:
         # client closed the connection – just exit
         pass
 
     except Exception as e:
-        print("WebSocket error:", e)
+        logger.error(f"WebSocket error: {e}")
         
     finally:
         # close only if it’s still open
@@ -71,3 +166,108 @@ async def ask_ws(websocket: WebSocket):
             await websocket.close()
 
 
+@router.get("/stats/scheduler")
+async def scheduler_stats():
+    # queue depth, wait percentiles and rejection counters of this worker
+    return scheduler.stats()
+
+
+@router.get("/stats/retrieval")
+async def retrieval_stats():
+    # query embedding cache hits per tier (None for a local model, which is not cached),
+    # and how often hedged retrieval sent a second query and how often it won
+    cache_stats = getattr(rag_chain.aretriever.embedding_model, "cache_stats", None)
+    stats = {"embedding_cache": cache_stats() if cache_stats is not None else None}
+    if rag_chain.hedged_retriever is None:
+        return {**stats, "hedging": False}
+    return {**stats, "hedging": True, "mode": rag_chain.hedged_retriever.mode, **rag_chain.hedged_retriever.stats()}
+
+
+@router.post("/ask")
+async def ask(question: Question, request: Request):
+    """
+    Streams the answer as Server-Sent Events: one `token` event per token,
+    then `done`, or `error` if the answer fails part way. A question the
+    scheduler turns away gets 503 (busy) or 504 (deadline) with Retry-After
+    before any event is sent.
+    """
+    client_id = _client_id(request)
+    tokens = scheduler.stream(client_id, rag_chain.ainvoke, question.question)
+    try:
+        # wait for the first token, so a rejection can still be an HTTP status
+        first = await anext(tokens, None)
+    except SchedulerRejected as e:
+        return _rejected_response(e)
+    except Exception as e:
+        logger.error(f"Error answering question: {e}")
+        return JSONResponse({"error": "failed", "detail": "Something went wrong while answering."}, status_code=500)
+    return StreamingResponse(_sse_events(first, tokens), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post("/ask/batch")
+async def ask_batch(batch: QuestionBatch, request: Request):
+    """
+    Answers many questions, one NDJSON line per question in completion order:
+    {"index", "question", "answer", "seconds"} or {"index", "question", "error", "detail"}.
+
+    Retrieval runs for all questions at once (concurrent embeddings are
+    micro-batched into one request); the answers then go through the
+    scheduler PER_CLIENT_IN_FLIGHT at a time, so a batch never queues more
+    than one client's share.
+    """
+    client_id = _client_id(request)
+    generating = asyncio.Semaphore(scheduler.per_client_in_flight)
+
+    async def answer(index: int, question: str) -> dict:
+        started = time.perf_counter()
+        try:
+            context, query_vector = await rag_chain.aretrieve(question)
+            async with generating:
+                generate = functools.partial(rag_chain.agenerate, context=context, query_vector=query_vector)
+                text = "".join([token async for token in scheduler.stream(client_id, generate, question)])
+            return {"index": index, "question": question, "answer": text,
+                    "seconds": round(time.perf_counter() - started, 3)}
+        except SchedulerRejected as e:
+            return {"index": index, "question": question, "error": e.code, "detail": str(e), "retry_after": e.retry_after}
+        except Exception as e:
+            logger.error(f"Error answering batch question {index}: {e}")
+            return {"index": index, "question": question, "error": "failed", "detail": "Something went wrong while answering."}
+
+    async def lines() -> AsyncIterator[str]:
+        tasks = [asyncio.create_task(answer(index, question)) for index, question in enumerate(batch.questions)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # the client went away: stop the answers nobody will read
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def _sse_events(first, tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    try:
+        if first is not None:
+            yield _sse("token", {"text": first})
+            async for token in tokens:
+                yield _sse("token", {"text": token})
+        yield _sse("done", {})
+    except SchedulerRejected as e:
+        yield _sse("error", {"error": e.code, "detail": str(e)})
+    except Exception as e:
+        logger.error(f"Error streaming answer: {e}")
+        yield _sse("error", {"error": "failed", "detail": "Something went wrong while answering."})
+    finally:
+        await tokens.aclose()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _rejected_response(e: SchedulerRejected) -> JSONResponse:
+    headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after is not None else None
+    return JSONResponse({"error": e.code, "detail": str(e)}, status_code=503 if e.code == "busy" else 504,
+                        headers=headers)
@@ -1,3 +1,6 @@
 from .pinecone import PineCone
+from .llm_scheduler import LLMScheduler, SchedulerRejected, ServerBusy, DeadlineExceeded
+from .question_session import QuestionSession, PROTOCOL_V2
 
-__all__ = ["PineCone"]
\ No newline at end of file
+__all__ = ["PineCone", "QuestionSession", "PROTOCOL_V2",
+           "LLMScheduler", "SchedulerRejected", "ServerBusy", "DeadlineExceeded"]
\ No newline at end of file
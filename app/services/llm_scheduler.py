@@ -0,0 +1,228 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from collections import OrderedDict, defaultdict, deque
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+import asyncio
+import math
+import numpy as np
+
+
+class SchedulerRejected(Exception):
+    """
+    A question the scheduler did not answer; `code` says why, `retry_after`
+    (seconds) hints when asking again may succeed.
+    """
+    code = "rejected"
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = None if retry_after is None else round(retry_after, 1)
+
+
+class ServerBusy(SchedulerRejected):
+    code = "busy"
+
+
+class DeadlineExceeded(SchedulerRejected):
+    code = "deadline"
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM: bounds the answers streaming at
+    once and queues the rest fairly.
+
+    At most `max_in_flight` answers run at the same time, and at most
+    `per_client_in_flight` of them for one client. Questions beyond that
+    wait in a per-client FIFO queue; a freed slot goes to the next client
+    in round-robin order, so one client sending many questions cannot
+    starve the others.
+
+    Questions are rejected at once with ServerBusy, instead of joining a
+    queue they would time out in, when
+
+    - `max_queue` questions are already waiting, or
+    - the client already has `per_client_queue` questions waiting, or
+    - the expected wait plus the expected answer time (moving average of
+      recent answers) exceeds the question's deadline.
+
+    Every question has a deadline covering its wait and its answer; a
+    question still queued at its deadline, or still streaming, fails with
+    DeadlineExceeded. The limits are per worker process.
+
+    Parameters
+    ----------
+    max_in_flight : int, default 8
+        Answers streaming at the same time.
+    max_queue : int, default 64
+        Questions waiting for a slot, over all clients.
+    per_client_in_flight : int, default 2
+        Answers streaming at the same time for one client.
+    per_client_queue : int, default 4
+        Questions waiting for a slot for one client.
+    deadline_seconds : float, default 60
+        Default time allowed per question, from arrival to the last token.
+    """
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 64, per_client_in_flight: int = 2,
+                 per_client_queue: int = 4, deadline_seconds: float = 60):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.per_client_in_flight = per_client_in_flight
+        self.per_client_queue = per_client_queue
+        self.deadline_seconds = deadline_seconds
+        self.in_flight = 0
+        self.queued = 0
+        self._client_in_flight: Dict[str, int] = defaultdict(int)  # only clients with answers running
+        self._queues: "OrderedDict[str, Deque[Tuple[asyncio.Future, float]]]" = OrderedDict()
+        self._answer_seconds: Optional[float] = None
+        self._waits: Deque[float] = deque(maxlen=2048)
+        self.counters = {"admitted": 0, "completed": 0, "failed": 0, "cancelled": 0,
+                         "rejected_busy": 0, "expired_queued": 0, "expired_streaming": 0}
+
+    async def stream(self, client_id: str, answer: Callable[[str], AsyncIterator[str]], question: str,
+                     deadline_seconds: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Tokens of `answer(question)`, started once a slot is free.
+
+        Raises ServerBusy before anything is queued when the scheduler is
+        overloaded, and DeadlineExceeded when the deadline passes.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (deadline_seconds or self.deadline_seconds)
+        await self._acquire(client_id, deadline)
+        started = loop.time()
+        tokens = answer(question)
+        outcome = "failed"
+        try:
+            while True:
+                try:
+                    # the timeout covers only the wait for the next token, never the consumer's code
+                    async with asyncio.timeout_at(deadline):
+                        token = await anext(tokens)
+                except StopAsyncIteration:
+                    break
+                except TimeoutError:
+                    outcome = "expired_streaming"
+                    raise DeadlineExceeded("The answer did not finish before its deadline.") from None
+                yield token
+            outcome = "completed"
+            seconds = loop.time() - started
+            self._answer_seconds = seconds if self._answer_seconds is None else 0.9 * self._answer_seconds + 0.1 * seconds
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        finally:
+            self.counters[outcome] += 1
+            await tokens.aclose()
+            self._release(client_id)
+
+    def stats(self) -> dict:
+        """
+        Current load, queue wait percentiles (over the last 2048 admitted
+        questions) and counters since start.
+        """
+        waits = np.array(self._waits) * 1000 if self._waits else np.zeros(1)
+        p50, p95, p99 = np.percentile(waits, [50, 95, 99])
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "clients_waiting": len(self._queues),
+            "wait_ms_p50": round(float(p50), 1),
+            "wait_ms_p95": round(float(p95), 1),
+            "wait_ms_p99": round(float(p99), 1),
+            "answer_seconds_avg": None if self._answer_seconds is None else round(self._answer_seconds, 3),
+            **self.counters,
+        }
+
+    async def _acquire(self, client_id: str, deadline: float) -> None:
+        loop = asyncio.get_running_loop()
+        if client_id not in self._queues and self._has_slot(client_id):
+            self._admit(client_id, 0.0)
+            return
+        self._check_admission(client_id, deadline - loop.time())
+
+        waiter = loop.create_future()
+        enqueued = loop.time()
+        self._queues.setdefault(client_id, deque()).append((waiter, enqueued))
+        self.queued += 1
+        try:
+            async with asyncio.timeout_at(deadline):
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                self._release(client_id)  # admitted just as the wait was given up: pass the slot on
+            else:
+                self._remove_waiter(client_id, waiter)
+            if isinstance(e, TimeoutError):
+                self.counters["expired_queued"] += 1
+                raise DeadlineExceeded("No free slot before the question's deadline.",
+                                       retry_after=self._expected_wait()) from None
+            raise
+
+    def _check_admission(self, client_id: str, remaining: float) -> None:
+        reason = None
+        if self.queued >= self.max_queue:
+            reason = f"Server is busy (queue full, {self.queued} waiting)."
+        elif len(self._queues.get(client_id, ())) >= self.per_client_queue:
+            reason = f"Too many questions waiting for this client (max {self.per_client_queue})."
+        elif self._answer_seconds is not None and self._expected_wait() + self._answer_seconds > remaining:
+            reason = f"Server is busy (expected wait {self._expected_wait():.1f}s)."
+        if reason is not None:
+            self.counters["rejected_busy"] += 1
+            logger.warning(f"Rejected question from {client_id}: {reason}")
+            raise ServerBusy(reason, retry_after=self._expected_wait())
+
+    def _expected_wait(self) -> float:
+        if self._answer_seconds is None:
+            return 1.0
+        # the queue drains max_in_flight answers per average answer time
+        return math.ceil((self.queued + 1) / self.max_in_flight) * self._answer_seconds
+
+    def _has_slot(self, client_id: str) -> bool:
+        return self.in_flight < self.max_in_flight and self._client_in_flight.get(client_id, 0) < self.per_client_in_flight
+
+    def _admit(self, client_id: str, waited: float) -> None:
+        self.in_flight += 1
+        self._client_in_flight[client_id] += 1
+        self.counters["admitted"] += 1
+        self._waits.append(waited)
+
+    def _release(self, client_id: str) -> None:
+        self.in_flight -= 1
+        self._client_in_flight[client_id] -= 1
+        if not self._client_in_flight[client_id]:
+            del self._client_in_flight[client_id]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """
+        Hands free slots to waiting clients, round robin.
+        """
+        now = asyncio.get_running_loop().time()
+        while self.in_flight < self.max_in_flight:
+            client_id = next((client for client in self._queues if self._has_slot(client)), None)
+            if client_id is None:
+                return
+            queue = self._queues.pop(client_id)
+            waiter, enqueued = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self._queues[client_id] = queue  # back of the line
+            if waiter.done():
+                continue  # cancelled, its task has not removed it yet
+            self._admit(client_id, now - enqueued)
+            waiter.set_result(None)
+
+    def _remove_waiter(self, client_id: str, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(client_id)
+        if queue is None:
+            return
+        for entry in queue:
+            if entry[0] is waiter:
+                queue.remove(entry)
+                self.queued -= 1
+                break
+        if not queue:
+            del self._queues[client_id]
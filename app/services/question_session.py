@@ -0,0 +1,316 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.utils.metrics import REGISTRY
+from app.services.llm_scheduler import SchedulerRejected
+from fastapi import WebSocket, WebSocketDisconnect
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+import asyncio
+import contextlib
+import json
+import time
+
+END_FRAME = "[[END]]"
+ERROR_PREFIX = "[[ERROR]] "
+PROTOCOL_V2 = "medchat.v2"
+
+ACTIVE_WEBSOCKETS = REGISTRY.gauge("medchat_websocket_connections", "Open /ws/ask connections.")
+
+
+class FrameCoalescer:
+    """
+    Packs the tokens of one answer into protocol v2 frames.
+
+    The first token goes out at once (time to first token is what users
+    notice); later tokens are buffered and flushed when the buffer reaches
+    `max_bytes` or `flush_ms` after the first buffered token. The buffer
+    is taken only once the connection's send lock is held, so while a slow
+    client holds up a send, tokens keep accumulating and the next frame
+    gets bigger instead of frames queueing up.
+
+    Frames are ``{"id", "seq", "data"}``; the last one carries
+    ``"done": true`` or ``"error"`` (plus any buffered data).
+    """
+
+    def __init__(self, session: "QuestionSession", message_id: str, flush_ms: float, max_bytes: int):
+        self.session = session
+        self.message_id = message_id
+        self.flush_seconds = flush_ms / 1000
+        self.max_bytes = max_bytes
+        self.seq = 0
+        self._buffer: List[str] = []
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def add(self, token: str) -> None:
+        self._buffer.append(token)
+        self._size += len(token)
+        if self.seq == 0 or self._size >= self.max_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_seconds, self._flush_later)
+
+    async def flush(self, **final) -> None:
+        """
+        Sends the buffered tokens, with `final` flags (done=True or
+        error=...) when this is the last frame.
+        """
+        self.cancel()
+        async with self.session._send_lock:
+            if not self._buffer and not final:
+                return
+            frame = {"id": self.message_id, "seq": self.seq}
+            if self._buffer:
+                frame["data"] = "".join(self._buffer)
+            frame.update(final)
+            tokens = len(self._buffer)
+            self._buffer.clear()
+            self._size = 0
+            self.seq += 1
+            await self.session._write(json.dumps(frame, separators=(",", ":")), tokens)
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_later(self) -> None:
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        # a flush racing a disconnect fails quietly, the question task reports it
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+
+class QuestionSession:
+    """
+    Answers the questions of one websocket connection as concurrent tasks.
+
+    The receive loop keeps reading while answers stream, so a new question,
+    a cancel request or a disconnect is seen immediately and the tasks it
+    affects are cancelled at once. Cancelling a task stops it wherever it
+    is awaiting (retrieval or the Groq stream), which closes the upstream
+    response instead of reading an answer nobody will see.
+
+    Two protocols, chosen per connection when it is accepted:
+
+    Legacy (default, what `static/js` speaks):
+
+    - ``{"question": "..."}`` supersedes every question in flight; tokens
+      are sent one per plain text frame, ending with ``[[END]]``. A plain
+      text message is read the same way.
+    - ``{"question": "...", "id": "q1"}`` runs next to the questions in
+      flight, up to `max_concurrent`. Frames are JSON: ``{"id", "data"}``
+      per token, then ``{"id", "done": true}`` or ``{"id", "error"}``,
+      with the id echoed as a string. Add ``"supersede": true`` to cancel
+      the questions in flight first.
+
+    v2 (websocket subprotocol ``medchat.v2``):
+
+    - Every question runs concurrently; one without an ``id`` gets a
+      server-assigned id. ``"supersede": true`` works as above.
+    - Tokens are coalesced by a FrameCoalescer into ``{"id", "seq",
+      "data"}`` frames; the last frame of an answer carries
+      ``"done": true`` or ``"error"``. There are no in-band sentinels.
+
+    In both, ``{"cancel": "q1"}`` cancels that question; an answer that is
+    cancelled ends with an ``"error": "cancelled"`` frame (except legacy
+    superseded ones). A question the LLMScheduler turns away ends with
+    ``"error": "busy"`` or ``"deadline"``, a ``"detail"`` message and a
+    ``"retry_after"`` hint in seconds (legacy: ``[[ERROR]] <detail>``).
+
+    Parameters
+    ----------
+    websocket : WebSocket
+        Accepted connection.
+    answer : callable
+        `answer(question)` returning an async generator of tokens.
+    max_concurrent : int, default 4
+        Questions answered at the same time on this connection.
+    protocol : str, optional
+        PROTOCOL_V2 for coalesced frames, None for the legacy protocol.
+    flush_ms : float, default 5
+        v2 only: how long a token may wait for more tokens to share its frame.
+    flush_bytes : int, default 512
+        v2 only: buffered characters that trigger a flush.
+    """
+    # process-wide totals, for monitoring
+    totals = {"connections": 0, "frames": 0, "bytes": 0, "tokens": 0}
+
+    def __init__(self, websocket: WebSocket, answer: Callable[[str], AsyncGenerator[str, None]], max_concurrent: int = 4,
+                 protocol: Optional[str] = None, flush_ms: float = 5, flush_bytes: int = 512):
+        self.websocket = websocket
+        self.answer = answer
+        self.max_concurrent = max_concurrent
+        self.protocol = protocol
+        self.flush_ms = flush_ms
+        self.flush_bytes = flush_bytes
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+        self._count = 0
+        self.frames = 0
+        self.bytes = 0
+        self.tokens = 0
+
+    async def run(self) -> None:
+        """
+        Reads messages until the client disconnects, then cancels whatever
+        is still running and logs the connection's frame statistics.
+        """
+        started = time.perf_counter()
+        QuestionSession.totals["connections"] += 1
+        ACTIVE_WEBSOCKETS.inc()
+        try:
+            while True:
+                await self.handle(await self.websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            ACTIVE_WEBSOCKETS.dec()
+            await self.cancel_all()
+            self._log_stats(time.perf_counter() - started)
+
+    async def handle(self, message: str) -> None:
+        try:
+            data = json.loads(message)
+        except ValueError:
+            data = {"question": message}
+        if not isinstance(data, dict):
+            data = {"question": str(data)}
+
+        if "cancel" in data:
+            if not await self.cancel(str(data["cancel"])):
+                await self._send_error(False, str(data["cancel"]), "Unknown or finished question.")
+            return
+
+        question = data.get("question")
+        legacy = self.protocol is None and data.get("id") is None
+        message_id = None if data.get("id") is None else str(data["id"])
+        if not question:
+            await self._send_error(legacy, message_id, "No question provided.")
+            return
+        if legacy or data.get("supersede"):
+            await self.cancel_all()
+        elif message_id in self.tasks:
+            await self._send_error(legacy, message_id, "A question with this id is already running.")
+            return
+        elif len(self.tasks) >= self.max_concurrent:
+            await self._send_error(legacy, message_id, f"Too many questions in flight (max {self.max_concurrent}).")
+            return
+
+        if message_id is None:
+            self._count += 1
+            message_id = f"{'legacy-' if legacy else ''}{self._count}"
+        task = asyncio.create_task(self._answer(message_id, question, legacy), name=f"ws-question-{message_id}")
+        self.tasks[message_id] = task
+        task.add_done_callback(lambda done: self._forget(message_id, done))
+
+    async def cancel(self, message_id: str) -> bool:
+        """
+        Cancels one question and waits until it has stopped.
+        """
+        task = self.tasks.pop(message_id, None)
+        if task is None:
+            return False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return True
+
+    async def cancel_all(self) -> None:
+        for message_id in list(self.tasks):
+            await self.cancel(message_id)
+
+    async def _answer(self, message_id: str, question: str, legacy: bool) -> None:
+        frames = None
+        if self.protocol == PROTOCOL_V2:
+            frames = FrameCoalescer(self, message_id, self.flush_ms, self.flush_bytes)
+        try:
+            # closed on the way out, so a cancellation mid-send releases the scheduler slot at once, not at GC
+            async with contextlib.aclosing(self.answer(question)) as tokens:
+                async for token in tokens:
+                    if frames is not None:
+                        await frames.add(token)
+                    elif legacy:
+                        await self._send_text(token, tokens=1)
+                    else:
+                        await self._send_json({"id": message_id, "data": token}, tokens=1)
+            if frames is not None:
+                await frames.flush(done=True)
+            elif legacy:
+                await self._send_text(END_FRAME)
+            else:
+                await self._send_json({"id": message_id, "done": True})
+        except asyncio.CancelledError:
+            logger.info(f"Question {message_id} cancelled")
+            if not legacy:
+                with contextlib.suppress(Exception):
+                    await self._send_final(frames, message_id, "cancelled")
+            raise
+        except SchedulerRejected as e:
+            logger.info(f"Question {message_id} not answered: {e}")
+            with contextlib.suppress(Exception):
+                if legacy:
+                    await self._send_text(ERROR_PREFIX + str(e))
+                else:
+                    await self._send_final(frames, message_id, e.code, detail=str(e), retry_after=e.retry_after)
+        except Exception as e:
+            logger.error(f"Error answering question {message_id}: {e}")
+            with contextlib.suppress(Exception):
+                if legacy:
+                    await self._send_text(ERROR_PREFIX + "Something went wrong while answering.")
+                else:
+                    await self._send_final(frames, message_id, "Something went wrong while answering.")
+        finally:
+            if frames is not None:
+                frames.cancel()
+
+    def _forget(self, message_id: str, task: asyncio.Task) -> None:
+        if self.tasks.get(message_id) is task:
+            del self.tasks[message_id]
+
+    async def _send_final(self, frames: Optional[FrameCoalescer], message_id: str, error: str, **extra) -> None:
+        if frames is not None:
+            await frames.flush(error=error, **extra)
+        else:
+            await self._send_json({"id": message_id, "error": error, **extra})
+
+    async def _send_error(self, legacy: bool, message_id: Optional[str], error: str) -> None:
+        if legacy:
+            await self._send_text(ERROR_PREFIX + error)
+        elif self.protocol == PROTOCOL_V2:
+            await self._send_json({"id": message_id, "seq": 0, "error": error})
+        else:
+            await self._send_json({"id": message_id, "error": error})
+
+    async def _send_text(self, text: str, tokens: int = 0) -> None:
+        # one writer at a time: frames of concurrent answers must not interleave mid-send
+        async with self._send_lock:
+            await self._write(text, tokens)
+
+    async def _send_json(self, payload: dict, tokens: int = 0) -> None:
+        await self._send_text(json.dumps(payload), tokens)
+
+    async def _write(self, text: str, tokens: int = 0) -> None:
+        """
+        Sends one frame; the caller holds the send lock.
+        """
+        await self.websocket.send_text(text)
+        size = len(text.encode("utf-8"))
+        self.frames += 1
+        self.bytes += size
+        self.tokens += tokens
+        QuestionSession.totals["frames"] += 1
+        QuestionSession.totals["bytes"] += size
+        QuestionSession.totals["tokens"] += tokens
+
+    def _log_stats(self, seconds: float) -> None:
+        if not self.frames:
+            return
+        seconds = max(seconds, 1e-9)
+        logger.info(
+            f"WebSocket closed ({self.protocol or 'legacy'}): {self.frames} frames, {self.bytes} bytes, "
+            f"{self.tokens} tokens in {seconds:.1f}s ({self.frames / seconds:.1f} frames/sec, "
+            f"{self.bytes / seconds:.0f} bytes/sec, {self.tokens / self.frames:.1f} tokens/frame)"
+        )
+
+
+for _name in ("connections", "frames", "bytes", "tokens"):
+    REGISTRY.counter(f"medchat_websocket_{_name}_total", f"Websocket {_name} since start.",
+                     function=lambda name=_name: QuestionSession.totals[name])
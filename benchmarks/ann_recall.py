@@ -0,0 +1,61 @@
+"""
+Recall-vs-latency report of the IVF index against exact search.
+
+Uses the vectors of the local vector store when it exists, otherwise a
+synthetic clustered corpus. Queries are perturbed copies of stored vectors.
+
+    python benchmarks/ann_recall.py --nlist 256 --nprobe 1 4 8 16 32
+    python benchmarks/ann_recall.py --synthetic 1000000
+"""
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.vectorestores.ivf_index import IVFIndex
+from pathlib import Path
+import argparse
+import time
+import numpy as np
+
+
+def load_vectors(args, dimension):
+    config = ConfigurationManager()
+    local_config = config.get_local_vector_store_config()
+    path = Path(local_config.path) / f"{config.get_chatbot_config().index_name}.npy"
+    if not args.synthetic and path.exists():
+        print(f"Using vectors from {path}")
+        return np.load(path, mmap_mode="r")
+    size = args.synthetic or 100000
+    print(f"Using {size} synthetic vectors")
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(1000, dimension)).astype(np.float32)
+    return centers[rng.integers(0, len(centers), size)] + rng.normal(scale=0.6, size=(size, dimension)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--synthetic", type=int, default=0, help="number of synthetic vectors to use instead of the local store")
+    args = parser.parse_args()
+
+    dimension = ConfigurationManager().get_chatbot_config().dimension
+    vectors = load_vectors(args, dimension)
+
+    index = IVFIndex(dimension, nlist=args.nlist)
+    started = time.perf_counter()
+    index.add(vectors)
+    if not index.is_trained:
+        index.train()
+    print(f"Built IVF index over {len(index)} vectors in {time.perf_counter() - started:.2f}s")
+
+    rng = np.random.default_rng(1)
+    queries = np.asarray(vectors[rng.integers(0, len(vectors), args.queries)])
+    queries = queries + rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+
+    print(f"\n{'nprobe':>7} {'recall@' + str(args.k):>10} {'mean ms':>9} {'p95 ms':>9} {'exact ms':>9}")
+    for row in index.recall_report(queries, k=args.k, nprobes=args.nprobe):
+        print(f"{row['nprobe']:>7} {row['recall']:>10.3f} {row['mean_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['exact_mean_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
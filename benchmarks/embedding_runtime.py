@@ -0,0 +1,123 @@
+"""
+Throughput, memory and agreement of the embedding runtimes.
+
+Each runtime (PyTorch HuggingFaceEmbeddings, ONNX fp32, ONNX int8) runs in
+its own process so that RSS numbers are not shared. Reports docs/sec for
+embed_documents, the RSS growth caused by loading the model and embedding,
+and the cosine similarity of each ONNX vector with the PyTorch vector of
+the same text (vectors must agree for an index built with one runtime to
+be queried with another).
+
+Texts are the chunks of DATA_PATH when it has PDFs, otherwise synthetic.
+
+    python benchmarks/embedding_runtime.py --docs 2000
+    python benchmarks/embedding_runtime.py --runtimes torch onnx-int8 --batch-size 64
+"""
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from multiprocessing import get_context
+from pathlib import Path
+import argparse
+import random
+import resource
+import time
+import numpy as np
+
+RUNTIMES = ["torch", "onnx-fp32", "onnx-int8"]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_texts(args):
+    config = ConfigurationManager().get_chatbot_config()
+    if not args.synthetic and any(Path(config.data_path).glob("*.pdf")):
+        from E2EMedicalChatBotWithRAG.preprocess import DocumentPreprocesser
+        texts = []
+        for _, chunks in DocumentPreprocesser().iter_chunks():
+            texts.extend(chunk.page_content for chunk in chunks)
+            if len(texts) >= args.docs:
+                break
+        print(f"Using {len(texts[:args.docs])} chunks from {config.data_path}")
+        return texts[:args.docs]
+    print(f"Using {args.docs} synthetic texts")
+    rng = random.Random(0)
+    words = ("patient skin acne fever treatment diabetes insulin blood pressure heart dose "
+             "symptom infection chronic acute therapy diagnosis clinical drug").split()
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(20, 180))) for _ in range(args.docs)]
+
+
+def run_runtime(runtime, model_name, model_dir, texts, batch_size, agreement_docs, results):
+    before = rss_mb()
+    started = time.perf_counter()
+    if runtime == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        model = HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"device": "cpu"},
+                                      encode_kwargs={"batch_size": batch_size})
+    else:
+        from E2EMedicalChatBotWithRAG.models.onnx_embeddings import load_onnx_embeddings
+        model = load_onnx_embeddings(model_name, model_dir, quantized=runtime == "onnx-int8", batch_size=batch_size)
+    load_seconds = time.perf_counter() - started
+
+    model.embed_documents(texts[:batch_size])  # warm-up
+    started = time.perf_counter()
+    vectors = model.embed_documents(texts)
+    seconds = time.perf_counter() - started
+    results.put({
+        "runtime": runtime,
+        "load_s": load_seconds,
+        "docs_per_sec": len(texts) / seconds,
+        "rss_mb": rss_mb() - before,
+        "vectors": np.asarray(vectors[:agreement_docs], dtype=np.float32),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runtimes", nargs="+", choices=RUNTIMES, default=RUNTIMES)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--agreement-docs", type=int, default=500, help="texts compared against the torch vectors")
+    parser.add_argument("--model", default=None, help="model name or path; defaults to EMBEDDING_MODEL_NAME")
+    parser.add_argument("--model-dir", default=None, help="ONNX export directory; defaults to ONNX_MODEL_DIR")
+    parser.add_argument("--synthetic", action="store_true", help="use synthetic texts even if DATA_PATH has PDFs")
+    args = parser.parse_args()
+
+    config = ConfigurationManager()
+    model_name = args.model or config.get_chatbot_config().embedding_model_name
+    model_dir = args.model_dir or config.get_embedding_runtime_config().onnx_model_dir
+    texts = load_texts(args)
+
+    context = get_context("spawn")
+    rows = []
+    for runtime in args.runtimes:
+        results = context.Queue()
+        process = context.Process(target=run_runtime, args=(runtime, model_name, model_dir, texts,
+                                                            args.batch_size, args.agreement_docs, results))
+        process.start()
+        row = results.get()
+        process.join()
+        rows.append(row)
+
+    reference = next((row["vectors"] for row in rows if row["runtime"] == "torch"), None)
+    print(f"\n{'runtime':>10} {'load s':>8} {'docs/sec':>10} {'RSS MB':>8} {'cos mean':>9} {'cos min':>9}")
+    for row in rows:
+        if reference is not None and row["runtime"] != "torch":
+            a = row["vectors"] / np.linalg.norm(row["vectors"], axis=1, keepdims=True)
+            b = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+            cosine = (a * b).sum(axis=1)
+            agreement = f"{cosine.mean():>9.5f} {cosine.min():>9.5f}"
+        else:
+            agreement = f"{'-':>9} {'-':>9}"
+        print(f"{row['runtime']:>10} {row['load_s']:>8.2f} {row['docs_per_sec']:>10.1f} {row['rss_mb']:>8.1f} {agreement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cold-import time and memory of the serving path and the packages.
+
+Every measurement imports one module in a fresh interpreter and reports
+the median wall time, the resident memory afterwards, and which heavy
+third-party modules ended up loaded. The FastAPI app (`app.main`) should
+not load torch or sentence-transformers unless a local model is configured.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --modules app.main E2EMedicalChatBotWithRAG.vectorestores --repeat 10
+"""
+from pathlib import Path
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "app.main",
+    "E2EMedicalChatBotWithRAG.chains.rag_chain",
+    "E2EMedicalChatBotWithRAG.vectorestores",
+    "E2EMedicalChatBotWithRAG.models",
+    "E2EMedicalChatBotWithRAG.preprocess",
+]
+HEAVY_MODULES = [
+    "torch", "sentence_transformers", "transformers", "langchain_huggingface", "onnxruntime",
+    "langchain_redis", "redis", "pinecone", "langchain_pinecone", "langchain_community", "pypdf",
+]
+
+PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module({module!r})
+seconds = time.perf_counter() - started
+rss = 0.0
+with open("/proc/self/status") as status:
+    for line in status:
+        if line.startswith("VmRSS:"):
+            rss = int(line.split()[1]) / 1024
+print(json.dumps({{"seconds": seconds, "rss_mb": rss, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat, env):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, env=env, check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "module": module,
+        "seconds": statistics.median(run["seconds"] for run in runs),
+        "rss_mb": statistics.median(run["rss_mb"] for run in runs),
+        "loaded": runs[-1]["loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(root / "src"), str(root), env.get("PYTHONPATH")]))
+
+    print(f"{'module':<45} {'import s':>9} {'RSS MB':>8}  heavy modules loaded")
+    for module in args.modules:
+        row = measure(module, args.repeat, env)
+        print(f"{row['module']:<45} {row['seconds']:>9.3f} {row['rss_mb']:>8.1f}  {', '.join(row['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Load test of the /ws/ask websocket without Groq, Pinecone or the HF Space.
+
+By default a server process is started with the real app routes, the real
+RAGChain, scheduler, EmbeddingModel (HTTP client, micro-batcher, cache)
+and retriever, but with the stand-ins of E2EMedicalChatBotWithRAG.fakes:
+a FakeStreamingLLM with the given TTFT and token rate, a
+FakeEmbeddingServer and an InMemoryVectorStore of synthetic chunks.
+N clients then connect at once and ask questions back to back.
+
+Reports time to first token, end-to-end latency (p50/p95/p99), tokens/sec
+per stream and overall, and the server's event-loop lag: anything that
+blocks the loop (a synchronous call on the request path) shows up as lag
+and as TTFT far above the fake LLM's.
+
+    python benchmarks/load_test.py --clients 64 --requests 10
+    python benchmarks/load_test.py --clients 200 --ttft-ms 500 --tokens-per-second 80 --max-in-flight 32
+    python benchmarks/load_test.py --url ws://localhost:8000/ws/ask --clients 8   # a running server
+"""
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import numpy as np
+
+VOCABULARY = ("diabetes insulin hypertension asthma fever cough antibiotic dose tablet infection "
+              "kidney liver heart blood pressure glucose symptoms treatment diagnosis chronic acute "
+              "pain inflammation vaccine allergy therapy surgery chemotherapy cholesterol migraine "
+              "anemia thyroid arthritis pneumonia bronchitis eczema dermatitis fracture sepsis").split()
+
+
+def synthetic_texts(count: int, words: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(VOCABULARY, words)) for _ in range(count)]
+
+
+def serve(args) -> None:
+    """
+    Runs the app routes with the fakes injected, until killed.
+    """
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # the `app` package
+    # the fakes need no credentials, but the config loaders insist on them
+    os.environ.setdefault("GROQ_API_KEY", "load-test")
+    os.environ.setdefault("PINECONE_API_KEY", "load-test")
+    from E2EMedicalChatBotWithRAG.chains.rag_chain import RAGChain
+    from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+    from E2EMedicalChatBotWithRAG.fakes import FakeEmbeddingServer, FakeStreamingLLM, InMemoryVectorStore
+    from E2EMedicalChatBotWithRAG.models.embedding_client import EmbeddingHTTPClient
+    from E2EMedicalChatBotWithRAG.models.embedding_model import EmbeddingModel
+    from E2EMedicalChatBotWithRAG.utils import REGISTRY, STAGE_SECONDS
+    from app.routers import chatbot
+    from app.services import LLMScheduler
+    from dataclasses import replace
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+    import uvicorn
+
+    dimension = ConfigurationManager().get_chatbot_config().dimension
+    embedding_server = FakeEmbeddingServer(dimension, latency_ms=args.embed_latency_ms)
+    embedding_url = embedding_server.start()
+    loop_lag = deque(maxlen=100000)
+
+    async def watch_loop():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            loop_lag.append(time.perf_counter() - started - 0.01)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        embedding_model = EmbeddingModel()
+        embedding_model.config = replace(embedding_model.config, embedding_model_url=embedding_url)
+        store = InMemoryVectorStore(embedding_model, dimension)
+        store.add_texts(synthetic_texts(args.chunks, 120, seed=0))
+        llm = FakeStreamingLLM(ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second,
+                               answer_tokens=args.answer_tokens)
+        chatbot.rag_chain = await RAGChain.make_async(client=None, llm=llm, vector_store=store)
+        if not args.answer_cache:
+            chatbot.rag_chain.answer_cache = None
+        # every load client comes from 127.0.0.1, so per-client limits would throttle them as one
+        chatbot.scheduler = LLMScheduler(max_in_flight=args.max_in_flight, max_queue=args.max_queue,
+                                         per_client_in_flight=args.max_in_flight, per_client_queue=args.max_queue,
+                                         deadline_seconds=chatbot.scheduler.deadline_seconds)
+        watcher = asyncio.create_task(watch_loop())
+        yield
+        watcher.cancel()
+        await EmbeddingHTTPClient().close()
+        embedding_server.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.router.routes.extend(chatbot.router.routes)
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render())
+
+    @app.get("/loadtest/stats")
+    async def stats():
+        lag = np.array(loop_lag) * 1000 if loop_lag else np.zeros(1)
+        return {
+            "stage_ms_mean": {labels[0]: total / count * 1000
+                              for labels, (count, total) in STAGE_SECONDS.snapshot().items() if count},
+            "loop_lag_ms_p50": float(np.percentile(lag, 50)),
+            "loop_lag_ms_p99": float(np.percentile(lag, 99)),
+            "loop_lag_ms_max": float(lag.max()),
+            "embedding_server": embedding_server.stats(),
+            "scheduler": chatbot.scheduler.stats(),
+        }
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+async def run_client(url: str, questions: list, protocol: str, results: list) -> None:
+    from websockets.asyncio.client import connect
+    subprotocols = ["medchat.v2"] if protocol == "v2" else None
+    async with connect(url, subprotocols=subprotocols, max_size=None) as websocket:
+        for question in questions:
+            sent = time.perf_counter()
+            first, tokens, error = None, 0, None
+            await websocket.send(json.dumps({"question": question}))
+            while True:
+                frame = await websocket.recv()
+                if protocol == "v2":
+                    message = json.loads(frame)
+                    if message.get("data"):
+                        first = first or time.perf_counter()
+                        tokens += len(message["data"].split())
+                    if "error" in message:
+                        error = message["error"]
+                    if message.get("done") or "error" in message:
+                        break
+                elif frame == "[[END]]":
+                    break
+                elif frame.startswith("[[ERROR]]"):
+                    error = frame[len("[[ERROR]] "):]
+                    break
+                else:
+                    first = first or time.perf_counter()
+                    tokens += 1
+            results.append({"sent": sent, "first": first, "end": time.perf_counter(), "tokens": tokens, "error": error})
+
+
+async def run_load(args, url: str) -> tuple:
+    results = []
+    questions = [f"{question} ({number})" for number, question in
+                 enumerate(synthetic_texts(args.clients * args.requests, 8, seed=1))]
+    started = time.perf_counter()
+    clients = [run_client(url, questions[c * args.requests:(c + 1) * args.requests], args.protocol, results)
+               for c in range(args.clients)]
+    outcomes = await asyncio.gather(*clients, return_exceptions=True)
+    failed_clients = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    return results, time.perf_counter() - started, failed_clients
+
+
+def percentiles(values) -> str:
+    if not len(values):
+        return "-"
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return f"p50 {p50:8.1f}  p95 {p95:8.1f}  p99 {p99:8.1f}"
+
+
+def report(results: list, seconds: float, failed_clients: list, server_stats: dict) -> None:
+    ok = [r for r in results if r["error"] is None and r["first"] is not None]
+    errors = Counter(r["error"] for r in results if r["error"] is not None)
+    ttft = np.array([(r["first"] - r["sent"]) * 1000 for r in ok])
+    latency = np.array([(r["end"] - r["sent"]) * 1000 for r in ok])
+    stream_rates = np.array([(r["tokens"] - 1) / (r["end"] - r["first"]) for r in ok
+                             if r["tokens"] > 1 and r["end"] > r["first"]])
+    tokens = sum(r["tokens"] for r in results)
+
+    print(f"\n{len(ok)} answers, {sum(errors.values())} errors {dict(errors) or ''}"
+          f"{f', {len(failed_clients)} clients failed: {failed_clients[0]!r}' if failed_clients else ''}")
+    print(f"{len(results) / seconds:.1f} requests/sec, {tokens / seconds:.0f} tokens/sec over {seconds:.1f}s")
+    print(f"TTFT ms            {percentiles(ttft)}")
+    print(f"latency ms         {percentiles(latency)}")
+    print(f"stream tokens/sec  {percentiles(stream_rates)}")
+    if server_stats:
+        print(f"loop lag ms        p50 {server_stats['loop_lag_ms_p50']:8.1f}  p99 {server_stats['loop_lag_ms_p99']:8.1f}"
+              f"  max {server_stats['loop_lag_ms_max']:8.1f}")
+        embedding = server_stats["embedding_server"]
+        print(f"embedding requests {embedding['requests']} for {embedding['queries']} queries "
+              f"({embedding['queries_per_request']} per request)")
+        stages = "  ".join(f"{stage} {ms:.1f}" for stage, ms in server_stats["stage_ms_mean"].items())
+        print(f"stage mean ms      {stages}")
+        scheduler = server_stats["scheduler"]
+        print(f"scheduler wait ms  p50 {scheduler['wait_ms_p50']:8.1f}  p95 {scheduler['wait_ms_p95']:8.1f}"
+              f"  p99 {scheduler['wait_ms_p99']:8.1f}, rejected {scheduler['rejected_busy']}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args) -> tuple:
+    import httpx
+    port = free_port()
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+               "--ttft-ms", str(args.ttft_ms), "--tokens-per-second", str(args.tokens_per_second),
+               "--answer-tokens", str(args.answer_tokens), "--embed-latency-ms", str(args.embed_latency_ms),
+               "--chunks", str(args.chunks), "--max-in-flight", str(args.max_in_flight),
+               "--max-queue", str(args.max_queue)] + (["--answer-cache"] if args.answer_cache else [])
+    output = None if args.verbose else subprocess.DEVNULL
+    process = subprocess.Popen(command, stdout=output, stderr=output)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Load test server exited; re-run with --verbose to see why")
+        try:
+            if httpx.get(f"{base}/loadtest/stats", timeout=1).status_code == 200:
+                return process, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Load test server did not start within 120s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent websocket connections")
+    parser.add_argument("--requests", type=int, default=5, help="questions per client, asked back to back")
+    parser.add_argument("--protocol", choices=["legacy", "v2"], default="legacy")
+    parser.add_argument("--url", default=None, help="test a running server instead of starting one with fakes")
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--answer-tokens", type=int, default=100)
+    parser.add_argument("--embed-latency-ms", type=float, default=30)
+    parser.add_argument("--chunks", type=int, default=5000, help="synthetic chunks in the in-memory index")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="defaults to the configured MAX_IN_FLIGHT")
+    parser.add_argument("--max-queue", type=int, default=None, help="defaults to the configured MAX_QUEUE")
+    parser.add_argument("--answer-cache", action="store_true", help="keep the semantic answer cache on")
+    parser.add_argument("--verbose", action="store_true", help="show the server's output")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=8765, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.max_in_flight is None or args.max_queue is None:
+        from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+        scheduler_config = ConfigurationManager().get_llm_scheduler_config()
+        args.max_in_flight = args.max_in_flight or scheduler_config.max_in_flight
+        args.max_queue = args.max_queue or scheduler_config.max_queue
+
+    if args.serve:
+        serve(args)
+        return
+
+    process, server_stats = None, {}
+    url = args.url
+    if url is None:
+        process, base = start_server(args)
+        url = base.replace("http", "ws", 1) + "/ws/ask"
+    print(f"{args.clients} clients x {args.requests} questions against {url}")
+    try:
+        results, seconds, failed_clients = asyncio.run(run_load(args, url))
+        if process is not None:
+            import httpx
+            server_stats = httpx.get(f"{base}/loadtest/stats", timeout=10).json()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    report(results, seconds, failed_clients, server_stats)
+
+
+if __name__ == "__main__":
+    main()
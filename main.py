@@ -1,17 +1,21 @@
 from src.E2EMedicalChatBotWithRAG.logger import logger
 from src.E2EMedicalChatBotWithRAG.vectorestores import RedisDB
-from src.E2EMedicalChatBotWithRAG.preprocess import DocumentPreprocesser
+from src.E2EMedicalChatBotWithRAG.preprocess import IncrementalIngestion, StreamingIngestion
 from src.E2EMedicalChatBotWithRAG.exceptions import AppException
 from langchain.schema import Document
 
 
-def main():
+def main(full=False):
     try:
         redis_client = RedisDB()
-        document_preprocesser = DocumentPreprocesser()
-        preprocessed_data = document_preprocesser.run()
-        redis_client.create_vector_store(preprocessed_data)
+        if full:
+            # streams every PDF through load -> chunk -> embed -> upsert with flat memory
+            StreamingIngestion(vector_store=redis_client).run()
+        else:
+            # only re-embeds the PDFs that changed since the last run
+            IncrementalIngestion(vector_store=redis_client).run()
         new_doc = Document(
+            id="kirti-pogra-profile",
             page_content="This project is built by Kirti Pogra, she used langchain and groq and RAG functionalitize.\
                 And this project is for her portfolio. \
                 The code is available on GitHub. The project name is medical chatbot using rag.\
@@ -25,9 +29,13 @@ def main():
         raise AppException(e)
 
 
+import argparse
 import time
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="re-ingest every PDF instead of only the changed ones")
+    args = parser.parse_args()
     start_time = time.time()
-    main()
+    main(full=args.full)
     print(f"This took around {(time.time()-start_time)/60} minutes")
\ No newline at end of file
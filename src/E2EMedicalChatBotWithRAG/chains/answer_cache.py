@@ -0,0 +1,121 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from typing import Hashable, List, Optional
+import threading
+import time
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Cache of streamed LLM answers keyed by question meaning.
+
+    A lookup hits when a cached question embedding has cosine similarity
+    >= `threshold` with the new question *and* was answered from the same
+    retrieved context. Cached embeddings live in one preallocated float32
+    matrix, so a lookup is a single matrix-vector product. When full, the
+    least recently used entry is overwritten; entries older than `ttl`
+    seconds never hit.
+
+    Call `check_generation()` before use: when the index generation moves
+    (the index was re-ingested) every entry is dropped.
+
+    Parameters
+    ----------
+    dimension : int
+        Embedding dimension.
+    capacity : int, default 2048
+        Maximum number of cached answers.
+    threshold : float, default 0.95
+        Minimum cosine similarity for a hit.
+    ttl : float, optional
+        Seconds an answer stays valid. None disables expiry.
+    """
+
+    def __init__(self, dimension: int, capacity: int = 2048, threshold: float = 0.95, ttl: Optional[float] = None):
+        self.dimension = dimension
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self._vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self._context_hashes = np.zeros(capacity, dtype=np.int64)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._created = np.zeros(capacity, dtype=np.float64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._answers: List[Optional[List[str]]] = [None] * capacity
+        self._lock = threading.Lock()
+        self._generation = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def check_generation(self, generation: int) -> None:
+        if generation != self._generation:
+            if self._generation is not None:
+                self.invalidate()
+            self._generation = generation
+
+    def lookup(self, embedding, context_key: Hashable) -> Optional[List[str]]:
+        """
+        Returns the cached answer tokens, or None on a miss.
+        """
+        query = self._normalize(embedding)
+        context_hash = hash(context_key)
+        now = time.monotonic()
+        with self._lock:
+            candidates = self._valid & (self._context_hashes == context_hash)
+            if self.ttl is not None:
+                candidates &= self._created > now - self.ttl
+            if not candidates.any():
+                self.misses += 1
+                return None
+            scores = np.where(candidates, self._vectors @ query, -np.inf)
+            slot = int(np.argmax(scores))
+            if scores[slot] < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[slot] = now
+            self.hits += 1
+            return self._answers[slot]
+
+    def store(self, embedding, context_key: Hashable, tokens: List[str]) -> None:
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            free = np.flatnonzero(~self._valid)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._vectors[slot] = query
+            self._context_hashes[slot] = hash(context_key)
+            self._valid[slot] = True
+            self._created[slot] = now
+            self._last_used[slot] = now
+            self._answers[slot] = list(tokens)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._valid[:] = False
+            self._answers = [None] * self.capacity
+            self.invalidations += 1
+        logger.info("Semantic answer cache invalidated")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": int(self._valid.sum()),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _normalize(self, embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,189 @@
+from E2EMedicalChatBotWithRAG.retrievers.bm25_index import tokenize
+from langchain.schema import Document
+from typing import Callable, Dict, List, Optional
+import math
+import re
+import numpy as np
+
+MIN_OVERLAP_CHARS = 20  # shorter common edges are coincidence, not splitter overlap
+MAX_OVERLAP_CHARS = 400  # twice the splitter's chunk_overlap
+MIN_TAIL_TOKENS = 40  # a trimmed last chunk shorter than this is dropped instead
+
+
+def merge_overlapping(first: str, second: str, max_overlap: int = MAX_OVERLAP_CHARS) -> Optional[str]:
+    """
+    The two texts joined at their common edge, or None if they do not
+    overlap. Handles either order and one text containing the other.
+    """
+    if second in first:
+        return first
+    if first in second:
+        return second
+    for head, tail in ((first, second), (second, first)):
+        anchor = tail[:MIN_OVERLAP_CHARS]
+        if len(anchor) < MIN_OVERLAP_CHARS:
+            continue
+        window = head[-max_overlap:]
+        start = len(head) - len(window)
+        pos = window.find(anchor)
+        while pos != -1:
+            # longest overlap first: the earliest anchor hit in the window
+            if tail.startswith(window[pos:]):
+                return head[:start + pos] + tail
+            pos = window.find(anchor, pos + 1)
+    return None
+
+
+class ContextBuilder:
+    """
+    Turns retrieved chunks into the context block of the system prompt.
+
+    Chunks are split with a 200 character overlap, so neighbours retrieved
+    together repeat text. The builder
+
+    1. merges chunks of the same source that overlap (or contain one
+       another) into one passage, ranked as its best chunk,
+    2. drops passages whose word shingles mostly appear in a better
+       ranked passage (the same paragraph in two books),
+    3. orders the rest by maximal marginal relevance, trading retrieval
+       rank against term overlap with the passages already chosen,
+    4. keeps passages until the token budget is spent, trimming the last
+       one at a sentence boundary.
+
+    Everything works on the text alone (the stores do not return chunk
+    vectors), and a few dozen chunks take well under a millisecond.
+
+    Parameters
+    ----------
+    token_budget : int, default 1200
+        Maximum tokens of context.
+    dedup_threshold : float, default 0.8
+        Share of a passage's word 3-shingles found in a better ranked
+        passage above which it is dropped as a duplicate.
+    mmr_lambda : float, default 0.7
+        1.0 orders by retrieval rank only; lower values favour diversity.
+    count_tokens : callable, optional
+        Token counter for the LLM's tokenizer; defaults to len(text) / chars_per_token.
+    chars_per_token : float, default 4.0
+        Used by the default token counter.
+    """
+
+    def __init__(self, token_budget: int = 1200, dedup_threshold: float = 0.8, mmr_lambda: float = 0.7,
+                 count_tokens: Optional[Callable[[str], int]] = None, chars_per_token: float = 4.0):
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.mmr_lambda = mmr_lambda
+        self.chars_per_token = chars_per_token
+        self.count_tokens = count_tokens or self._estimate_tokens
+
+    def build(self, documents: List[Document]) -> List[Document]:
+        """
+        The passages to put in the prompt, best first, within the token budget.
+
+        `documents` must be in retrieval order, best first.
+        """
+        passages = self._merge(documents)
+        passages = self._deduplicate(passages)
+        passages = self._mmr(passages)
+        return self._fit(passages)
+
+    def render(self, documents: List[Document]) -> str:
+        return "\n\n".join(
+            f"[{number}] (source: {doc.metadata.get('source', 'unknown')})\n{doc.page_content}"
+            for number, doc in enumerate(documents, start=1)
+        )
+
+    def __call__(self, documents: List[Document]) -> str:
+        return self.render(self.build(documents))
+
+    def _merge(self, documents: List[Document]) -> List[Document]:
+        passages = []  # [rank, doc, text]; a merged passage keeps the best rank of its chunks
+        for rank, doc in enumerate(documents):
+            text = doc.page_content
+            merged = True
+            while merged:
+                merged = False
+                for i, (other_rank, other, other_text) in enumerate(passages):
+                    if other.metadata.get("source") != doc.metadata.get("source"):
+                        continue
+                    joined = merge_overlapping(other_text, text)
+                    if joined is not None:
+                        passages.pop(i)
+                        if other_rank < rank:
+                            rank, doc = other_rank, other  # keep the id and metadata of the better chunk
+                        text = joined
+                        merged = True
+                        break
+            passages.append([rank, doc, text])
+        passages.sort(key=lambda passage: passage[0])
+        return [Document(id=doc.id, page_content=text, metadata=doc.metadata) for _, doc, text in passages]
+
+    def _deduplicate(self, passages: List[Document]) -> List[Document]:
+        kept, kept_shingles = [], []
+        for passage in passages:
+            words = passage.page_content.lower().split()
+            shingles = {tuple(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+            # containment rather than Jaccard: a chunk repeated inside a longer merged passage is a duplicate too
+            if any(len(shingles & other) / len(shingles) >= self.dedup_threshold for other in kept_shingles):
+                continue
+            kept.append(passage)
+            kept_shingles.append(shingles)
+        return kept
+
+    def _mmr(self, passages: List[Document]) -> List[Document]:
+        if len(passages) <= 2 or self.mmr_lambda >= 1.0:
+            return passages
+        vocab: Dict[str, int] = {}
+        rows = [[vocab.setdefault(term, len(vocab)) for term in tokenize(p.page_content)] for p in passages]
+        vectors = np.zeros((len(passages), max(len(vocab), 1)), dtype=np.float32)
+        for row, term_ids in enumerate(rows):
+            np.add.at(vectors[row], term_ids, 1.0)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        similarity = vectors @ vectors.T
+        relevance = 1.0 - np.arange(len(passages)) / len(passages)
+
+        selected = [0]
+        remaining = list(range(1, len(passages)))
+        while remaining:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+            scores = self.mmr_lambda * relevance[remaining] - (1 - self.mmr_lambda) * redundancy
+            selected.append(remaining.pop(int(np.argmax(scores))))
+        return [passages[i] for i in selected]
+
+    def _fit(self, passages: List[Document]) -> List[Document]:
+        fitted, budget = [], self.token_budget
+        for passage in passages:
+            tokens = self.count_tokens(passage.page_content)
+            if tokens <= budget:
+                fitted.append(passage)
+                budget -= tokens
+                continue
+            if budget >= MIN_TAIL_TOKENS:
+                text = self._trim(passage.page_content, budget)
+                if text:
+                    fitted.append(Document(id=passage.id, page_content=text, metadata=passage.metadata))
+            break
+        return fitted
+
+    def _trim(self, text: str, budget: int) -> str:
+        """
+        The longest prefix of `text` within `budget` tokens, cut after a
+        sentence (or failing that, a word).
+        """
+        low, high = 0, len(text)
+        while low < high:  # binary search on the prefix length
+            middle = (low + high + 1) // 2
+            if self.count_tokens(text[:middle]) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        prefix = text[:low]
+        if low == len(text):
+            return prefix
+        sentence_ends = [match.end() for match in re.finditer(r"[.!?](\s|$)", prefix)]
+        if sentence_ends and sentence_ends[-1] > len(prefix) // 2:
+            return prefix[:sentence_ends[-1]].rstrip()
+        return prefix.rsplit(" ", 1)[0].rstrip()
+
+    def _estimate_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
@@ -1,35 +1,87 @@
 from E2EMedicalChatBotWithRAG.logger import logger
 from E2EMedicalChatBotWithRAG.models.llm_model import LLMAssistant
-from E2EMedicalChatBotWithRAG.vectorestores import RedisDB, PineconeDB, AsyncPineconeDB
+from E2EMedicalChatBotWithRAG.models.reranker import CrossEncoderReranker
+from E2EMedicalChatBotWithRAG import vectorestores  # backends load on first attribute access
+from E2EMedicalChatBotWithRAG import retrievers
 from E2EMedicalChatBotWithRAG.exceptions import AppException
-from langchain.schema.runnable import RunnablePassthrough
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.chains.answer_cache import SemanticAnswerCache
+from E2EMedicalChatBotWithRAG.utils import IndexGeneration, capture_query_vectors
+from E2EMedicalChatBotWithRAG.utils.metrics import ANSWERS, CHAINS_IN_FLIGHT, STAGE_SECONDS
+from E2EMedicalChatBotWithRAG.chains.context_builder import ContextBuilder
+from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
+import asyncio
+import hashlib
+import inspect
+import time
 
 class RAGChain:
-    def __init__(self,use_redis=False,sync=False):
+    def __init__(self,use_redis=False,sync=False,config=ConfigurationManager(),llm=None,vector_store=None):
         """
-        Synchronous initialization for RedisDB or PineconeDB.
+        Synchronous initialization for RedisDB, PineconeDB or LocalVectorDB.
+
+        The backend is RedisDB when `use_redis` is set, otherwise the
+        VECTOR_STORE configured in config.yaml ("pinecone" or "local").
+        A `vector_store` (anything with `get_retriever(k)`, sync or async)
+        and an `llm` chat model passed in replace the configured ones, e.g.
+        the stand-ins of E2EMedicalChatBotWithRAG.fakes for load tests.
         """
+        self.config = config.get_chatbot_config()
+        self.index_generation = IndexGeneration(self.config.index_generation_path)
+        self.hybrid_config = config.get_hybrid_retrieval_config()
+        self.rerank_config = config.get_rerank_config()
+        self.hedged_config = config.get_hedged_retrieval_config()
+        context_config = config.get_context_builder_config()
+        self.context_builder = None
+        if context_config.enabled:
+            self.context_builder = ContextBuilder(
+                token_budget=context_config.token_budget,
+                dedup_threshold=context_config.dedup_threshold,
+                mmr_lambda=context_config.mmr_lambda,
+                chars_per_token=context_config.chars_per_token,
+            )
+        answer_cache_config = config.get_answer_cache_config()
+        self.answer_cache = None
+        if answer_cache_config.enabled:
+            self.answer_cache = SemanticAnswerCache(
+                dimension=self.config.dimension,
+                capacity=answer_cache_config.max_entries,
+                threshold=answer_cache_config.similarity_threshold,
+                ttl=answer_cache_config.ttl_seconds,
+            )
         self.llm_assistant = LLMAssistant()
+        self.llm = llm
+        self.injected_vector_store = vector_store
         if sync:
-            if use_redis:
-                self.vector_store = RedisDB()
+            if vector_store is not None:
+                self.vector_store = vector_store
+            elif use_redis:
+                self.vector_store = vectorestores.RedisDB()
+            elif self.config.vector_store == "local":
+                self.vector_store = vectorestores.LocalVectorDB()
             else:
-                self.vector_store = PineconeDB()
+                self.vector_store = vectorestores.PineconeDB()
         
             self.chain = self._create_chain()
         self.achain = None
+        self.aprompt = None
+        self.allm = None
+        self.aretriever = None
+        self.hedged_retriever = None
         self.avector_store = None
 
     
     @classmethod
-    async def make_async(cls, client):
+    async def make_async(cls, client, llm=None, vector_store=None):
         """
-        Async constructor for AsyncPineconeDB.
+        Async constructor for AsyncPineconeDB, or LocalVectorDB when it is
+        the configured VECTOR_STORE (the client is then unused). `llm` and
+        `vector_store` are passed to __init__.
 
         Returns:
             RAGChain instance with async chain initialized.
         """
-        self = cls()
+        self = cls(llm=llm, vector_store=vector_store)
         self.achain = await self._create_async_chain(client)
         return self
 
@@ -46,23 +98,130 @@ class RAGChain:
 
     async def ainvoke(self, question: str):
         """
-        Asynchronous call to RAG chain.
+        Asynchronous call to RAG chain: aretrieve() then agenerate().
+        """
+        context, query_vector = await self.aretrieve(question)
+        async for token in self.agenerate(question, context, query_vector=query_vector):
+            yield token
+
+    async def aretrieve(self, question: str):
+        """
+        Retrieves the chunks for `question` and, when the ContextBuilder is
+        enabled, turns them into a deduplicated, token-budgeted context.
+
+        Concurrent calls share the embedding micro-batches and the
+        retriever's connections, so callers with many questions should
+        gather them rather than retrieve one at a time.
+
+        Returns:
+            (context, query vector): the vector the dense retriever embedded
+            the question into, for agenerate(); None if none was recorded.
         """
-        
         try:
-            async for token in self.achain.astream(question): # type: ignore
+            with STAGE_SECONDS.time("retrieve"), capture_query_vectors() as query_vectors:
+                context = await self.aretriever.ainvoke(question) # type: ignore
+            if self.context_builder is not None:
+                with STAGE_SECONDS.time("context"):
+                    context = self.context_builder.build(context)
+            return context, query_vectors.get(question)
+        except Exception as e:
+            raise AppException(e) from e
+
+    async def agenerate(self, question: str, context, query_vector=None):
+        """
+        Streams the answer to `question` from the documents returned by
+        aretrieve().
+
+        If a semantically equivalent question was already answered from
+        the same context, the cached answer is replayed token by token
+        without calling the LLM. The cache is looked up with `query_vector`
+        from aretrieve(); the question is only embedded again without it.
+        Prompt formatting, the LLM's first token and the whole stream are
+        timed separately in STAGE_SECONDS.
+        """
+        CHAINS_IN_FLIGHT.inc()
+        try:
+            embedding, context_key = query_vector, None
+            if self.answer_cache is not None:
+                self.answer_cache.check_generation(self.index_generation.current(self.config.index_name))
+                if embedding is None:
+                    embedding = await self.aretriever.embedding_model.aembed_query(question) # type: ignore
+                context_key = self._context_key(context)
+                cached_tokens = self.answer_cache.lookup(embedding, context_key)
+                if cached_tokens is not None:
+                    ANSWERS.inc(1, "cache")
+                    for token in cached_tokens:
+                        yield token
+                    return
+
+            ANSWERS.inc(1, "llm")
+            tokens = []
+            with STAGE_SECONDS.time("prompt"):
+                prompt_context = self.context_builder.render(context) if self.context_builder is not None else context
+                prompt_value = await self.aprompt.ainvoke({"context": prompt_context, "input": question}) # type: ignore
+            started = time.perf_counter()
+            async for token in self.allm.astream(prompt_value): # type: ignore
+                if not tokens:
+                    STAGE_SECONDS.observe(time.perf_counter() - started, "llm_first_token")
+                tokens.append(token.content)
                 yield token.content
+            STAGE_SECONDS.observe(time.perf_counter() - started, "llm_stream")
+
+            # only complete answers get here: a failed or abandoned stream leaves the generator early
+            if self.answer_cache is not None and tokens:
+                self.answer_cache.store(embedding, context_key, tokens)
         except Exception as e:
             raise AppException(e) from e
+        finally:
+            CHAINS_IN_FLIGHT.dec()
+
+    async def _hedge(self, retriever, k):
+        """
+        Wraps the dense retriever in a HedgedRetriever, hedging to the
+        Redis index when it is the configured SECONDARY and can be opened.
+        The Redis retriever embeds through the primary's embedding model, so
+        a hedge adds a vector search, not a second (local) embedding.
+        """
+        secondary = None
+        if self.hedged_config.secondary == "redis":
+            try:
+                secondary = await asyncio.to_thread(
+                    vectorestores.RedisDB.get_async_retriever, retriever.embedding_model, k=k)
+            except Exception as e:
+                logger.warning(f"Redis index unavailable for hedged retrieval, hedging to the primary index: {e}")
+        return retrievers.HedgedRetriever(
+            primary=retriever,
+            secondary=secondary,
+            mode=self.hedged_config.mode,
+            hedge_delay_ms=self.hedged_config.hedge_delay_ms,
+            percentile=self.hedged_config.percentile,
+            max_extra_load=self.hedged_config.max_extra_load,
+        )
+
+    @staticmethod
+    def _context_key(documents):
+        """
+        Order-independent key of the retrieved chunks.
+        """
+        ids = []
+        for doc in documents:
+            doc_id = getattr(doc, "id", None)
+            if not doc_id:
+                content = f"{doc.metadata.get('source')}|{doc.page_content}"
+                doc_id = hashlib.sha1(content.encode("utf-8")).hexdigest()
+            ids.append(doc_id)
+        return tuple(sorted(ids))
 
     def _create_chain(self):
         """
         Build synchronous RAG chain.
         """
         try:
-            llm = self.llm_assistant.get_model()
+            llm = self.llm or self.llm_assistant.get_model()
             prompt = self.llm_assistant.get_template()
             retriever = self.vector_store.get_retriever()
+            if self.context_builder is not None:
+                retriever = retriever | RunnableLambda(self.context_builder)
             rag_chain = (
                 {
                     "context": retriever,
@@ -79,19 +238,61 @@ class RAGChain:
     async def _create_async_chain(self,client):
         """
         Build asynchronous RAG chain.
+
+        The retriever is kept separately in `self.aretriever` so ainvoke can
+        consult the answer cache between retrieval and generation; the
+        returned chain takes {"context", "input"}. When a BM25 index was
+        built at ingestion, dense and lexical results are fused by a
+        HybridRetriever. With re-ranking enabled, CANDIDATES chunks are
+        retrieved and a RerankingRetriever keeps the TOP_K best. With hedged
+        retrieval enabled, the dense retriever is wrapped in a HedgedRetriever.
         """
         try:
-            llm = self.llm_assistant.get_model()
+            llm = self.llm or self.llm_assistant.get_model()
             prompt = self.llm_assistant.get_template()
-            retriever = await AsyncPineconeDB(client).get_retriever()
-            rag_chain = (
-                {
-                    "context": retriever,
-                    "input": RunnablePassthrough()
-                }
-                | prompt
-                | llm
-            )
+            lexical_path = self.hybrid_config.lexical_index_path
+            hybrid = self.hybrid_config.enabled and retrievers.BM25Index.exists(lexical_path)
+            if self.hybrid_config.enabled and not hybrid:
+                logger.warning(f"No BM25 index at {lexical_path}, falling back to dense retrieval. Re-run ingestion to build it.")
+            rerank = self.rerank_config.enabled
+            k = self.rerank_config.candidates if rerank else 3
+            dense_k = max(self.hybrid_config.dense_k, k) if hybrid else k
+            if self.injected_vector_store is not None:
+                self.avector_store = self.injected_vector_store
+                self.aretriever = self.avector_store.get_retriever(k=dense_k)
+                if inspect.isawaitable(self.aretriever):
+                    self.aretriever = await self.aretriever
+            elif self.config.vector_store == "local":
+                self.avector_store = vectorestores.LocalVectorDB()
+                self.aretriever = self.avector_store.get_retriever(k=dense_k)
+            else:
+                self.avector_store = vectorestores.AsyncPineconeDB(client)
+                self.aretriever = await self.avector_store.get_retriever(k=dense_k)
+            if self.hedged_config.enabled:
+                self.hedged_retriever = await self._hedge(self.aretriever, dense_k)
+                self.aretriever = self.hedged_retriever
+            if hybrid:
+                self.aretriever = retrievers.HybridRetriever(
+                    dense_retriever=self.aretriever,
+                    lexical_index=retrievers.BM25Index.load(lexical_path),
+                    k=k,
+                    lexical_k=self.hybrid_config.lexical_k,
+                    rrf_k=self.hybrid_config.rrf_k,
+                    index_path=lexical_path,
+                )
+            if rerank:
+                reranker = CrossEncoderReranker()
+                # load now rather than inside the first request's latency budget
+                await asyncio.to_thread(reranker.preload)
+                self.aretriever = retrievers.RerankingRetriever(
+                    base_retriever=self.aretriever,
+                    reranker=reranker,
+                    k=self.rerank_config.top_k,
+                    latency_budget_ms=self.rerank_config.latency_budget_ms,
+                )
+            # kept apart as well, so agenerate can time prompt formatting and the LLM separately
+            self.aprompt, self.allm = prompt, llm
+            rag_chain = prompt | llm
             return rag_chain
         except Exception as e:
             logger.error(f"Error in creating async RAG chain: {e}")
@@ -1,4 +1,4 @@
-from E2EMedicalChatBotWithRAG.entity.config_entity import ChatBotConfig
+from E2EMedicalChatBotWithRAG.entity.config_entity import ChatBotConfig, EmbeddingClientConfig, EmbeddingBatchConfig, EmbeddingCacheConfig, AnswerCacheConfig, RetrievalCacheConfig, LocalVectorStoreConfig, IngestionConfig, BulkUpsertConfig, EmbeddingRuntimeConfig, PineconeConnectionConfig, HybridRetrievalConfig, RerankConfig, ContextBuilderConfig, WebSocketConfig, LLMSchedulerConfig, HttpApiConfig, HedgedRetrievalConfig
 from E2EMedicalChatBotWithRAG.exceptions import AppException
 from E2EMedicalChatBotWithRAG.logger import logger
 from E2EMedicalChatBotWithRAG.constants import *
@@ -22,9 +22,269 @@ class ConfigurationManager:
                 llm_model_name=chatbot_config['LLM_MODEL_NAME'],
                 index_name=chatbot_config['INDEX_NAME'],
                 redis_url=chatbot_config['REDIS_URL'],
-                dimension=chatbot_config['DIMENSION']
+                dimension=chatbot_config['DIMENSION'],
+                index_generation_path=chatbot_config['INDEX_GENERATION_PATH'],
+                vector_store=chatbot_config['VECTOR_STORE']
             )
             return config
         except Exception as e:
             logger.error(f"Error in getting chatbot config: {e}")
+            raise AppException(e) from e
+
+    def get_embedding_client_config(self) -> EmbeddingClientConfig:
+        try:
+            client_config = self.config['embedding_client_config']
+            config = EmbeddingClientConfig(
+                timeout=client_config['TIMEOUT'],
+                connect_timeout=client_config['CONNECT_TIMEOUT'],
+                max_connections=client_config['MAX_CONNECTIONS'],
+                max_keepalive_connections=client_config['MAX_KEEPALIVE_CONNECTIONS'],
+                keepalive_expiry=client_config['KEEPALIVE_EXPIRY'],
+                max_retries=client_config['MAX_RETRIES'],
+                backoff_base=client_config['BACKOFF_BASE'],
+                backoff_max=client_config['BACKOFF_MAX']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting embedding client config: {e}")
+            raise AppException(e) from e
+
+    def get_embedding_batch_config(self) -> EmbeddingBatchConfig:
+        try:
+            batch_config = self.config['embedding_batch_config']
+            config = EmbeddingBatchConfig(
+                enabled=batch_config['ENABLED'],
+                max_batch_size=batch_config['MAX_BATCH_SIZE'],
+                max_wait_ms=batch_config['MAX_WAIT_MS']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting embedding batch config: {e}")
+            raise AppException(e) from e
+
+    def get_embedding_cache_config(self) -> EmbeddingCacheConfig:
+        try:
+            cache_config = self.config['embedding_cache_config']
+            config = EmbeddingCacheConfig(
+                enabled=cache_config['ENABLED'],
+                max_entries=cache_config['MAX_ENTRIES'],
+                ttl_seconds=cache_config['TTL_SECONDS'],
+                use_redis=cache_config['USE_REDIS'],
+                redis_url=self.config['chatbot_config']['REDIS_URL'],
+                redis_ttl_seconds=cache_config['REDIS_TTL_SECONDS']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting embedding cache config: {e}")
+            raise AppException(e) from e
+
+    def get_answer_cache_config(self) -> AnswerCacheConfig:
+        try:
+            cache_config = self.config['answer_cache_config']
+            config = AnswerCacheConfig(
+                enabled=cache_config['ENABLED'],
+                similarity_threshold=cache_config['SIMILARITY_THRESHOLD'],
+                max_entries=cache_config['MAX_ENTRIES'],
+                ttl_seconds=cache_config['TTL_SECONDS']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting answer cache config: {e}")
+            raise AppException(e) from e
+
+    def get_retrieval_cache_config(self) -> RetrievalCacheConfig:
+        try:
+            cache_config = self.config['retrieval_cache_config']
+            config = RetrievalCacheConfig(
+                enabled=cache_config['ENABLED'],
+                max_entries=cache_config['MAX_ENTRIES'],
+                ttl_seconds=cache_config['TTL_SECONDS']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting retrieval cache config: {e}")
+            raise AppException(e) from e
+
+    def get_local_vector_store_config(self) -> LocalVectorStoreConfig:
+        try:
+            store_config = self.config['local_vector_store_config']
+            config = LocalVectorStoreConfig(
+                path=store_config['PATH'],
+                index_type=store_config['INDEX_TYPE'],
+                nlist=store_config['NLIST'],
+                nprobe=store_config['NPROBE'],
+                train_iterations=store_config['TRAIN_ITERATIONS']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting local vector store config: {e}")
+            raise AppException(e) from e
+
+    def get_embedding_runtime_config(self) -> EmbeddingRuntimeConfig:
+        try:
+            runtime_config = self.config['embedding_runtime_config']
+            if runtime_config['RUNTIME'] not in ("torch", "onnx"):
+                raise ValueError(f"Unknown embedding RUNTIME: {runtime_config['RUNTIME']}")
+            config = EmbeddingRuntimeConfig(
+                runtime=runtime_config['RUNTIME'],
+                onnx_model_dir=runtime_config['ONNX_MODEL_DIR'],
+                quantized=runtime_config['QUANTIZED'],
+                max_length=runtime_config['MAX_LENGTH'],
+                batch_size=runtime_config['BATCH_SIZE'],
+                intra_op_threads=runtime_config['INTRA_OP_THREADS']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting embedding runtime config: {e}")
+            raise AppException(e) from e
+
+    def get_ingestion_config(self) -> IngestionConfig:
+        try:
+            ingestion_config = self.config['ingestion_config']
+            config = IngestionConfig(
+                parallel_loading=ingestion_config['PARALLEL_LOADING'],
+                loader_workers=ingestion_config['LOADER_WORKERS'],
+                file_timeout=ingestion_config['FILE_TIMEOUT'],
+                manifest_path=ingestion_config['MANIFEST_PATH'],
+                stream_batch_size=ingestion_config['STREAM_BATCH_SIZE'],
+                stream_queue_size=ingestion_config['STREAM_QUEUE_SIZE']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting ingestion config: {e}")
+            raise AppException(e) from e
+
+    def get_bulk_upsert_config(self) -> BulkUpsertConfig:
+        try:
+            bulk_upsert_config = self.config['bulk_upsert_config']
+            config = BulkUpsertConfig(
+                embed_batch_size=bulk_upsert_config['EMBED_BATCH_SIZE'],
+                upsert_batch_size=bulk_upsert_config['UPSERT_BATCH_SIZE'],
+                max_in_flight=bulk_upsert_config['MAX_IN_FLIGHT'],
+                max_payload_bytes=bulk_upsert_config['MAX_PAYLOAD_BYTES'],
+                max_retries=bulk_upsert_config['MAX_RETRIES'],
+                backoff_base=bulk_upsert_config['BACKOFF_BASE'],
+                backoff_max=bulk_upsert_config['BACKOFF_MAX'],
+                checkpoint_path=bulk_upsert_config['CHECKPOINT_PATH']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting bulk upsert config: {e}")
+            raise AppException(e) from e
+
+    def get_pinecone_connection_config(self) -> PineconeConnectionConfig:
+        try:
+            connection_config = self.config['pinecone_connection_config']
+            config = PineconeConnectionConfig(
+                pool_size=connection_config['POOL_SIZE'],
+                warmup_connections=connection_config['WARMUP_CONNECTIONS'],
+                keepalive_seconds=connection_config['KEEPALIVE_SECONDS']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting pinecone connection config: {e}")
+            raise AppException(e) from e
+
+    def get_hybrid_retrieval_config(self) -> HybridRetrievalConfig:
+        try:
+            hybrid_config = self.config['hybrid_retrieval_config']
+            config = HybridRetrievalConfig(
+                enabled=hybrid_config['ENABLED'],
+                lexical_index_path=hybrid_config['LEXICAL_INDEX_PATH'],
+                bm25_k1=hybrid_config['BM25_K1'],
+                bm25_b=hybrid_config['BM25_B'],
+                dense_k=hybrid_config['DENSE_K'],
+                lexical_k=hybrid_config['LEXICAL_K'],
+                rrf_k=hybrid_config['RRF_K']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting hybrid retrieval config: {e}")
+            raise AppException(e) from e
+
+    def get_rerank_config(self) -> RerankConfig:
+        try:
+            rerank_config = self.config['rerank_config']
+            config = RerankConfig(
+                enabled=rerank_config['ENABLED'],
+                model_name=rerank_config['MODEL_NAME'],
+                candidates=rerank_config['CANDIDATES'],
+                top_k=rerank_config['TOP_K'],
+                latency_budget_ms=rerank_config['LATENCY_BUDGET_MS'],
+                max_length=rerank_config['MAX_LENGTH']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting rerank config: {e}")
+            raise AppException(e) from e
+
+    def get_context_builder_config(self) -> ContextBuilderConfig:
+        try:
+            context_config = self.config['context_builder_config']
+            config = ContextBuilderConfig(
+                enabled=context_config['ENABLED'],
+                token_budget=context_config['TOKEN_BUDGET'],
+                chars_per_token=context_config['CHARS_PER_TOKEN'],
+                dedup_threshold=context_config['DEDUP_THRESHOLD'],
+                mmr_lambda=context_config['MMR_LAMBDA']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting context builder config: {e}")
+            raise AppException(e) from e
+
+    def get_websocket_config(self) -> WebSocketConfig:
+        try:
+            websocket_config = self.config['websocket_config']
+            config = WebSocketConfig(
+                max_concurrent_questions=websocket_config['MAX_CONCURRENT_QUESTIONS'],
+                flush_ms=websocket_config['FLUSH_MS'],
+                flush_bytes=websocket_config['FLUSH_BYTES']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting websocket config: {e}")
+            raise AppException(e) from e
+
+    def get_llm_scheduler_config(self) -> LLMSchedulerConfig:
+        try:
+            scheduler_config = self.config['llm_scheduler_config']
+            config = LLMSchedulerConfig(
+                max_in_flight=scheduler_config['MAX_IN_FLIGHT'],
+                max_queue=scheduler_config['MAX_QUEUE'],
+                per_client_in_flight=scheduler_config['PER_CLIENT_IN_FLIGHT'],
+                per_client_queue=scheduler_config['PER_CLIENT_QUEUE'],
+                deadline_seconds=scheduler_config['DEADLINE_SECONDS'],
+                trusted_proxies=scheduler_config['TRUSTED_PROXIES']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting LLM scheduler config: {e}")
+            raise AppException(e) from e
+
+    def get_http_api_config(self) -> HttpApiConfig:
+        try:
+            http_config = self.config['http_api_config']
+            config = HttpApiConfig(
+                max_batch_questions=http_config['MAX_BATCH_QUESTIONS']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting HTTP API config: {e}")
+            raise AppException(e) from e
+
+    def get_hedged_retrieval_config(self) -> HedgedRetrievalConfig:
+        try:
+            hedged_config = self.config['hedged_retrieval_config']
+            config = HedgedRetrievalConfig(
+                enabled=hedged_config['ENABLED'],
+                mode=hedged_config['MODE'],
+                secondary=hedged_config['SECONDARY'],
+                hedge_delay_ms=hedged_config['HEDGE_DELAY_MS'],
+                percentile=hedged_config['PERCENTILE'],
+                max_extra_load=hedged_config['MAX_EXTRA_LOAD']
+            )
+            return config
+        except Exception as e:
+            logger.error(f"Error in getting hedged retrieval config: {e}")
             raise AppException(e) from e
\ No newline at end of file
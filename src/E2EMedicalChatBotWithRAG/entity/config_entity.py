@@ -11,3 +11,145 @@ class ChatBotConfig:
     index_name: str
     redis_url: str
     dimension: int
+    index_generation_path: Path
+    vector_store: str
+
+@dataclass
+class EmbeddingClientConfig:
+    timeout: float
+    connect_timeout: float
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float
+    max_retries: int
+    backoff_base: float
+    backoff_max: float
+
+@dataclass
+class EmbeddingBatchConfig:
+    enabled: bool
+    max_batch_size: int
+    max_wait_ms: float
+
+@dataclass
+class EmbeddingCacheConfig:
+    enabled: bool
+    max_entries: int
+    ttl_seconds: float
+    use_redis: bool
+    redis_url: str
+    redis_ttl_seconds: int
+
+@dataclass
+class AnswerCacheConfig:
+    enabled: bool
+    similarity_threshold: float
+    max_entries: int
+    ttl_seconds: float
+
+@dataclass
+class RetrievalCacheConfig:
+    enabled: bool
+    max_entries: int
+    ttl_seconds: float
+
+@dataclass
+class LocalVectorStoreConfig:
+    path: Path
+    index_type: str
+    nlist: int
+    nprobe: int
+    train_iterations: int
+
+@dataclass
+class EmbeddingRuntimeConfig:
+    runtime: str
+    onnx_model_dir: str
+    quantized: bool
+    max_length: int
+    batch_size: int
+    intra_op_threads: int
+
+@dataclass
+class IngestionConfig:
+    parallel_loading: bool
+    loader_workers: int
+    file_timeout: float
+    manifest_path: str
+    stream_batch_size: int
+    stream_queue_size: int
+
+@dataclass
+class BulkUpsertConfig:
+    embed_batch_size: int
+    upsert_batch_size: int
+    max_in_flight: int
+    max_payload_bytes: int
+    max_retries: int
+    backoff_base: float
+    backoff_max: float
+    checkpoint_path: str
+
+@dataclass
+class PineconeConnectionConfig:
+    pool_size: int
+    warmup_connections: int
+    keepalive_seconds: float
+
+@dataclass
+class HybridRetrievalConfig:
+    enabled: bool
+    lexical_index_path: str
+    bm25_k1: float
+    bm25_b: float
+    dense_k: int
+    lexical_k: int
+    rrf_k: int
+
+@dataclass
+class RerankConfig:
+    enabled: bool
+    model_name: str
+    candidates: int
+    top_k: int
+    latency_budget_ms: float
+    max_length: int
+
+@dataclass
+class ContextBuilderConfig:
+    enabled: bool
+    token_budget: int
+    chars_per_token: float
+    dedup_threshold: float
+    mmr_lambda: float
+
+@dataclass
+class WebSocketConfig:
+    max_concurrent_questions: int
+    flush_ms: float
+    flush_bytes: int
+
+
+@dataclass
+class LLMSchedulerConfig:
+    max_in_flight: int
+    max_queue: int
+    per_client_in_flight: int
+    per_client_queue: int
+    deadline_seconds: float
+    trusted_proxies: list
+
+
+@dataclass
+class HttpApiConfig:
+    max_batch_questions: int
+
+
+@dataclass
+class HedgedRetrievalConfig:
+    enabled: bool
+    mode: str
+    secondary: str
+    hedge_delay_ms: float
+    percentile: float
+    max_extra_load: float
@@ -31,15 +31,19 @@ class AppException(Exception):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         _,_, exc_tb = sys.exc_info()
+        if exc_tb is None:
+            # raised outside an except block, e.g. for an error collected from a worker thread
+            exc_tb = getattr(error, "__traceback__", None)
         #extracting file name from exception traceback
-        file_name = exc_tb.tb_frame.f_code.co_filename # type: ignore
+        file_name = exc_tb.tb_frame.f_code.co_filename if exc_tb else "unknown"
+        line = exc_tb.tb_lineno if exc_tb else "unknown"
 
         #preparing error message
         error_message = (
             f"\n================== ❌ ERROR TRACE ❌ ==================\n"
             f"🕒 Time     : {timestamp}\n"
             f"📂 File     : {file_name}\n"
-            f"📌 Line     : {exc_tb.tb_lineno}\n" # type: ignore
+            f"📌 Line     : {line}\n"
             f"💥 Message  : {error}\n"
             f"========================================================\n"
         )
@@ -0,0 +1,13 @@
+from E2EMedicalChatBotWithRAG.utils.lazy_import import lazy_exports
+
+# stand-ins for Groq, the embedding endpoint and Pinecone, for offline load tests
+_EXPORTS = {
+    "FakeStreamingLLM": ".fake_llm",
+    "FakeEmbeddingServer": ".fake_embedding_server",
+    "hashed_embedding": ".fake_embedding_server",
+    "InMemoryVectorStore": ".in_memory_store",
+}
+
+__all__ = ["FakeStreamingLLM", "FakeEmbeddingServer", "hashed_embedding", "InMemoryVectorStore"]
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
\ No newline at end of file
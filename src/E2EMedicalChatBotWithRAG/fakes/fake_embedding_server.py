@@ -0,0 +1,100 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.retrievers.bm25_index import tokenize
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from typing import List, Optional
+import asyncio
+import hashlib
+import socket
+import threading
+import time
+import numpy as np
+
+
+def hashed_embedding(text: str, dimension: int = 384) -> List[float]:
+    """
+    Deterministic unit vector of `text` by feature hashing of its terms.
+
+    Texts sharing terms get similar vectors, so retrieval over an index
+    built with it returns plausible chunks, at microseconds per text.
+    """
+    vector = np.zeros(dimension, dtype=np.float32)
+    for term in tokenize(text) or [text]:
+        digest = hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimension
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+class FakeEmbeddingServer:
+    """
+    Stand-in for the remote embedding endpoint (the HF Space `/embed`).
+
+    Speaks the same protocol, ``{"query": str | [str]}`` in and
+    ``{"embeddings": vector | [vectors]}`` out, so EmbeddingModel, its
+    HTTP client, micro-batcher and cache run unchanged against it. Each
+    request takes `latency_ms` plus `per_item_ms` per query.
+
+    start() serves it with uvicorn on a background thread and returns the
+    URL to use as EMBEDDING_MODEL_URL.
+
+    Parameters
+    ----------
+    dimension : int, default 384
+        Vector size; must match the index.
+    latency_ms : float, default 30
+        Fixed time per request (network and queueing of the real endpoint).
+    per_item_ms : float, default 1
+        Additional time per query in the request.
+    """
+
+    def __init__(self, dimension: int = 384, latency_ms: float = 30, per_item_ms: float = 1):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+        self.requests = 0
+        self.items = 0
+        self.app = Starlette(routes=[Route("/embed", self.embed, methods=["POST"])])
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def embed(self, request: Request) -> JSONResponse:
+        payload = await request.json()
+        query = payload.get("query")
+        queries = query if isinstance(query, list) else [query]
+        self.requests += 1
+        self.items += len(queries)
+        await asyncio.sleep((self.latency_ms + self.per_item_ms * len(queries)) / 1000)
+        vectors = [hashed_embedding(str(q), self.dimension) for q in queries]
+        return JSONResponse({"embeddings": vectors if isinstance(query, list) else vectors[0]})
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Serves the endpoint until stop(); returns its URL.
+        """
+        import uvicorn
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        port = sock.getsockname()[1]
+        self._server = uvicorn.Server(uvicorn.Config(self.app, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        url = f"http://{host}:{port}/embed"
+        logger.info(f"Fake embedding server listening on {url}")
+        return url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join()
+            self._server = None
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "queries": self.items,
+                "queries_per_request": round(self.items / self.requests, 2) if self.requests else 0.0}
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+import asyncio
+import time
+
+WORDS = ("the patient should consult a doctor about the symptoms and the recommended dose "
+         "of the medication which depends on age weight and other conditions").split()
+
+
+class FakeStreamingLLM(BaseChatModel):
+    """
+    Chat model that streams a canned answer at a fixed pace, in place of
+    ChatGroq.
+
+    The first token arrives `ttft_ms` after the call and the rest at
+    `tokens_per_second`, with no network or CPU cost, so a load test
+    measures the server's own overhead on top of a known LLM profile.
+
+    Parameters
+    ----------
+    ttft_ms : float, default 300
+        Time to the first token.
+    tokens_per_second : float, default 200
+        Pace of the following tokens; 0 sends them all at once.
+    answer_tokens : int, default 100
+        Tokens per answer.
+    """
+
+    ttft_ms: float = 300
+    tokens_per_second: float = 200
+    answer_tokens: int = 100
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _tokens(self) -> List[str]:
+        return [WORDS[i % len(WORDS)] + " " for i in range(self.answer_tokens)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = "".join(chunk.message.content for chunk in self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.ttft_ms / 1000)
+        for number, token in enumerate(self._tokens()):
+            if number and self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.ttft_ms / 1000)
+        for number, token in enumerate(self._tokens()):
+            if number and self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
@@ -0,0 +1,62 @@
+from E2EMedicalChatBotWithRAG.fakes.fake_embedding_server import hashed_embedding
+from E2EMedicalChatBotWithRAG.retrievers.local_retriever import LocalAsyncRetriever
+from E2EMedicalChatBotWithRAG.vectorestores.local_index import FlatIndex
+from langchain.schema import Document
+from typing import Any, List, Tuple
+
+
+class InMemoryVectorStore:
+    """
+    Vector store held in memory only, in place of Pinecone.
+
+    Chunks are embedded with hashed_embedding (the function the
+    FakeEmbeddingServer answers queries with) and searched exactly with a
+    FlatIndex; get_retriever() returns the same LocalAsyncRetriever as
+    LocalVectorDB, so queries still go through `embedding_model`.
+
+    Parameters
+    ----------
+    embedding_model : Any
+        Must expose `embed_query` and an async `aembed_query` method,
+        e.g. an EmbeddingModel pointed at a FakeEmbeddingServer.
+    dimension : int, default 384
+        Vector size.
+    """
+
+    def __init__(self, embedding_model: Any, dimension: int = 384):
+        self.embedding_model = embedding_model
+        self.dimension = dimension
+        self.index = FlatIndex(dimension)
+        self.records: List[Document] = []
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add_documents(self, docs: List[Document]) -> None:
+        if not docs:
+            return
+        self.index.add([hashed_embedding(doc.page_content, self.dimension) for doc in docs])
+        self.records.extend(docs)
+
+    def add_texts(self, texts: List[str], source: str = "synthetic") -> None:
+        self.add_documents([Document(id=f"{source}-{len(self.records) + i}", page_content=text,
+                                     metadata={"source": source}) for i, text in enumerate(texts)])
+
+    def get_retriever(self, k: int = 3) -> LocalAsyncRetriever:
+        return LocalAsyncRetriever(store=self, embedding_model=self.embedding_model, k=k,
+                                   tags=["InMemoryVectorStore"])
+
+    def search(self, query_vectors, k: int = 3) -> List[List[Tuple[Document, float]]]:
+        if not self.records:
+            return [[] for _ in range(len(query_vectors))]
+        scores, rows = self.index.search(query_vectors, k)
+        return [
+            [(self._with_score(self.records[row], score), float(score))
+             for score, row in zip(row_scores, row_ids) if row >= 0]
+            for row_scores, row_ids in zip(scores, rows)
+        ]
+
+    @staticmethod
+    def _with_score(doc: Document, score: float) -> Document:
+        return Document(id=doc.id, page_content=doc.page_content,
+                        metadata={**doc.metadata, "similarity_score": float(score)})
@@ -1,4 +1,13 @@
-from .embedding_model import EmbeddingModel
-from .llm_model import LLMAssistant
+from E2EMedicalChatBotWithRAG.utils.lazy_import import lazy_exports
 
-__all__ = ["EmbeddingModel", "LLMAssistant"]
\ No newline at end of file
+# backends are imported on first use, see lazy_exports
+_EXPORTS = {
+    "EmbeddingModel": ".embedding_model",
+    "LLMAssistant": ".llm_model",
+    "ModelRegistry": ".registry",
+    "CrossEncoderReranker": ".reranker",
+}
+
+__all__ = ["EmbeddingModel", "LLMAssistant", "ModelRegistry", "CrossEncoderReranker"]
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
\ No newline at end of file
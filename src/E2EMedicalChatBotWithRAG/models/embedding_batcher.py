@@ -0,0 +1,199 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.utils.metrics import STAGE_SECONDS
+from langchain_core.embeddings import Embeddings
+from typing import Any, Awaitable, Callable, List, Optional, Set
+import asyncio
+import time
+
+
+class EmbeddingBatcher:
+    """
+    Dynamic micro-batcher for query embeddings.
+
+    Concurrent callers of embed() are queued; a background task collects
+    queries until `max_batch_size` is reached or `max_wait_ms` has passed
+    since the first one arrived, embeds them with a single call to
+    `embed_batch` and resolves each caller's future with its own vector.
+
+    Parameters
+    ----------
+    embed_batch : Callable[[List[str]], Awaitable[List[List[float]]]]
+        Coroutine function embedding a list of texts in one call.
+    max_batch_size : int, default 32
+        Upper bound on the number of queries sent in one call.
+    max_wait_ms : float, default 5.0
+        Longest time the first query of a batch waits for company.
+    """
+
+    def __init__(self,
+        embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Queue one query and wait for the batch that carries it.
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()  # type: ignore
+        await self._queue.put((text, future, time.perf_counter()))  # type: ignore
+        return await future
+
+    def stats(self) -> dict:
+        """
+        Counters for batch size and queue wait, in milliseconds.
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "mean_queue_wait_ms": 1000 * self.queue_wait_total / self.items if self.items else 0.0,
+            "max_queue_wait_ms": 1000 * self.queue_wait_max,
+        }
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for task in list(self._inflight):
+            task.cancel()
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+
+    async def _collect(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]  # type: ignore
+            deadline = self._loop.time() + self.max_wait  # type: ignore
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()  # type: ignore
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))  # type: ignore
+                except asyncio.TimeoutError:
+                    break
+            # Flush in the background so the next batch can start filling
+            # while this one is in flight.
+            task = self._loop.create_task(self._flush(batch))  # type: ignore
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _flush(self, batch):
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            wait = started - enqueued
+            self.queue_wait_total += wait
+            self.queue_wait_max = max(self.queue_wait_max, wait)
+        self.batches += 1
+        self.items += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+        texts = [text for text, _, _ in batch]
+        try:
+            vectors = await self.embed_batch(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            logger.error(f"Error in embedding batch of {len(texts)}: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Wraps a local LangChain embedding model (e.g. HuggingFaceEmbeddings) so
+    that concurrent `aembed_query` calls are micro-batched into one
+    vectorized `embed_documents` call run off the event loop.
+
+    Every other method delegates to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.batcher = EmbeddingBatcher(
+            embed_batch=self._embed_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        with STAGE_SECONDS.time("embed"):
+            return await self.batcher.embed(text)
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embeddings.embed_documents, texts)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def __repr__(self) -> str:
+        return f"BatchedEmbeddings({self.embeddings!r})"
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """
+    Hands back vectors that were computed elsewhere, so a vector store's
+    `add_documents` can write a batch embedded by an upstream pipeline stage
+    without embedding it again. Successive `embed_documents` calls consume
+    the vectors in order, which covers stores that embed in sub-batches.
+
+    Queries are embedded by `query_embeddings`, the model the vectors were
+    computed with; without one the wrapper is write-only and embed_query
+    raises TypeError.
+    """
+
+    def __init__(self, vectors: List[List[float]], query_embeddings: Optional[Embeddings] = None):
+        self.vectors = [list(map(float, vector)) for vector in vectors]
+        self.query_embeddings = query_embeddings
+        self._offset = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        end = self._offset + len(texts)
+        if end > len(self.vectors):
+            raise ValueError(f"Asked for {end} vectors, only {len(self.vectors)} were precomputed")
+        vectors = self.vectors[self._offset:end]
+        self._offset = end
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.query_embeddings is None:
+            raise TypeError("PrecomputedEmbeddings only replays document vectors; "
+                            "pass query_embeddings to embed queries")
+        return self.query_embeddings.embed_query(text)
@@ -0,0 +1,162 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.utils import LRUTTLCache
+from E2EMedicalChatBotWithRAG.utils.metrics import REGISTRY
+from typing import List, Optional
+import hashlib
+import re
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = " ?!.,;:"
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "medchat_embedding_cache_lookups_total",
+    "Query embedding cache lookups by tier (local, redis) and outcome (hit, miss, error); "
+    "a local miss goes on to Redis when it is enabled.",
+    labelnames=("tier", "outcome"),
+)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a question used as cache key: lower-cased, with
+    collapsed whitespace and without trailing punctuation, so that
+    "What is acne?" and "what is  acne" share one entry.
+    """
+    return _WHITESPACE.sub(" ", query).strip().lower().rstrip(_TRAILING_PUNCTUATION)
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings.
+
+    The first tier is an in-process LRU with TTL holding float32 arrays.
+    The optional second tier is a Redis instance shared by all uvicorn
+    workers; its values are the raw float32 bytes and expire after
+    `redis_ttl` seconds. Redis failures are logged and treated as misses.
+
+    Keys combine the embedding model name with the normalized question.
+    Every lookup counts one outcome per tier it reached, in stats() and in
+    CACHE_LOOKUPS; overall, a local miss answered by Redis is a hit.
+    """
+
+    def __init__(self,
+        model_name: str,
+        maxsize: int = 10000,
+        ttl: Optional[float] = 3600,
+        redis_url: Optional[str] = None,
+        redis_ttl: Optional[int] = 86400,
+    ) -> None:
+        self.model_name = model_name
+        self.local = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self._redis = None
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+
+    def key(self, query: str) -> str:
+        return f"{self.model_name}:{normalize_query(query)}"
+
+    def get(self, query: str) -> Optional[List[float]]:
+        """
+        Looks the query up in the in-process tier only.
+        """
+        vector = self._get_local(self.key(query))
+        return None if vector is None else vector.tolist()
+
+    def set(self, query: str, embedding: List[float]) -> None:
+        self.local.set(self.key(query), np.asarray(embedding, dtype=np.float32))
+
+    async def aget(self, query: str) -> Optional[List[float]]:
+        """
+        Looks the query up in the in-process tier, then in Redis.
+
+        A Redis hit is copied into the in-process tier.
+        """
+        key = self.key(query)
+        vector = self._get_local(key)
+        if vector is not None:
+            return vector.tolist()
+
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(self._redis_key(key))
+        except Exception as e:
+            self.redis_errors += 1
+            CACHE_LOOKUPS.inc(1, "redis", "error")
+            logger.warning(f"Embedding cache Redis lookup failed: {e}")
+            return None
+        if raw is None:
+            self.redis_misses += 1
+            CACHE_LOOKUPS.inc(1, "redis", "miss")
+            return None
+        self.redis_hits += 1
+        CACHE_LOOKUPS.inc(1, "redis", "hit")
+        vector = np.frombuffer(raw, dtype=np.float32)
+        self.local.set(key, vector)
+        return vector.tolist()
+
+    async def aset(self, query: str, embedding: List[float]) -> None:
+        key = self.key(query)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self.local.set(key, vector)
+
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(self._redis_key(key), vector.tobytes(), ex=self.redis_ttl)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Embedding cache Redis write failed: {e}")
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> dict:
+        """
+        Lookups over both tiers (`hits`, `misses`, `hit_rate`), then per tier.
+        """
+        local = self.local.stats()
+        hits = local["hits"] + self.redis_hits
+        misses = local["misses"] - self.redis_hits  # the rest went to Redis and missed or failed, or had no Redis
+        return {
+            "size": local["size"],
+            "maxsize": local["maxsize"],
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "local_hits": local["hits"],
+            "local_misses": local["misses"],
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "redis_errors": self.redis_errors,
+            "evictions": local["evictions"],
+            "expirations": local["expirations"],
+        }
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def _get_local(self, key: str) -> Optional[np.ndarray]:
+        vector = self.local.get(key)
+        CACHE_LOOKUPS.inc(1, "local", "miss" if vector is None else "hit")
+        return vector
+
+    def _get_redis(self):
+        if self.redis_url is None:
+            return None
+        if self._redis is None:
+            from redis.asyncio import Redis
+            self._redis = Redis.from_url(self.redis_url)
+        return self._redis
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return "embedding-cache:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
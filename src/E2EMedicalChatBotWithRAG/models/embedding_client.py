@@ -0,0 +1,100 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.exceptions import AppException
+from typing import Optional
+import asyncio
+import random
+import httpx
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class EmbeddingEndpointError(ValueError):
+    """
+    Error status from the embedding endpoint, after any retries.
+    """
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Error {status_code}: {text}")
+        self.status_code = status_code
+
+
+class EmbeddingHTTPClient:
+    """
+    Shared keep-alive connection pool for the remote embedding endpoint.
+
+    The underlying httpx.AsyncClient is process-wide, so every EmbeddingModel
+    reuses the same TCP/TLS connections instead of opening one per query.
+    Call init() / close() from the application lifespan; if nothing opened
+    the pool, the first request opens it lazily.
+    """
+    _client: Optional[httpx.AsyncClient] = None
+
+    def __init__(self,config=ConfigurationManager()):
+        try:
+            self.config = config.get_embedding_client_config()
+        except Exception as e:
+            logger.error(f"Error in ConfigurationManager: {e}")
+            raise AppException(e) from e
+
+    def init(self) -> httpx.AsyncClient:
+        """
+        Opens the shared connection pool if it is not already open.
+
+        Returns:
+            httpx.AsyncClient: The shared client.
+        """
+        client = EmbeddingHTTPClient._client
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.config.max_connections,
+                    max_keepalive_connections=self.config.max_keepalive_connections,
+                    keepalive_expiry=self.config.keepalive_expiry,
+                ),
+            )
+            EmbeddingHTTPClient._client = client
+            logger.info("Embedding HTTP connection pool opened")
+        return client
+
+    async def close(self):
+        client = EmbeddingHTTPClient._client
+        EmbeddingHTTPClient._client = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+            logger.info("Embedding HTTP connection pool closed")
+
+    async def post_json(self, url: str, payload: dict) -> dict:
+        """
+        POST a JSON payload and return the decoded JSON response.
+
+        Transport errors, timeouts and 429/5xx responses are retried up to
+        `max_retries` times with exponential backoff and full jitter, so a
+        burst of failing callers does not retry in lockstep.
+
+        Raises:
+            EmbeddingEndpointError: If the endpoint answers with an error status
+                that is not retryable, or still retryable after the last retry.
+            httpx.HTTPError: If the last retry still fails at the transport level.
+        """
+        client = self.init()
+        attempt = 0
+        while True:
+            try:
+                resp = await client.post(url, json=payload)
+                if resp.status_code == 200:
+                    return resp.json()
+                if resp.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.config.max_retries:
+                    raise EmbeddingEndpointError(resp.status_code, resp.text)
+                logger.warning(f"Embedding endpoint returned {resp.status_code}, retrying")
+            except httpx.TransportError as e:
+                if attempt >= self.config.max_retries:
+                    raise
+                logger.warning(f"Embedding request failed ({e!r}), retrying")
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
@@ -1,24 +1,44 @@
 from E2EMedicalChatBotWithRAG.logger import logger
 from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
 from E2EMedicalChatBotWithRAG.exceptions import AppException
-from langchain_huggingface import HuggingFaceEmbeddings
-from E2EMedicalChatBotWithRAG.preprocess import DocumentPreprocesser
-import torch
+from E2EMedicalChatBotWithRAG.models.embedding_client import EmbeddingHTTPClient, EmbeddingEndpointError
+from E2EMedicalChatBotWithRAG.models.embedding_batcher import EmbeddingBatcher, BatchedEmbeddings
+from E2EMedicalChatBotWithRAG.models.embedding_cache import EmbeddingCache
+from E2EMedicalChatBotWithRAG.models.onnx_embeddings import load_onnx_embeddings
+from E2EMedicalChatBotWithRAG.models.registry import ModelRegistry
+from E2EMedicalChatBotWithRAG.utils.metrics import STAGE_SECONDS
+import asyncio
 import requests
 
+# torch, sentence-transformers and the PDF preprocessing stack are imported
+# where they are used: the serving path only calls the remote embed endpoint
+
 # print("EmbeddingModel.py is loaded")
 
+# answers that mean the endpoint does not take a list of queries
+BATCH_REJECTED_STATUS_CODES = {400, 415, 422}
+
 class EmbeddingModel:
+    # Query embedding cache shared by every instance in the process
+    _cache = None
+
     def __init__(self,config=ConfigurationManager()):
         try:
             self.config = config.get_chatbot_config()
             self.embedding_model = None
+            self.http_client = EmbeddingHTTPClient()
+            self.batch_config = config.get_embedding_batch_config()
+            self.batcher = None
+            self._remote_batch_supported = True
+            self.cache_config = config.get_embedding_cache_config()
+            self.runtime_config = config.get_embedding_runtime_config()
         except Exception as e:
             logger.error(f"Error in ConfigurationManager: {e}")
             raise AppException(e) from e
     
     def embed(self,doc):
         try:
+            from E2EMedicalChatBotWithRAG.preprocess import DocumentPreprocesser
             if not self.embedding_model:
                 self.embedding_model = self._get_model()
             preprocessor = DocumentPreprocesser()
@@ -31,17 +51,63 @@ class EmbeddingModel:
             raise AppException(e) from e
 
     def _get_model(self):
+        """
+        Returns the configured embedding model, shared by the whole process.
+
+        The model is loaded once through ModelRegistry; every store, chain
+        and retriever asking for the same model and runtime afterwards gets
+        the same instance.
+
+        Returns:
+            HuggingFaceEmbeddings | OnnxEmbeddings: The loaded embedding model.
+        """
+        try:
+            return ModelRegistry.get(self._model_key(), self._load_model)
+        except AppException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in loading embedding model: {e}")
+            raise AppException(e) from e
+
+    def preload(self):
+        """
+        Loads the embedding model into the registry ahead of the first request,
+        e.g. in a server's master process before it forks its workers.
+        """
+        return self._get_model()
+
+    def _model_key(self):
+        if self.runtime_config.runtime == "onnx":
+            return ("onnx", self.config.embedding_model_name, self.runtime_config.onnx_model_dir, self.runtime_config.quantized)
+        return ("torch", self.config.embedding_model_name)
+
+    def _load_model(self):
         """
         Loads the configured HuggingFace embedding model.
 
         This function loads the configured HuggingFace embedding model and returns it.
+        With RUNTIME: onnx, the model runs as an (optionally int8) ONNX graph
+        on a CPU inference session instead, exported on first use.
         If there is an error during the loading of the embedding model, an AppException is raised.
 
         Returns:
-            HuggingFaceEmbeddings: The loaded embedding model.
+            HuggingFaceEmbeddings | OnnxEmbeddings: The loaded embedding model.
         """
         try:
             model_name = self.config.embedding_model_name
+            if self.runtime_config.runtime == "onnx":
+                embedding = load_onnx_embeddings(
+                    model_name,
+                    self.runtime_config.onnx_model_dir,
+                    quantized=self.runtime_config.quantized,
+                    max_length=self.runtime_config.max_length,
+                    batch_size=self.runtime_config.batch_size,
+                    intra_op_threads=self.runtime_config.intra_op_threads,
+                )
+                logger.info(f"Successfully loaded ONNX embedding model: {embedding.model_path}")
+                return embedding
+            import torch
+            from langchain_huggingface import HuggingFaceEmbeddings
             model_kwargs = {'device': 'cuda' if torch.cuda.is_available() else 'cpu'}
             embedding = HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
             logger.info(f"Successfully loaded embedding model: {model_name}")
@@ -52,16 +118,143 @@ class EmbeddingModel:
         
     
     def embed_query(self,query):
+        with STAGE_SECONDS.time("embed"):
+            return self._embed_query(query)
+
+    def _embed_query(self,query):
+        cache = self._get_cache()
+        if cache is not None:
+            cached = cache.get(query)
+            if cached is not None:
+                return cached
         url = self.config.embedding_model_url
         # Example payload, adjust according to your API specification
         payload = {"query": query}
         try: 
             resp = requests.post(url, json=payload)   # or .get if your route is GET
             if resp.status_code == 200:
-                return resp.json().get("embeddings","")
+                embedding = resp.json().get("embeddings","")
+                if cache is not None and embedding:
+                    cache.set(query, embedding)
+                return embedding
             else:
                 raise ValueError(f"Error {resp.status_code}: {resp.text}")
         except Exception as e:
             logger.error(f"Error in embedding query: {e}")
             raise AppException(e) from e
-        
\ No newline at end of file
+
+    async def aembed_query(self,query):
+        """
+        Non-blocking version of embed_query.
+
+        Uses the shared keep-alive pool from EmbeddingHTTPClient, so a query
+        never stalls the event loop and reuses an open connection. When
+        batching is enabled, concurrent queries are coalesced by an
+        EmbeddingBatcher into one POST of a list. Repeated questions are
+        answered from the shared EmbeddingCache. Timed as the "embed" stage
+        of STAGE_SECONDS, cache hits included.
+        """
+        with STAGE_SECONDS.time("embed"):
+            return await self._aembed_query(query)
+
+    async def _aembed_query(self,query):
+        try:
+            cache = self._get_cache()
+            if cache is not None:
+                cached = await cache.aget(query)
+                if cached is not None:
+                    return cached
+            if self.batch_config.enabled:
+                embedding = await self._get_batcher().embed(query)
+            else:
+                embedding = await self._aembed_remote(query)
+            if cache is not None and embedding:
+                await cache.aset(query, embedding)
+            return embedding
+        except Exception as e:
+            logger.error(f"Error in embedding query: {e}")
+            raise AppException(e) from e
+
+    def batch_local_model(self, embeddings):
+        """
+        Wraps a local embedding model so its async queries are micro-batched.
+
+        Returns the model unchanged when batching is disabled.
+        """
+        if not self.batch_config.enabled or isinstance(embeddings, BatchedEmbeddings):
+            return embeddings
+        return BatchedEmbeddings(
+            embeddings,
+            max_batch_size=self.batch_config.max_batch_size,
+            max_wait_ms=self.batch_config.max_wait_ms,
+        )
+
+    def cache_stats(self):
+        """
+        Hit/miss/eviction counters of the shared query embedding cache.
+        """
+        cache = self._get_cache()
+        return cache.stats() if cache is not None else {}
+
+    def _get_cache(self):
+        if not self.cache_config.enabled:
+            return None
+        if EmbeddingModel._cache is None:
+            EmbeddingModel._cache = EmbeddingCache(
+                model_name=self.config.embedding_model_name,
+                maxsize=self.cache_config.max_entries,
+                ttl=self.cache_config.ttl_seconds,
+                redis_url=self.cache_config.redis_url if self.cache_config.use_redis else None,
+                redis_ttl=self.cache_config.redis_ttl_seconds,
+            )
+        return EmbeddingModel._cache
+
+    @staticmethod
+    async def close_cache():
+        if EmbeddingModel._cache is not None:
+            await EmbeddingModel._cache.close()
+
+    def _get_batcher(self):
+        if self.batcher is None:
+            self.batcher = EmbeddingBatcher(
+                embed_batch=self._aembed_remote_batch,
+                max_batch_size=self.batch_config.max_batch_size,
+                max_wait_ms=self.batch_config.max_wait_ms,
+            )
+        return self.batcher
+
+    async def _aembed_remote(self,query):
+        url = self.config.embedding_model_url
+        payload = {"query": query}
+        data = await self.http_client.post_json(url, payload)
+        return data.get("embeddings","")
+
+    async def _aembed_remote_batch(self,queries):
+        """
+        Embeds a list of queries with one POST of the list.
+
+        If the endpoint rejects list payloads (a 400/415/422 answer, or a
+        response that is not one vector per query), falls back to
+        concurrent single-query requests over the shared pool and stops
+        trying lists. Any other error, e.g. a 5xx left after the retries,
+        is raised: an outage says nothing about list support.
+        """
+        if len(queries) == 1 or not self._remote_batch_supported:
+            return await asyncio.gather(*(self._aembed_remote(q) for q in queries))
+        url = self.config.embedding_model_url
+        try:
+            data = await self.http_client.post_json(url, {"query": queries})
+        except EmbeddingEndpointError as e:
+            if e.status_code not in BATCH_REJECTED_STATUS_CODES:
+                raise
+            return await self._disable_remote_batch(queries, e)
+        embeddings = data.get("embeddings", []) if isinstance(data, dict) else []
+        if not isinstance(embeddings, list) or len(embeddings) != len(queries) or not isinstance(embeddings[0], list):
+            return await self._disable_remote_batch(queries, "the response is not one vector per query")
+        return embeddings
+
+    async def _disable_remote_batch(self, queries, reason):
+        vectors = await asyncio.gather(*(self._aembed_remote(q) for q in queries))
+        self._remote_batch_supported = False
+        logger.warning(f"Embedding endpoint does not accept batches ({reason}); sending queries one by one")
+        return vectors
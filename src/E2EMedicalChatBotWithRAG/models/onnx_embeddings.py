@@ -0,0 +1,164 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from langchain_core.embeddings import Embeddings
+from pathlib import Path
+from typing import List
+import numpy as np
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def onnx_model_path(model_dir, quantized: bool) -> Path:
+    return Path(model_dir) / (INT8_MODEL_FILE if quantized else FP32_MODEL_FILE)
+
+
+def export_onnx(model_name: str, model_dir, quantize: bool = True, opset: int = 17) -> Path:
+    """
+    Exports the transformer of a sentence-transformers model to ONNX.
+
+    Writes `model.onnx` (fp32, dynamic batch and sequence axes) and the fast
+    tokenizer's `tokenizer.json` to `model_dir`; with `quantize`, also
+    `model.int8.onnx`, whose MatMul/Gemm weights are dynamically quantized
+    to int8. Pooling and normalization are left to OnnxEmbeddings.
+
+    Needs torch and transformers (already used by the default runtime),
+    plus onnx for quantization.
+
+    Returns:
+        Path: The model file OnnxEmbeddings should load.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["an example sentence", "another one"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class _Encoder(torch.nn.Module):
+        # passes inputs by name, the positional order of forward() varies across transformers versions
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder().eval(),
+            tuple(sample[name] for name in input_names),
+            str(model_dir / FP32_MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+    tokenizer.backend_tokenizer.save(str(model_dir / TOKENIZER_FILE))
+    logger.info(f"Exported {model_name} to {model_dir / FP32_MODEL_FILE}")
+
+    if not quantize:
+        return model_dir / FP32_MODEL_FILE
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(
+        str(model_dir / FP32_MODEL_FILE),
+        str(model_dir / INT8_MODEL_FILE),
+        weight_type=QuantType.QInt8,
+    )
+    logger.info(f"Quantized {model_name} to {model_dir / INT8_MODEL_FILE}")
+    return model_dir / INT8_MODEL_FILE
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings from an exported ONNX graph on a CPU inference session.
+
+    Reproduces the all-MiniLM-L6-v2 sentence-transformers pipeline
+    (tokenize, transformer, attention-masked mean pooling, L2 normalization),
+    so its vectors live in the same 384-dim space as HuggingFaceEmbeddings
+    and can query an index built with it. The int8 graph trades a little
+    cosine agreement for speed and memory; check it with
+    `benchmarks/embedding_runtime.py` before switching a live index.
+
+    Parameters
+    ----------
+    model_path : str or Path
+        The `.onnx` file; `tokenizer.json` is read from the same directory.
+    max_length : int, default 256
+        Token limit per text, the model's max_seq_length.
+    batch_size : int, default 32
+        Texts per inference call in embed_documents.
+    intra_op_threads : int, default 0
+        onnxruntime intra-op threads; 0 lets onnxruntime decide.
+    """
+
+    def __init__(self, model_path, max_length: int = 256, batch_size: int = 32, intra_op_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_path = Path(model_path)
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(str(self.model_path.parent / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        # pad to the longest text of the batch: an exported Fixed(128) padding would leave
+        # texts truncated at max_length longer than the rest and the batch ragged
+        padding = self.tokenizer.padding or {}
+        pad_token = padding.get("pad_token", "[PAD]")
+        pad_id = padding.get("pad_id", self.tokenizer.token_to_id(pad_token) or 0)
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token=pad_token)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(str(self.model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = [self._embed_batch(texts[start:start + self.batch_size])
+                   for start in range(0, len(texts), self.batch_size)]
+        return np.concatenate(vectors).tolist() if vectors else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+        mask = feeds["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def __repr__(self) -> str:
+        return f"OnnxEmbeddings({self.model_path})"
+
+
+def load_onnx_embeddings(model_name: str, model_dir, quantized: bool = True, max_length: int = 256,
+                         batch_size: int = 32, intra_op_threads: int = 0,
+                         export_if_missing: bool = True) -> OnnxEmbeddings:
+    """
+    OnnxEmbeddings for `model_name`, exporting it to `model_dir` first if
+    the requested graph is not there yet.
+    """
+    model_path = onnx_model_path(model_dir, quantized)
+    if not model_path.exists():
+        if not export_if_missing:
+            raise FileNotFoundError(f"No ONNX model at {model_path}; export it with export_onnx()")
+        logger.info(f"{model_path} not found, exporting {model_name}")
+        export_onnx(model_name, model_dir, quantize=quantized)
+    return OnnxEmbeddings(model_path, max_length=max_length, batch_size=batch_size,
+                          intra_op_threads=intra_op_threads)
@@ -0,0 +1,57 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from typing import Any, Callable, Dict, Hashable
+import threading
+import time
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded models.
+
+    get() loads a model the first time its key is asked for and hands the
+    same object to every later caller, so several stores, chains or
+    retrievers in one process share one copy of the weights. Loading is
+    lazy and thread-safe: concurrent callers for the same key wait for a
+    single load, while different keys load in parallel.
+
+    Because the registry lives in module state, models loaded before the
+    process forks are inherited by the children as copy-on-write pages
+    (see `python -m app --preload`).
+    """
+    _models: Dict[Hashable, Any] = {}
+    _key_locks: Dict[Hashable, threading.Lock] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        The model registered under `key`, calling `loader()` to create it
+        if this is the first request.
+        """
+        model = cls._models.get(key)
+        if model is not None:
+            return model
+        with cls._lock:
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            model = cls._models.get(key)
+            if model is None:
+                started = time.perf_counter()
+                model = loader()
+                cls._models[key] = model
+                logger.info(f"Registered model {key} in {time.perf_counter() - started:.1f}s")
+        return model
+
+    @classmethod
+    def contains(cls, key: Hashable) -> bool:
+        return key in cls._models
+
+    @classmethod
+    def keys(cls):
+        return list(cls._models)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._models.clear()
+            cls._key_locks.clear()
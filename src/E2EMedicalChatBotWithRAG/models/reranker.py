@@ -0,0 +1,58 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.exceptions import AppException
+from E2EMedicalChatBotWithRAG.models.registry import ModelRegistry
+from langchain.schema import Document
+from typing import List
+import numpy as np
+
+
+class CrossEncoderReranker:
+    """
+    Scores (question, chunk) pairs with a small cross-encoder on the CPU.
+
+    A cross-encoder reads the question and the chunk together, so it ranks
+    far more precisely than the cosine similarity of two independent
+    embeddings, at the price of one forward pass per pair. All candidates
+    of a question go through the model as a single batch. The model is
+    shared through ModelRegistry and loaded on first use (or by preload()).
+    """
+    def __init__(self,config=ConfigurationManager()):
+        try:
+            self.rerank_config = config.get_rerank_config()
+        except Exception as e:
+            logger.error(f"Error in ConfigurationManager: {e}")
+            raise AppException(e) from e
+
+    def score(self, query: str, docs: List[Document]) -> np.ndarray:
+        """
+        Relevance score of every document for `query`, higher is better.
+
+        Blocking: call it from a worker thread when on the event loop.
+        """
+        if not docs:
+            return np.empty(0, dtype=np.float32)
+        model = self._get_model()
+        pairs = [(query, doc.page_content) for doc in docs]
+        scores = model.predict(pairs, batch_size=len(pairs), show_progress_bar=False, convert_to_numpy=True)
+        return np.asarray(scores, dtype=np.float32).reshape(len(docs), -1)[:, -1]
+
+    def preload(self):
+        """
+        Loads the cross-encoder ahead of the first request.
+        """
+        return self._get_model()
+
+    def _get_model(self):
+        try:
+            return ModelRegistry.get(("cross-encoder", self.rerank_config.model_name), self._load_model)
+        except Exception as e:
+            logger.error(f"Error in loading re-ranking model: {e}")
+            raise AppException(e) from e
+
+    def _load_model(self):
+        from sentence_transformers import CrossEncoder
+        model = CrossEncoder(self.rerank_config.model_name, device="cpu",
+                             max_length=self.rerank_config.max_length)
+        logger.info(f"Successfully loaded re-ranking model: {self.rerank_config.model_name}")
+        return model
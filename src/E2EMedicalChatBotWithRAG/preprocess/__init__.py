@@ -1,3 +1,12 @@
-from .document_preprocesser import DocumentPreprocesser
+from E2EMedicalChatBotWithRAG.utils.lazy_import import lazy_exports
 
-__all__ = ["DocumentPreprocesser"]
+# backends are imported on first use, see lazy_exports
+_EXPORTS = {
+    "DocumentPreprocesser": ".document_preprocesser",
+    "IncrementalIngestion": ".incremental",
+    "StreamingIngestion": ".pipeline",
+}
+
+__all__ = ["DocumentPreprocesser", "IncrementalIngestion", "StreamingIngestion"]
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
\ No newline at end of file
@@ -1,16 +1,23 @@
 from E2EMedicalChatBotWithRAG.logger import logger
 from E2EMedicalChatBotWithRAG.exceptions import AppException
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
+from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List
+from typing import Iterator, List, Optional, Tuple
+from pathlib import Path
 from langchain.schema import Document
 from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.preprocess.parallel_loader import ParallelPDFLoader
+from E2EMedicalChatBotWithRAG.preprocess.manifest import file_hash
+from E2EMedicalChatBotWithRAG.retrievers.bm25_index import BM25Index
 
 
 class DocumentPreprocesser:
     def __init__(self,config=ConfigurationManager()):
         try:
             self.config = config.get_chatbot_config()
+            self.ingestion_config = config.get_ingestion_config()
+            self.hybrid_config = config.get_hybrid_retrieval_config()
+            self._lexical_index = None
         except Exception as e:
             logger.error(f"Error in ConfigurationManager: {e}")
             raise AppException(e) from e
@@ -22,41 +29,98 @@ class DocumentPreprocesser:
         This function loads documents from the configured data path,
         filters out any documents that don't meet the specified criteria,
         and then chunks the documents into smaller chunks for processing.
+        It collects iter_chunks() into one list; large corpora should be
+        consumed from iter_chunks() directly to keep memory flat.
 
         Returns:
             List[Document]: The list of preprocessed documents.
         """
         try:
-            if doc_path is None:
-                doc_path = self.config.data_path
-            # Load documents from the configured data path
-            documents = self._load_documents(str(doc_path))
-            logger.info(f"Loaded {len(documents)} documents from {doc_path}")
-
-            # Filter out any documents that don't meet the specified criteria
-            documents = self._filter_documents(documents)
-            logger.info(f"Filtered out {len(documents)} documents that don't meet the criteria")
-
-            # Chunk the documents into smaller chunks for processing
-            documents = self._chunk_documents(documents)
-            logger.info(f"Chunked {len(documents)} documents into smaller chunks.")
+            documents = [chunk for _, chunks in self.iter_chunks(doc_path) for chunk in chunks]
+            logger.info(f"Chunked {doc_path or self.config.data_path} into {len(documents)} chunks.")
         except Exception as e:
             raise AppException(e)
         else:
             return documents
 
-    def _load_documents(self, doc_path: str) -> List[Document]:
+    def iter_chunks(self, doc_path=None) -> Iterator[Tuple[str, List[Document]]]:
+        """
+        Yields (path, chunks) one PDF at a time, so only the pages and chunks
+        of the files in flight are held in memory.
+
+        Nothing is written: the ingestion drivers add the chunks to the BM25
+        index with index_lexical() and save it.
+        """
+        if doc_path is None:
+            doc_path = self.config.data_path
+        files = sorted(str(path) for path in Path(doc_path).glob("*.pdf"))
+        for path, pages in self.iter_load_files(files):
+            yield path, self.preprocess_pages(pages)
+
+    def iter_load_documents(self, doc_path: str) -> Iterator[List[Document]]:
+        """
+        Parses the PDFs of `doc_path` in a process pool and yields the pages
+        of each file as soon as it is done. A corrupt or slow file is logged
+        and skipped instead of aborting the run.
+        """
+        files = sorted(str(path) for path in Path(doc_path).glob("*.pdf"))
+        for _, pages in self.iter_load_files(files):
+            yield pages
+
+    def iter_load_files(self, files: List[str]) -> Iterator[Tuple[str, List[Document]]]:
+        """
+        Yields (path, pages) for each given PDF, in a process pool when
+        parallel loading is enabled and one file after the other otherwise.
+        """
         try:
-            loader = DirectoryLoader(
-                doc_path,
-                glob="*.pdf",
-                loader_cls=PyPDFLoader #type:ignore
-            )
-            documents = loader.load()
+            if self.ingestion_config.parallel_loading:
+                loader = ParallelPDFLoader(
+                    max_workers=self.ingestion_config.loader_workers,
+                    file_timeout=self.ingestion_config.file_timeout
+                )
+                yield from loader.load_files(files)
+            else:
+                for file in files:
+                    yield file, PyPDFLoader(file).load()
         except Exception as e:
             raise AppException(e)
-        else:
-            return documents
+
+    def preprocess_pages(self, pages: List[Document]) -> List[Document]:
+        """
+        Filters and chunks already loaded pages.
+        """
+        return self._chunk_documents(self._filter_documents(pages))
+
+    @property
+    def lexical_index(self) -> Optional[BM25Index]:
+        """
+        The BM25 index at LEXICAL_INDEX_PATH, loaded on first use; None
+        when hybrid retrieval is disabled.
+        """
+        if not self.hybrid_config.enabled:
+            return None
+        if self._lexical_index is None:
+            path = self.hybrid_config.lexical_index_path
+            if BM25Index.exists(path):
+                self._lexical_index = BM25Index.load(path)
+            else:
+                self._lexical_index = BM25Index(k1=self.hybrid_config.bm25_k1, b=self.hybrid_config.bm25_b)
+        return self._lexical_index
+
+    def index_lexical(self, source: str, chunks: List[Document], sha256: Optional[str] = None):
+        """
+        Replaces the BM25 postings of `source` with those of `chunks`.
+        """
+        if self.lexical_index is not None:
+            self.lexical_index.replace_source(source, chunks, sha256 or file_hash(source))
+
+    def remove_lexical(self, source: str):
+        if self.lexical_index is not None:
+            self.lexical_index.remove_source(source)
+
+    def save_lexical_index(self):
+        if self.lexical_index is not None:
+            self.lexical_index.save(self.hybrid_config.lexical_index_path)
 
     def _filter_documents(self, docs: List[Document]) -> List[Document]:
         minimal_docs: List[Document] = []
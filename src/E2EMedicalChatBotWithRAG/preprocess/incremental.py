@@ -0,0 +1,155 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.exceptions import AppException
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.preprocess.document_preprocesser import DocumentPreprocesser
+from E2EMedicalChatBotWithRAG.preprocess.manifest import IngestionManifest, assign_chunk_ids, file_hash
+from langchain.schema import Document
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import time
+
+
+@dataclass
+class FileChange:
+    source: str
+    sha256: Optional[str]  # None when the file was removed
+    chunks: Dict[str, str] = field(default_factory=dict)
+    upserts: List[Document] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+
+
+class IncrementalIngestion:
+    """
+    Re-ingests only the PDFs that changed since the last run.
+
+    Every file is hashed and compared with the ingestion manifest. Unchanged
+    files are skipped without being parsed; changed files are re-chunked
+    and only the chunks whose deterministic id is new are embedded and
+    upserted, while ids that disappeared are deleted. Files removed from
+    the data directory have all their chunks deleted. The manifest is saved
+    after each file, so an interrupted run resumes where it stopped.
+
+    The vector store must provide `upsert_documents(docs, ids)` and
+    `delete_documents(ids)`, or their `a`-prefixed coroutines for `arun()`.
+    An index filled by `create_vector_store()` has random ids, so the first
+    incremental run over it should start from an empty index.
+    """
+    def __init__(self,vector_store,config=ConfigurationManager()):
+        try:
+            self.config = config.get_chatbot_config()
+            self.ingestion_config = config.get_ingestion_config()
+            self.vector_store = vector_store
+            self.preprocesser = DocumentPreprocesser(config=config)
+            self.manifest = IngestionManifest(self.ingestion_config.manifest_path, self.config.index_name)
+        except Exception as e:
+            logger.error(f"Error in ConfigurationManager: {e}")
+            raise AppException(e) from e
+
+    def plan(self, doc_path=None) -> Iterator[FileChange]:
+        """
+        Yields one FileChange per added, modified or removed file.
+
+        Changed files are parsed lazily, so each change can be applied
+        before the next file is loaded. A file whose BM25 postings are
+        missing or stale (e.g. after an interrupted run) is re-chunked too;
+        its unchanged chunk ids mean nothing is re-embedded.
+        """
+        if doc_path is None:
+            doc_path = self.config.data_path
+        current = {str(path): file_hash(path) for path in sorted(Path(doc_path).glob("*.pdf"))}
+        lexical_index = self.preprocesser.lexical_index
+
+        for source in list(self.manifest.files):
+            if source not in current:
+                yield FileChange(source=source, sha256=None, deletes=list(self.manifest.chunk_ids(source)))
+        if lexical_index is not None:
+            for source in list(lexical_index.sources):
+                if source not in current:
+                    lexical_index.remove_source(source)
+
+        changed = [
+            source for source, sha256 in current.items()
+            if self.manifest.file_hash(source) != sha256
+            or (lexical_index is not None and lexical_index.source_hash(source) != sha256)
+        ]
+        logger.info(f"{len(changed)} of {len(current)} files changed since the last ingestion")
+        for source, pages in self.preprocesser.iter_load_files(changed):
+            chunks = self.preprocesser.preprocess_pages(pages)
+            self.preprocesser.index_lexical(source, chunks, current[source])
+            hashes = assign_chunk_ids(chunks)
+            previous = self.manifest.chunk_ids(source)
+            upserts = {chunk.id: chunk for chunk in chunks if chunk.id not in previous}
+            yield FileChange(
+                source=source,
+                sha256=current[source],
+                chunks=hashes,
+                upserts=list(upserts.values()),
+                deletes=[chunk_id for chunk_id in previous if chunk_id not in hashes],
+            )
+
+    def run(self, doc_path=None) -> Dict[str, int]:
+        """
+        Applies the plan to a synchronous vector store.
+
+        Returns:
+            Dict[str, int]: Counts of files and chunks touched.
+        """
+        try:
+            summary = self._new_summary()
+            started = time.perf_counter()
+            for change in self.plan(doc_path):
+                if change.upserts:
+                    self.vector_store.upsert_documents(change.upserts, [doc.id for doc in change.upserts])
+                if change.deletes:
+                    self.vector_store.delete_documents(change.deletes)
+                self._record(change, summary)
+            self.preprocesser.save_lexical_index()
+            self._log_summary(summary, time.perf_counter() - started)
+        except Exception as e:
+            raise AppException(e)
+        else:
+            return summary
+
+    async def arun(self, doc_path=None) -> Dict[str, int]:
+        """
+        Same as run(), for vector stores with async upsert and delete.
+        """
+        try:
+            summary = self._new_summary()
+            started = time.perf_counter()
+            for change in self.plan(doc_path):
+                if change.upserts:
+                    await self.vector_store.aupsert_documents(change.upserts, [doc.id for doc in change.upserts])
+                if change.deletes:
+                    await self.vector_store.adelete_documents(change.deletes)
+                self._record(change, summary)
+            self.preprocesser.save_lexical_index()
+            self._log_summary(summary, time.perf_counter() - started)
+        except Exception as e:
+            raise AppException(e)
+        else:
+            return summary
+
+    def _record(self, change: FileChange, summary: Dict[str, int]):
+        if change.sha256 is None:
+            self.manifest.remove(change.source)
+            summary["files_removed"] += 1
+        else:
+            self.manifest.update(change.source, change.sha256, change.chunks)
+            summary["files_changed"] += 1
+        summary["chunks_upserted"] += len(change.upserts)
+        summary["chunks_deleted"] += len(change.deletes)
+        self.manifest.save()
+
+    @staticmethod
+    def _new_summary() -> Dict[str, int]:
+        return {"files_changed": 0, "files_removed": 0, "chunks_upserted": 0, "chunks_deleted": 0}
+
+    @staticmethod
+    def _log_summary(summary: Dict[str, int], elapsed: float):
+        logger.info(
+            f"Incremental ingestion done in {elapsed:.1f}s: {summary['files_changed']} files changed, "
+            f"{summary['files_removed']} removed, {summary['chunks_upserted']} chunks upserted, "
+            f"{summary['chunks_deleted']} deleted"
+        )
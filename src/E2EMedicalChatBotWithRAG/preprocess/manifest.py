@@ -0,0 +1,92 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from collections import defaultdict
+from langchain.schema import Document
+from pathlib import Path
+from typing import Dict, List
+import hashlib
+import json
+import os
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_hash(path) -> str:
+    """
+    SHA-256 of a file's bytes, read in 1 MiB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def assign_chunk_ids(chunks: List[Document]) -> Dict[str, str]:
+    """
+    Gives every chunk a deterministic id and returns {chunk id: content hash}.
+
+    The id depends only on the chunk's source, its content hash and how
+    many identical chunks precede it in the same source, so re-chunking an
+    unchanged file reproduces the same ids and an edit only changes the
+    ids of the chunks it touched.
+    """
+    seen = defaultdict(int)
+    hashes = {}
+    for chunk in chunks:
+        source = str(chunk.metadata.get("source"))
+        digest = content_hash(chunk.page_content)
+        occurrence = seen[(source, digest)]
+        seen[(source, digest)] += 1
+        chunk_id = hashlib.sha256(f"{source}\0{digest}\0{occurrence}".encode("utf-8")).hexdigest()[:32]
+        chunk.id = chunk_id
+        hashes[chunk_id] = digest
+    return hashes
+
+
+class IngestionManifest:
+    """
+    Persistent record of what has been ingested into an index.
+
+    Stored as JSON: for every source file, the SHA-256 of its bytes and the
+    {chunk id: content hash} map of the chunks that were upserted for it.
+    """
+
+    def __init__(self, path, index_name: str):
+        self.path = Path(path)
+        self.index_name = index_name
+        self.files: Dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("index_name") == index_name:
+                self.files = data.get("files", {})
+            else:
+                logger.warning(
+                    f"Manifest {self.path} belongs to index '{data.get('index_name')}', "
+                    f"starting a fresh one for '{index_name}'"
+                )
+
+    def file_hash(self, source: str):
+        entry = self.files.get(source)
+        return entry["sha256"] if entry else None
+
+    def chunk_ids(self, source: str) -> Dict[str, str]:
+        entry = self.files.get(source)
+        return dict(entry["chunks"]) if entry else {}
+
+    def update(self, source: str, sha256: str, chunks: Dict[str, str]) -> None:
+        self.files[source] = {"sha256": sha256, "chunks": chunks}
+
+    def remove(self, source: str) -> None:
+        self.files.pop(source, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"index_name": self.index_name, "files": self.files}, file)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,149 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from langchain_community.document_loaders import PyPDFLoader
+from langchain.schema import Document
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+import multiprocessing
+import os
+import signal
+import time
+
+
+class FileTimeoutError(TimeoutError):
+    pass
+
+
+class _FileAlarm(BaseException):
+    """
+    Raised by the SIGALRM handler inside the parser. Not an Exception, so
+    pypdf's broad `except Exception` blocks cannot swallow it and keep
+    parsing; _load_pdf reports it as a FileTimeoutError.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise _FileAlarm()
+
+
+def _parse_pdf(path: str) -> List[Document]:
+    return PyPDFLoader(path).load()
+
+
+def _load_pdf(path: str, timeout: Optional[float],
+              parse: Callable[[str], List[Document]] = _parse_pdf) -> Tuple[str, List[Document], float, int, Optional[str]]:
+    """
+    Parses one PDF inside a worker process.
+
+    The per-file timeout is enforced with SIGALRM, which interrupts the
+    parse in the worker itself so the pool stays usable. Errors are
+    returned rather than raised so one bad file cannot fail the batch.
+
+    Returns:
+        (path, pages, seconds spent, worker pid, error message or None)
+    """
+    started = time.perf_counter()
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+    try:
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            pages = parse(path)
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)  # disarmed before anything else can run
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        error = None
+    except _FileAlarm:
+        # also an alarm that went off as the parse returned or failed, before it was disarmed
+        pages, error = [], str(FileTimeoutError(f"timed out after {timeout}s"))
+    except Exception as e:
+        pages, error = [], f"{type(e).__name__}: {e}"
+    return path, pages, time.perf_counter() - started, os.getpid(), error
+
+
+class ParallelPDFLoader:
+    """
+    Loads every `*.pdf` in a directory with a pool of worker processes.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of worker processes; defaults to the CPU count.
+    file_timeout : float, optional
+        Seconds allowed per file before it is skipped. None disables it.
+    max_pending : int, optional
+        Files submitted to the pool ahead of the consumer; defaults to twice
+        the worker count. Keeps parsed-but-unconsumed pages from piling up
+        when the caller is slower than the pool.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, file_timeout: Optional[float] = None,
+                 max_pending: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.file_timeout = file_timeout
+        self.max_pending = max_pending or 2 * self.max_workers
+        self.failed: List[Tuple[str, str]] = []
+
+    def lazy_load(self, doc_path: str) -> Iterator[List[Document]]:
+        """
+        Yields the pages of each file as soon as that file is parsed.
+
+        Files that fail or time out are logged, recorded in `self.failed`
+        and skipped. Pages/sec per worker is logged once all files are done.
+        """
+        files = sorted(str(path) for path in Path(doc_path).glob("*.pdf"))
+        for _, pages in self.load_files(files):
+            yield pages
+
+    def load_files(self, files: List[str]) -> Iterator[Tuple[str, List[Document]]]:
+        """
+        Like lazy_load, for an explicit list of PDF paths; yields (path, pages).
+        """
+        self.failed = []
+        if not files:
+            return
+        pages_per_worker = defaultdict(int)
+        seconds_per_worker = defaultdict(float)
+        started = time.perf_counter()
+
+        queued = iter(files)
+        # spawned, not forked: a worker must not inherit the parent's threads, locks and connections
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(files)),
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {}
+            for path in islice(queued, self.max_pending):
+                futures[executor.submit(_load_pdf, path, self.file_timeout)] = path
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    submitted_path = futures.pop(future)
+                    for path in islice(queued, 1):
+                        futures[executor.submit(_load_pdf, path, self.file_timeout)] = path
+                    try:
+                        path, pages, seconds, pid, error = future.result()
+                    except (Exception, _FileAlarm) as e:
+                        # a crashed worker, or an alarm that escaped _load_pdf: this file fails, not the run
+                        path, pages, seconds, pid, error = submitted_path, [], 0.0, -1, f"{type(e).__name__}: {e}"
+                    if error is not None:
+                        logger.error(f"Skipping {path}: {error}")
+                        self.failed.append((path, error))
+                        continue
+                    pages_per_worker[pid] += len(pages)
+                    seconds_per_worker[pid] += seconds
+                    yield path, pages
+
+        elapsed = time.perf_counter() - started
+        total_pages = sum(pages_per_worker.values())
+        for pid in sorted(pages_per_worker):
+            rate = pages_per_worker[pid] / seconds_per_worker[pid] if seconds_per_worker[pid] else 0.0
+            logger.info(f"Worker {pid}: {pages_per_worker[pid]} pages, {rate:.1f} pages/sec")
+        logger.info(
+            f"Loaded {total_pages} pages from {len(files) - len(self.failed)}/{len(files)} files "
+            f"in {elapsed:.1f}s ({total_pages / elapsed if elapsed else 0.0:.1f} pages/sec overall)"
+        )
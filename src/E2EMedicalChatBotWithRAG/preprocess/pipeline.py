@@ -0,0 +1,228 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.exceptions import AppException
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.preprocess.document_preprocesser import DocumentPreprocesser
+from E2EMedicalChatBotWithRAG.preprocess.manifest import IngestionManifest, assign_chunk_ids, file_hash
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import contextlib
+import queue
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+class StreamingIngestion:
+    """
+    Full ingestion of DATA_PATH with memory bounded by the queue sizes
+    rather than by the corpus.
+
+    Three stages run concurrently, connected by bounded queues:
+
+    1. load + filter + chunk (thread; PDFs are parsed in the loader's
+       process pool, a few files ahead of the consumer),
+    2. embed STREAM_BATCH_SIZE chunks at a time (thread),
+    3. upsert each embedded batch (calling thread).
+
+    A slow stage blocks the ones before it instead of letting work pile up,
+    so peak RSS stays flat however many PDFs there are. Chunks get the same
+    deterministic ids as IncrementalIngestion and the manifest is written
+    at the end, so later incremental runs pick up from this build. Like
+    IncrementalIngestion, the run then prunes what the directory no longer
+    has: chunks of removed PDFs and chunks that vanished from re-chunked
+    ones are deleted from the store, and removed PDFs from the manifest and
+    the BM25 index. With hybrid retrieval enabled, the chunk stage adds each
+    file to the BM25 index, which is saved with the manifest.
+
+    The vector store must provide `upsert_documents(docs, ids, embeddings=None)`,
+    `delete_documents(ids)` and an `embedding_model` with `embed_documents`.
+    If it also provides `batch_writes()`, the run's writes are made inside
+    it, so they are persisted once before the manifest is saved.
+    """
+    def __init__(self,vector_store,config=ConfigurationManager()):
+        try:
+            self.config = config.get_chatbot_config()
+            self.ingestion_config = config.get_ingestion_config()
+            self.vector_store = vector_store
+            self.preprocesser = DocumentPreprocesser(config=config)
+            self.manifest = IngestionManifest(self.ingestion_config.manifest_path, self.config.index_name)
+        except Exception as e:
+            logger.error(f"Error in ConfigurationManager: {e}")
+            raise AppException(e) from e
+
+    def run(self, doc_path=None) -> Dict[str, float]:
+        """
+        Streams every PDF of `doc_path` (DATA_PATH by default) into the store.
+
+        Returns:
+            Dict[str, float]: Files, chunks, throughput and peak RSS of the run.
+        """
+        if doc_path is None:
+            doc_path = self.config.data_path
+        current = {str(path) for path in Path(doc_path).glob("*.pdf")}
+        batch_size = self.ingestion_config.stream_batch_size
+        queue_size = self.ingestion_config.stream_queue_size
+        self._stop = threading.Event()
+        self._errors = []
+        chunk_queue: queue.Queue = queue.Queue(maxsize=batch_size * queue_size)
+        batch_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        files: Dict[str, tuple] = {}
+
+        stages = [
+            threading.Thread(target=self._guard, name="ingest-chunk", daemon=True,
+                             args=(self._chunk_stage, chunk_queue, doc_path, files)),
+            threading.Thread(target=self._guard, name="ingest-embed", daemon=True,
+                             args=(self._embed_stage, batch_queue, chunk_queue, batch_size)),
+        ]
+        started = time.perf_counter()
+        chunks = 0
+        # a store that can defer persisting its writes (LocalVectorDB) commits them once, after the prune
+        batch_writes = getattr(self.vector_store, "batch_writes", contextlib.nullcontext)
+        with batch_writes():
+            try:
+                for stage in stages:
+                    stage.start()
+                for docs, ids, vectors in self._drain(batch_queue):
+                    self.vector_store.upsert_documents(docs, ids, embeddings=vectors)
+                    chunks += len(docs)
+            except Exception as e:
+                self._stop.set()
+                raise AppException(e)
+            finally:
+                for stage in stages:
+                    if stage.is_alive():
+                        stage.join()
+            if self._errors:
+                raise AppException(self._errors[0]) from self._errors[0]
+
+            try:
+                stale, removed = self._prune(current, files)
+                if stale:
+                    self.vector_store.delete_documents(stale)
+            except Exception as e:
+                raise AppException(e)
+        for source, (sha256, hashes) in files.items():
+            self.manifest.update(source, sha256, hashes)
+        self.manifest.save()
+        self.preprocesser.save_lexical_index()
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "files": len(files),
+            "files_removed": removed,
+            "chunks": chunks,
+            "chunks_deleted": len(stale),
+            "seconds": elapsed,
+            "chunks_per_sec": chunks / elapsed if elapsed else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        logger.info(
+            f"Streamed {chunks} chunks from {len(files)} files in {elapsed:.1f}s "
+            f"({summary['chunks_per_sec']:.1f} chunks/sec, peak RSS {summary['peak_rss_mb']} MB), "
+            f"pruned {removed} removed files and {len(stale)} stale chunks"
+        )
+        return summary
+
+    def _prune(self, current, files: Dict[str, tuple]) -> tuple:
+        """
+        Chunk ids the store should no longer hold: all of those of files
+        gone from the directory, and those of re-chunked files that the new
+        chunking did not produce again. Files that failed to load keep
+        theirs. Removed files are dropped from the manifest and the BM25
+        index here; the caller saves both.
+
+        Returns:
+            tuple: (stale chunk ids, number of removed files)
+        """
+        stale: List[str] = []
+        removed = 0
+        for source in list(self.manifest.files):
+            previous = self.manifest.chunk_ids(source)
+            if source not in current:
+                stale.extend(previous)
+                self.manifest.remove(source)
+                removed += 1
+            elif source in files:
+                stale.extend(chunk_id for chunk_id in previous if chunk_id not in files[source][1])
+        lexical_index = self.preprocesser.lexical_index
+        if lexical_index is not None:
+            for source in list(lexical_index.sources):
+                if source not in current:
+                    lexical_index.remove_source(source)
+        return stale, removed
+
+    def _chunk_stage(self, out_queue: queue.Queue, doc_path, files: Dict[str, tuple]):
+        chunks_iter = self.preprocesser.iter_chunks(doc_path)
+        try:
+            for source, chunks in chunks_iter:
+                sha256 = file_hash(source)
+                self.preprocesser.index_lexical(source, chunks, sha256)
+                files[source] = (sha256, assign_chunk_ids(chunks))
+                for chunk in chunks:
+                    if not self._put(out_queue, chunk):
+                        return
+        finally:
+            chunks_iter.close()  # shuts the loader's process pool down early on stop
+
+    def _embed_stage(self, out_queue: queue.Queue, in_queue: queue.Queue, batch_size: int):
+        embedding_model = self.vector_store.embedding_model
+        batch = []
+        for chunk in self._drain(in_queue):
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                if not self._emit(out_queue, embedding_model, batch):
+                    return
+                batch = []
+        if batch:
+            self._emit(out_queue, embedding_model, batch)
+
+    def _emit(self, out_queue: queue.Queue, embedding_model, batch) -> bool:
+        vectors = embedding_model.embed_documents([doc.page_content for doc in batch])
+        return self._put(out_queue, (batch, [doc.id for doc in batch], vectors))
+
+    def _guard(self, stage, out_queue: queue.Queue, *args):
+        try:
+            stage(out_queue, *args)
+        except BaseException as e:
+            logger.error(f"Ingestion stage {threading.current_thread().name} failed: {e}")
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            self._put(out_queue, _DONE)
+
+    def _put(self, out_queue: queue.Queue, item) -> bool:
+        """
+        Blocks while the queue is full; gives up once the pipeline is stopping.
+        """
+        while True:
+            try:
+                out_queue.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                if self._stop.is_set():
+                    return False
+
+    def _drain(self, in_queue: queue.Queue) -> Iterator:
+        while True:
+            try:
+                item = in_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _DONE:
+                return
+            yield item
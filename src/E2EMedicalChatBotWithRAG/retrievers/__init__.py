@@ -1,3 +1,17 @@
-from .async_retriever import PineconeAsyncRetriever
+from E2EMedicalChatBotWithRAG.utils.lazy_import import lazy_exports
 
-__all__ = ["PineconeAsyncRetriever"]
\ No newline at end of file
+# backends are imported on first use, see lazy_exports
+_EXPORTS = {
+    "PineconeAsyncRetriever": ".async_retriever",
+    "LocalAsyncRetriever": ".local_retriever",
+    "HybridRetriever": ".hybrid_retriever",
+    "BM25Index": ".bm25_index",
+    "RerankingRetriever": ".rerank_retriever",
+    "HedgedRetriever": ".hedged_retriever",
+    "RedisAsyncRetriever": ".redis_retriever",
+}
+
+__all__ = ["PineconeAsyncRetriever", "LocalAsyncRetriever", "HybridRetriever", "BM25Index", "RerankingRetriever",
+           "HedgedRetriever", "RedisAsyncRetriever"]
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
\ No newline at end of file
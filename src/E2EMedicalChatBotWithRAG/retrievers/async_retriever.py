@@ -1,7 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List, Optional
 from pydantic import PrivateAttr
+from E2EMedicalChatBotWithRAG.utils import LRUTTLCache, IndexGeneration, record_query_vector
+from E2EMedicalChatBotWithRAG.utils.metrics import STAGE_SECONDS
+import contextlib
+import hashlib
+import json
+import numpy as np
 from langchain.schema import BaseRetriever, Document
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForRetrieverRun,
@@ -16,7 +22,7 @@ class PineconeAsyncRetriever(BaseRetriever):
     Parameters
     ----------
     embedding_model : Any
-        Must expose an `embed_query(text: str) -> List[float]` method.
+        Must expose an async `aembed_query(text: str) -> List[float]` method.
     index : Any
         Pinecone index client with an async `query(...)` method.
     k : int, default 3
@@ -25,10 +31,33 @@ class PineconeAsyncRetriever(BaseRetriever):
         Extra parameters for Pinecone's query call.
     tags : list[str], optional
         Custom tags for observability/monitoring.
+    cache : LRUTTLCache, optional
+        Memoizes (query vector, k, search_kwargs) -> matches so identical
+        retrievals skip the Pinecone round trip.
+    index_generation : IndexGeneration, optional
+        Generation counter of the index; cached matches are dropped as soon
+        as ingestion bumps it. Required together with `index_name` when a
+        cache is given.
+    index_name : str, optional
+        Name of the index whose generation is tracked.
+    refresh_index : callable, optional
+        Async `refresh_index(failed_index, error)` returning a fresh index
+        client, or None when `error` is not about the connection. Given a
+        fresh client, the retriever swaps it in and retries the query once
+        before giving up.
+    lease_index : callable, optional
+        `lease_index(index)` returning an async context manager held around
+        every query, so a refresh does not close the client under it.
     """
 
     _embedding_model: Any = PrivateAttr()
     _index: Any = PrivateAttr()
+    _cache: Optional[LRUTTLCache] = PrivateAttr(default=None)
+    _index_generation: Optional[IndexGeneration] = PrivateAttr(default=None)
+    _index_name: Optional[str] = PrivateAttr(default=None)
+    _generation: Optional[int] = PrivateAttr(default=None)
+    _refresh_index: Optional[Callable[[Any, Exception], Awaitable[Any]]] = PrivateAttr(default=None)
+    _lease_index: Callable[[Any], AsyncContextManager] = PrivateAttr()
 
     k: int = 3
     search_kwargs: Dict[str, Any] = {}
@@ -40,15 +69,29 @@ class PineconeAsyncRetriever(BaseRetriever):
         k: int = 3,
         search_kwargs: Optional[Dict[str, Any]] = None,
         tags: Optional[List[str]] = None,
+        cache: Optional[LRUTTLCache] = None,
+        index_generation: Optional[IndexGeneration] = None,
+        index_name: Optional[str] = None,
+        refresh_index: Optional[Callable[[Any, Exception], Awaitable[Any]]] = None,
+        lease_index: Optional[Callable[[Any], AsyncContextManager]] = None,
     ) -> None:
         
         super().__init__()
         self._embedding_model = embedding_model
         self._index = index
+        self._cache = cache
+        self._index_generation = index_generation
+        self._index_name = index_name
+        self._refresh_index = refresh_index
+        self._lease_index = lease_index or (lambda index: contextlib.nullcontext(index))
         self.k = k
         self.search_kwargs = search_kwargs or {"k": k}
         self.tags = tags or ["PineconeVectorStore", "HuggingFaceEmbeddings"]
 
+    @property
+    def embedding_model(self) -> Any:
+        return self._embedding_model
+
     # Disable sync usage to force async pattern
     def _get_relevant_documents(self,query: str,*,run_manager: CallbackManagerForRetrieverRun,) -> List[Document]:
 
@@ -68,36 +111,84 @@ class PineconeAsyncRetriever(BaseRetriever):
         """
         # 1. Embed the query
         try:
-            query_vector = self._embedding_model.embed_query(query)
+            query_vector = await self._embedding_model.aembed_query(query)
         except Exception as e:
             raise RuntimeError(f"Embedding failed: {e}") from e
+        record_query_vector(query, query_vector)
 
-        # 2. Query Pinecone
-        try:
-            response = await self._index.query(
-                vector=query_vector,
-                top_k=self.k,
-                include_metadata=True,
-                **self.search_kwargs,
-            )
-        except Exception as e:
-            raise RuntimeError(f"Pinecone query failed: {e}") from e
+        # 2. Query Pinecone, unless an identical retrieval is cached
+        cache_key = self._cache_key(query_vector)
+        matches = self._cache.get(cache_key) if cache_key is not None else None  # type: ignore
+        if matches is None:
+            index = self._index
+            try:
+                response = await self._query(index, query_vector)
+            except Exception as e:
+                # the cached handle may point at a stale host or a broken pool: reopen it and retry once
+                fresh_index = None
+                if self._refresh_index is not None:
+                    try:
+                        fresh_index = await self._refresh_index(index, e)
+                    except Exception as refresh_error:
+                        raise RuntimeError(f"Pinecone query failed: {refresh_error}") from refresh_error
+                if fresh_index is None:
+                    raise RuntimeError(f"Pinecone query failed: {e}") from e
+                self._index = fresh_index
+                try:
+                    response = await self._query(fresh_index, query_vector)
+                except Exception as retry_error:
+                    raise RuntimeError(f"Pinecone query failed: {retry_error}") from retry_error
+
+            matches = []
+            for match in response.get("matches", []):
+                metadata = match.get("metadata", {})
+                text = metadata.get("text")
+                if not text:
+                    continue  # Skip if no text found
+                matches.append((match.get("id"), text, metadata.get("source"), match.get("score")))
+            if cache_key is not None:
+                self._cache.set(cache_key, matches)  # type: ignore
 
         # 3. Build Document list
         documents: List[Document] = []
-        for match in response.get("matches", []):
-            metadata = match.get("metadata", {})
-            text = metadata.get("text")
-            if not text:
-                continue  # Skip if no text found
+        for match_id, text, source, score in matches:
             documents.append(
                 Document(
+                    id=match_id,
                     page_content=text,
                     metadata={
-                        "source": metadata.get("source"),
-                        "similarity_score": match.get("score"),
+                        "source": source,
+                        "similarity_score": score,
                     },
                 )
             )
 
         return documents
+
+    async def _query(self, index, query_vector):
+        async with self._lease_index(index):
+            with STAGE_SECONDS.time("vector_query"):
+                return await index.query(
+                    vector=query_vector,
+                    top_k=self.k,
+                    include_metadata=True,
+                    **self.search_kwargs,
+                )
+
+    def _cache_key(self, query_vector):
+        """
+        Key of a retrieval in the result cache, or None when caching is off.
+
+        Clears the cache first if the index generation moved since the last call.
+        """
+        if self._cache is None:
+            return None
+        generation = None
+        if self._index_generation is not None:
+            generation = self._index_generation.current(self._index_name)  # type: ignore
+            if generation != self._generation:
+                self._cache.clear()
+                self._generation = generation
+        vector_hash = hashlib.sha1(np.asarray(query_vector, dtype=np.float32).tobytes()).hexdigest()
+        search_kwargs = json.dumps(self.search_kwargs, sort_keys=True, default=str)
+        return (vector_hash, self.k, search_kwargs, generation)
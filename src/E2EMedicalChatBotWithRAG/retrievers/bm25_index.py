@@ -0,0 +1,227 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from langchain.schema import Document
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import re
+import numpy as np
+
+# drug names, doses and codes survive as one token: "e11.9", "co-amoxiclav", "5-fu", "t2/t3"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[./\-][a-z0-9]+)*")
+SEPARATORS = re.compile(r"[./\-]")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i if in into is it its of on or "
+    "that the their then there these they this to was were what when where which who why "
+    "will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased lexical terms of `text`.
+
+    Compound terms are kept whole and also split into their parts, so
+    "co-amoxiclav" matches a query for "amoxiclav" while an exact query
+    for "co-amoxiclav" still scores higher.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if SEPARATORS.search(token):
+            terms.extend(part for part in SEPARATORS.split(token) if part and part not in STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 index over chunk text, kept as compact postings arrays.
+
+    The postings are stored term-major in CSR form: the documents containing
+    term `t` are `doc_ids[indptr[t]:indptr[t + 1]]` (int32) with their term
+    frequencies in `tfs` (uint16). Scoring a query gathers the postings of
+    its terms into one array and computes every BM25 contribution in a
+    single vectorized expression, so query time depends on the length of
+    the postings touched, not on the corpus size.
+
+    Documents are grouped by source file so ingestion can replace or drop
+    the chunks of one PDF at a time. Edits go to a per-document term list
+    and the CSR arrays are rebuilt on the next search or save.
+
+    Parameters
+    ----------
+    k1 : float, default 1.2
+        Term-frequency saturation.
+    b : float, default 0.75
+        Document-length normalization.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        self.docs: List[Tuple[str, str, str]] = []  # (id, source, text)
+        self.sources: Dict[str, Optional[str]] = {}  # every ingested file -> its SHA-256, if known
+        self._doc_terms: Optional[List[Tuple[np.ndarray, np.ndarray]]] = []
+        self._frozen = False
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def replace_source(self, source: str, chunks: List[Document], sha256: Optional[str] = None) -> None:
+        """
+        Replaces every chunk of `source` with `chunks`, remembering the hash
+        of the file they came from.
+        """
+        self.remove_source(source)
+        self.sources[source] = sha256
+        doc_terms = self._thaw()
+        for chunk in chunks:
+            term_ids, tfs = self._term_counts(tokenize(chunk.page_content))
+            self.docs.append((chunk.id or "", source, chunk.page_content))
+            doc_terms.append((term_ids, tfs))
+
+    def remove_source(self, source: str) -> None:
+        self.sources.pop(source, None)
+        if not any(doc_source == source for _, doc_source, _ in self.docs):
+            return
+        doc_terms = self._thaw()
+        keep = [row for row, (_, doc_source, _) in enumerate(self.docs) if doc_source != source]
+        self.docs = [self.docs[row] for row in keep]
+        self._doc_terms = [doc_terms[row] for row in keep]
+
+    def source_hash(self, source: str) -> Optional[str]:
+        return self.sources.get(source)
+
+    def search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """
+        Top-k chunks for `query` by BM25 score, best first.
+        """
+        self._freeze()
+        term_ids = np.unique([self.vocab[term] for term in tokenize(query) if term in self.vocab]).astype(np.int64)
+        if len(self.docs) == 0 or term_ids.size == 0:
+            return []
+        starts, ends = self.indptr[term_ids], self.indptr[term_ids + 1]
+        lengths = ends - starts
+        if lengths.sum() == 0:
+            return []
+        # positions of all postings of the query terms, without a Python loop per posting
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        doc_ids = self.doc_ids[offsets]
+        tfs = self.tfs[offsets].astype(np.float32)
+        weights = np.repeat(self.idf[term_ids], lengths)
+        contributions = weights * tfs * (self.k1 + 1) / (tfs + self.length_norm[doc_ids])
+
+        candidates, inverse = np.unique(doc_ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions).astype(np.float32)
+        k = min(k, candidates.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        results = []
+        for row in best:
+            doc_id, source, text = self.docs[candidates[row]]
+            results.append((Document(id=doc_id or None, page_content=text, metadata={"source": source}),
+                            float(scores[row])))
+        return results
+
+    def save(self, path) -> None:
+        """
+        Writes the postings to `<path>.npz` and the documents to `<path>.json`.
+        """
+        self._freeze()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays_path, docs_path = self._paths(path)
+        tmp_arrays = arrays_path.with_name(arrays_path.name + ".tmp.npz")
+        np.savez(tmp_arrays, indptr=self.indptr, doc_ids=self.doc_ids, tfs=self.tfs, doc_lengths=self.doc_lengths)
+        tmp_docs = docs_path.with_name(docs_path.name + ".tmp")
+        with open(tmp_docs, "w") as file:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "vocab": sorted(self.vocab, key=self.vocab.__getitem__),
+                "sources": self.sources,
+                "docs": self.docs,
+            }, file)
+        # documents last: load() only sees a new index once both files are in place
+        os.replace(tmp_arrays, arrays_path)
+        os.replace(tmp_docs, docs_path)
+        logger.info(f"Saved BM25 index of {len(self.docs)} chunks and {len(self.vocab)} terms to {path}")
+
+    @classmethod
+    def load(cls, path) -> "BM25Index":
+        """
+        The index saved at `path`, or an empty one if there is none.
+        """
+        arrays_path, docs_path = cls._paths(Path(path))
+        if not docs_path.exists() or not arrays_path.exists():
+            return cls()
+        with open(docs_path) as file:
+            data = json.load(file)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.vocab = {term: term_id for term_id, term in enumerate(data["vocab"])}
+        index.sources = data["sources"]
+        index.docs = [tuple(doc) for doc in data["docs"]]
+        with np.load(arrays_path) as arrays:
+            index._set_postings(arrays["indptr"], arrays["doc_ids"], arrays["tfs"], arrays["doc_lengths"])
+        index._doc_terms = None  # rebuilt from the postings on the first edit
+        return index
+
+    @staticmethod
+    def exists(path) -> bool:
+        return all(p.exists() for p in BM25Index._paths(Path(path)))
+
+    @staticmethod
+    def _paths(path: Path) -> Tuple[Path, Path]:
+        return path.with_name(path.name + ".npz"), path.with_name(path.name + ".json")
+
+    def _term_counts(self, terms: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        term_ids = np.fromiter((self.vocab.setdefault(term, len(self.vocab)) for term in terms), dtype=np.int32)
+        unique, counts = np.unique(term_ids, return_counts=True)
+        return unique.astype(np.int32), np.minimum(counts, np.iinfo(np.uint16).max).astype(np.uint16)
+
+    def _freeze(self) -> None:
+        """
+        Rebuilds the CSR postings from the per-document term lists.
+        """
+        if self._frozen:
+            return
+        doc_terms = self._doc_terms or []
+        counts = np.array([len(term_ids) for term_ids, _ in doc_terms], dtype=np.int64)
+        if counts.sum():
+            term_ids = np.concatenate([term_ids for term_ids, _ in doc_terms])
+            tfs = np.concatenate([tfs for _, tfs in doc_terms])
+        else:
+            term_ids, tfs = np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16)
+        doc_ids = np.repeat(np.arange(len(doc_terms), dtype=np.int32), counts)
+        order = np.argsort(term_ids, kind="stable")
+        indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)), out=indptr[1:])
+        doc_lengths = np.array([int(tfs.sum()) for _, tfs in doc_terms], dtype=np.int32)
+        self._set_postings(indptr, doc_ids[order], tfs[order], doc_lengths)
+
+    def _thaw(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Per-document term lists, recovered from the postings after a load.
+        """
+        if self._doc_terms is None:
+            term_of_posting = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+            order = np.argsort(self.doc_ids, kind="stable")
+            bounds = np.cumsum(np.bincount(self.doc_ids, minlength=len(self.docs)))[:-1]
+            self._doc_terms = list(zip(np.split(term_of_posting[order], bounds), np.split(self.tfs[order], bounds)))
+        self._frozen = False
+        return self._doc_terms
+
+    def _set_postings(self, indptr, doc_ids, tfs, doc_lengths) -> None:
+        self.indptr = indptr.astype(np.int64)
+        self.doc_ids = doc_ids.astype(np.int32)
+        self.tfs = tfs.astype(np.uint16)
+        self.doc_lengths = doc_lengths.astype(np.int32)
+        n_docs = len(self.doc_lengths)
+        df = np.diff(self.indptr).astype(np.float32)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(self.doc_lengths.mean()) if n_docs else 1.0
+        self.length_norm = (self.k1 * (1 - self.b + self.b * self.doc_lengths / max(avgdl, 1e-9))).astype(np.float32)
+        self._frozen = True
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from pydantic import PrivateAttr
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.utils.metrics import REGISTRY
+import asyncio
+import numpy as np
+from langchain.schema import BaseRetriever, Document
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+
+HEDGES = REGISTRY.counter(
+    "medchat_retrieval_hedges_total",
+    "Hedged retrieval events: fired, won (the second query answered first), failover, denied (over budget).",
+    labelnames=("event",),
+)
+RECOMPUTE_EVERY = 32  # requests between two updates of the adaptive delay
+
+
+class HedgedRetriever(BaseRetriever):
+    """
+    Cuts the latency tail of a retriever by sending a second query when the
+    first one is slow, and keeping whichever answers first.
+
+    In `hedge` mode the second query starts once the primary has not
+    answered within the hedge delay: the `percentile` of recently observed
+    primary latencies (so only the slowest few percent are hedged), or
+    `hedge_delay_ms` until enough latencies are known or when `percentile`
+    is 0. In `race` mode both queries start at once. The second query goes
+    to `secondary` (e.g. the Redis index) or, without one, to the primary
+    again, which for Pinecone lands on another pooled connection.
+
+    The first successful answer is returned and the other query is
+    cancelled. If the first to finish fails, the other one (started at once
+    if it was not yet) still gets its chance, so a configured secondary
+    also works as a failover.
+
+    Extra queries are capped by a token bucket: every request adds
+    `max_extra_load` tokens (up to `burst`) and every hedge or race spends
+    one, so at most that share of requests sends a second query even when
+    the backend is slow for everyone.
+
+    Parameters
+    ----------
+    primary : BaseRetriever
+        Retriever asked first; its `embedding_model` is exposed as this
+        retriever's.
+    secondary : BaseRetriever, optional
+        Retriever for the second query; defaults to `primary`.
+    mode : str, default "hedge"
+        "hedge" or "race".
+    hedge_delay_ms : float, default 50
+        Delay before the hedge while the adaptive delay is unknown or off.
+    percentile : float, default 95
+        Percentile of primary latencies used as the hedge delay; 0 keeps
+        the fixed `hedge_delay_ms`.
+    max_extra_load : float, default 0.1
+        Share of requests allowed to send a second query.
+    burst : float, default 5
+        Second queries allowed back to back after a quiet period.
+    tags : list[str], optional
+        Custom tags for observability/monitoring.
+    """
+
+    _primary: Any = PrivateAttr()
+    _secondary: Any = PrivateAttr()
+    _latencies: Deque[float] = PrivateAttr()
+    _delay: float = PrivateAttr()
+    _budget: float = PrivateAttr(default=1.0)
+    _stats: Dict[str, int] = PrivateAttr()
+
+    mode: str = "hedge"
+    hedge_delay_ms: float = 50
+    percentile: float = 95
+    max_extra_load: float = 0.1
+    burst: float = 5
+    tags: Optional[List[str]] = None
+
+    def __init__(self,
+        primary: Any,
+        secondary: Any = None,
+        mode: str = "hedge",
+        hedge_delay_ms: float = 50,
+        percentile: float = 95,
+        max_extra_load: float = 0.1,
+        burst: float = 5,
+        tags: Optional[List[str]] = None,
+    ) -> None:
+
+        if mode not in ("hedge", "race"):
+            raise ValueError(f"Unknown hedging mode {mode!r}, expected 'hedge' or 'race'")
+        super().__init__()
+        self._primary = primary
+        self._secondary = secondary if secondary is not None else primary
+        self._latencies = deque(maxlen=512)
+        self._delay = hedge_delay_ms / 1000
+        self._stats = {"requests": 0, "second_queries": 0, "hedge_wins": 0, "primary_wins": 0,
+                       "failovers": 0, "budget_denied": 0, "failures": 0}
+        self.mode = mode
+        self.hedge_delay_ms = hedge_delay_ms
+        self.percentile = percentile
+        self.max_extra_load = max_extra_load
+        self.burst = burst
+        self.tags = tags or ["HedgedRetriever"] + list(getattr(primary, "tags", None) or [])
+
+    @property
+    def embedding_model(self) -> Any:
+        return self._primary.embedding_model
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters since start, with the share of requests that sent a second
+        query (`hedge_rate`) and the share of those the second query won.
+        """
+        stats: Dict[str, Any] = dict(self._stats)
+        requests, second = stats["requests"], stats["second_queries"]
+        stats["hedge_rate"] = round(second / requests, 4) if requests else 0.0
+        stats["hedge_win_rate"] = round(stats["hedge_wins"] / second, 4) if second else 0.0
+        stats["delay_ms"] = round(self._delay * 1000, 1)
+        return stats
+
+    def _get_relevant_documents(self,query: str,*,run_manager: CallbackManagerForRetrieverRun,) -> List[Document]:
+        return self._primary.invoke(query)
+
+    async def _aget_relevant_documents(self,query: str,*,run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        self._on_request()
+        tasks: Dict[asyncio.Task, str] = {self._start(self._primary, query): "primary"}
+        second_started, hedge_pending = False, self.mode == "hedge"
+        if self.mode == "race":
+            second_started = self._start_second(tasks, query)
+        first_error: Optional[BaseException] = None
+        try:
+            while tasks:
+                timeout = None
+                if hedge_pending:
+                    timeout = max(self._delay - (loop.time() - started), 0)
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # the primary is slower than the hedge delay; a denied hedge just waits for it
+                    hedge_pending = False
+                    second_started = self._start_second(tasks, query)
+                    continue
+                for task in done:
+                    name = tasks.pop(task)
+                    if task.exception() is None:
+                        self._on_answer(name, loop.time() - started)
+                        return task.result()
+                    first_error = first_error or task.exception()
+                    logger.warning(f"Hedged retrieval: {name} query failed: {task.exception()}")
+                if not tasks and not second_started:
+                    # failover: replaces the failed query, so it does not spend the budget
+                    self._stats["failovers"] += 1
+                    HEDGES.inc(1, "failover")
+                    tasks[self._start(self._secondary, query)] = "failover"
+                    second_started, hedge_pending = True, False
+            self._stats["failures"] += 1
+            raise first_error  # type: ignore
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _start(self, retriever: Any, query: str) -> asyncio.Task:
+        task = asyncio.ensure_future(retriever.ainvoke(query))
+        # a loser that fails after the answer was returned must not log "exception never retrieved"
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    def _start_second(self, tasks: Dict[asyncio.Task, str], query: str) -> bool:
+        if self._budget < 1:
+            self._stats["budget_denied"] += 1
+            HEDGES.inc(1, "denied")
+            return False
+        self._budget -= 1
+        self._stats["second_queries"] += 1
+        HEDGES.inc(1, "fired")
+        tasks[self._start(self._secondary, query)] = "second"
+        return True
+
+    def _on_request(self) -> None:
+        self._stats["requests"] += 1
+        self._budget = min(self.burst, self._budget + self.max_extra_load)
+        if self.percentile and len(self._latencies) >= RECOMPUTE_EVERY and self._stats["requests"] % RECOMPUTE_EVERY == 0:
+            self._delay = float(np.percentile(self._latencies, self.percentile))
+
+    def _on_answer(self, name: str, seconds: float) -> None:
+        # when the second query wins, the primary took at least this long: still a valid (censored) sample
+        self._latencies.append(seconds)
+        if name == "primary":
+            self._stats["primary_wins"] += 1
+        elif name == "second":
+            self._stats["hedge_wins"] += 1
+            HEDGES.inc(1, "won")
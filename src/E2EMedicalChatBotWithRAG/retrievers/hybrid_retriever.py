@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+from pydantic import PrivateAttr
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.retrievers.bm25_index import BM25Index
+from pathlib import Path
+import asyncio
+import hashlib
+import os
+from langchain.schema import BaseRetriever, Document
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+
+
+def fusion_key(doc: Document) -> str:
+    """
+    Identity of a chunk across retrievers: its source and text, since the
+    dense index may hold random ids for chunks the BM25 index knows by
+    their deterministic id.
+    """
+    content = f"{doc.metadata.get('source')}|{doc.page_content}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Merges ranked lists by RRF: each document scores sum(1 / (rrf_k + rank))
+    over the lists it appears in, so agreement between retrievers outranks
+    a single high position and no score calibration is needed.
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = fusion_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    fused = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+    # copies: a local store hands out its own Document objects
+    return [
+        Document(id=documents[key].id, page_content=documents[key].page_content,
+                 metadata={**documents[key].metadata, "rrf_score": scores[key]})
+        for key in fused
+    ]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense + BM25 retrieval fused with reciprocal rank fusion.
+
+    The dense retriever (PineconeAsyncRetriever or LocalAsyncRetriever,
+    built with k = `dense_k`) and a BM25 search over the lexical index run
+    concurrently; their rankings are merged with RRF and the best `k`
+    chunks are returned. Exact terms that MiniLM embeds poorly (drug names,
+    ICD codes) are caught by BM25, so a small `k` still finds the chunk.
+
+    Parameters
+    ----------
+    dense_retriever : BaseRetriever
+        Retriever over the vector index; its `embedding_model` is exposed
+        as this retriever's.
+    lexical_index : BM25Index
+        Index built by DocumentPreprocesser during ingestion.
+    k : int, default 3
+        Number of documents returned after fusion.
+    lexical_k : int, default 10
+        Number of BM25 hits fused.
+    rrf_k : int, default 60
+        RRF rank offset; larger values flatten the rank weighting.
+    index_path : str, optional
+        Where `lexical_index` was loaded from. When given, the index is
+        reloaded after an ingestion run in another process rewrites it.
+    tags : list[str], optional
+        Custom tags for observability/monitoring.
+    """
+
+    _dense_retriever: Any = PrivateAttr()
+    _lexical_index: BM25Index = PrivateAttr()
+    _index_path: Optional[Path] = PrivateAttr(default=None)
+    _index_mtime: Optional[int] = PrivateAttr(default=None)
+
+    k: int = 3
+    lexical_k: int = 10
+    rrf_k: int = 60
+    tags: Optional[List[str]] = None
+
+    def __init__(self,
+        dense_retriever: Any,
+        lexical_index: BM25Index,
+        k: int = 3,
+        lexical_k: int = 10,
+        rrf_k: int = 60,
+        index_path: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+    ) -> None:
+
+        super().__init__()
+        self._dense_retriever = dense_retriever
+        self._lexical_index = lexical_index
+        self.k = k
+        self.lexical_k = lexical_k
+        self.rrf_k = rrf_k
+        self.tags = tags or ["HybridRetriever", "BM25"] + list(getattr(dense_retriever, "tags", None) or [])
+        if index_path is not None:
+            self._index_path = Path(index_path)
+            self._index_mtime = self._mtime()
+
+    @property
+    def embedding_model(self) -> Any:
+        return self._dense_retriever.embedding_model
+
+    def _get_relevant_documents(self,query: str,*,run_manager: CallbackManagerForRetrieverRun,) -> List[Document]:
+        dense = self._dense_retriever.invoke(query)
+        lexical = self._lexical_search(query)
+        return reciprocal_rank_fusion([dense, lexical], self.k, self.rrf_k)
+
+    async def _aget_relevant_documents(self,query: str,*,run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        """
+        Runs the dense query and the BM25 search (in a worker thread) at
+        the same time and fuses the two rankings.
+        """
+        dense, lexical = await asyncio.gather(
+            self._dense_retriever.ainvoke(query),
+            asyncio.to_thread(self._lexical_search, query),
+        )
+        return reciprocal_rank_fusion([dense, lexical], self.k, self.rrf_k)
+
+    def _lexical_search(self, query: str) -> List[Document]:
+        mtime = self._mtime()
+        if mtime != self._index_mtime:
+            self._lexical_index = BM25Index.load(self._index_path)
+            self._index_mtime = mtime
+            logger.info(f"Reloaded BM25 index of {len(self._lexical_index)} chunks from {self._index_path}")
+        return [doc for doc, _ in self._lexical_index.search(query, self.lexical_k)]
+
+    def _mtime(self) -> Optional[int]:
+        if self._index_path is None:
+            return None
+        try:
+            # the .json file is replaced last by BM25Index.save
+            return os.stat(self._index_path.with_name(self._index_path.name + ".json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional
+from pydantic import PrivateAttr
+from E2EMedicalChatBotWithRAG.utils import record_query_vector
+from E2EMedicalChatBotWithRAG.utils.metrics import STAGE_SECONDS
+from langchain.schema import BaseRetriever, Document
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+
+
+class LocalAsyncRetriever(BaseRetriever):
+    """
+    Retriever over the in-process LocalVectorDB.
+
+    Parameters
+    ----------
+    store : Any
+        Must expose `search(query_vectors, k) -> List[List[(Document, score)]]`.
+        If it exposes `reload_if_changed()`, that is called before each
+        search, so an index rewritten by another process is picked up.
+    embedding_model : Any
+        Must expose `embed_query` and an async `aembed_query` method.
+    k : int, default 3
+        Number of documents to retrieve.
+    tags : list[str], optional
+        Custom tags for observability/monitoring.
+    """
+
+    _store: Any = PrivateAttr()
+    _embedding_model: Any = PrivateAttr()
+
+    k: int = 3
+    tags: Optional[List[str]] = None
+
+    def __init__(self,
+        store: Any,
+        embedding_model: Any,
+        k: int = 3,
+        tags: Optional[List[str]] = None,
+    ) -> None:
+
+        super().__init__()
+        self._store = store
+        self._embedding_model = embedding_model
+        self.k = k
+        self.tags = tags or ["LocalVectorDB", "HuggingFaceEmbeddings"]
+
+    @property
+    def embedding_model(self) -> Any:
+        return self._embedding_model
+
+    def _get_relevant_documents(self,query: str,*,run_manager: CallbackManagerForRetrieverRun,) -> List[Document]:
+        """
+        Retrieve top-k documents from the local index.
+        """
+        try:
+            query_vector = self._embedding_model.embed_query(query)
+        except Exception as e:
+            raise RuntimeError(f"Embedding failed: {e}") from e
+        with STAGE_SECONDS.time("vector_query"):
+            self._reload_store()
+            return [doc for doc, _ in self._store.search([query_vector], self.k)[0]]
+
+    async def _aget_relevant_documents(self,query: str,*,run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        """
+        Retrieve top-k documents from the local index without blocking the
+        event loop on the embedding call. The search itself is a single
+        in-memory matrix product and runs inline.
+        """
+        try:
+            query_vector = await self._embedding_model.aembed_query(query)
+        except Exception as e:
+            raise RuntimeError(f"Embedding failed: {e}") from e
+        record_query_vector(query, query_vector)
+        with STAGE_SECONDS.time("vector_query"):
+            self._reload_store()
+            return [doc for doc, _ in self._store.search([query_vector], self.k)[0]]
+
+    def _reload_store(self) -> None:
+        reload_if_changed = getattr(self._store, "reload_if_changed", None)
+        if reload_if_changed is not None:
+            reload_if_changed()
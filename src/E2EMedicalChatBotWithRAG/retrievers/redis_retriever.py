@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional
+from pydantic import PrivateAttr
+from E2EMedicalChatBotWithRAG.utils import record_query_vector
+from E2EMedicalChatBotWithRAG.utils.metrics import STAGE_SECONDS
+import asyncio
+from langchain.schema import BaseRetriever, Document
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+
+
+class RedisAsyncRetriever(BaseRetriever):
+    """
+    Retriever over an existing Redis index that embeds the query through
+    the serving embedding model and searches by vector.
+
+    Unlike `RedisVectorStore.as_retriever()`, nothing is embedded by the
+    store itself, so the local HuggingFace model is never loaded and a
+    query costs the same (batched, cached) embedding call as a Pinecone
+    one. The Redis search is a blocking call and runs in a worker thread.
+
+    Parameters
+    ----------
+    store : Any
+        Must expose `similarity_search_by_vector(vector, k) -> List[Document]`,
+        e.g. a RedisVectorStore.
+    embedding_model : Any
+        Must expose `embed_query` and an async `aembed_query` method.
+    k : int, default 3
+        Number of documents to retrieve.
+    tags : list[str], optional
+        Custom tags for observability/monitoring.
+    """
+
+    _store: Any = PrivateAttr()
+    _embedding_model: Any = PrivateAttr()
+
+    k: int = 3
+    tags: Optional[List[str]] = None
+
+    def __init__(self,
+        store: Any,
+        embedding_model: Any,
+        k: int = 3,
+        tags: Optional[List[str]] = None,
+    ) -> None:
+
+        super().__init__()
+        self._store = store
+        self._embedding_model = embedding_model
+        self.k = k
+        self.tags = tags or ["RedisVectorStore"]
+
+    @property
+    def embedding_model(self) -> Any:
+        return self._embedding_model
+
+    def _get_relevant_documents(self,query: str,*,run_manager: CallbackManagerForRetrieverRun,) -> List[Document]:
+        try:
+            query_vector = self._embedding_model.embed_query(query)
+        except Exception as e:
+            raise RuntimeError(f"Embedding failed: {e}") from e
+        with STAGE_SECONDS.time("vector_query"):
+            return self._store.similarity_search_by_vector(query_vector, k=self.k)
+
+    async def _aget_relevant_documents(self,query: str,*,run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        try:
+            query_vector = await self._embedding_model.aembed_query(query)
+        except Exception as e:
+            raise RuntimeError(f"Embedding failed: {e}") from e
+        record_query_vector(query, query_vector)
+        with STAGE_SECONDS.time("vector_query"):
+            return await asyncio.to_thread(self._store.similarity_search_by_vector, query_vector, k=self.k)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional
+from pydantic import PrivateAttr
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.utils.metrics import STAGE_SECONDS
+import asyncio
+import time
+from langchain.schema import BaseRetriever, Document
+from langchain.callbacks.manager import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Re-ranks the candidates of another retriever and keeps the best `k`.
+
+    The base retriever over-fetches (it is built with k = the number of
+    candidates); the candidates are scored by a cross-encoder in one
+    batched forward pass on a worker thread, so the event loop keeps
+    serving other requests meanwhile.
+
+    Every request has a latency budget that covers retrieval and
+    re-ranking. Re-ranking is skipped, and the first `k` candidates are
+    returned in retrieval order, when the time left is smaller than the
+    expected scoring time (a moving average of the observed time per
+    candidate), or when scoring does not finish within the budget.
+
+    Parameters
+    ----------
+    base_retriever : BaseRetriever
+        Retriever returning the candidates; its `embedding_model` is exposed
+        as this retriever's.
+    reranker : Any
+        Must expose a blocking `score(query, docs) -> array of floats`.
+    k : int, default 3
+        Number of documents kept.
+    latency_budget_ms : float, default 300
+        Time allowed per request for retrieval plus re-ranking; 0 disables
+        the budget.
+    tags : list[str], optional
+        Custom tags for observability/monitoring.
+    """
+
+    _base_retriever: Any = PrivateAttr()
+    _reranker: Any = PrivateAttr()
+    _seconds_per_doc: Optional[float] = PrivateAttr(default=None)
+
+    k: int = 3
+    latency_budget_ms: float = 300
+    tags: Optional[List[str]] = None
+
+    def __init__(self,
+        base_retriever: Any,
+        reranker: Any,
+        k: int = 3,
+        latency_budget_ms: float = 300,
+        tags: Optional[List[str]] = None,
+    ) -> None:
+
+        super().__init__()
+        self._base_retriever = base_retriever
+        self._reranker = reranker
+        self.k = k
+        self.latency_budget_ms = latency_budget_ms
+        self.tags = tags or ["CrossEncoderReranker"] + list(getattr(base_retriever, "tags", None) or [])
+
+    @property
+    def embedding_model(self) -> Any:
+        return self._base_retriever.embedding_model
+
+    def _get_relevant_documents(self,query: str,*,run_manager: CallbackManagerForRetrieverRun,) -> List[Document]:
+        started = time.perf_counter()
+        candidates = self._base_retriever.invoke(query)
+        if not self._within_budget(len(candidates), started):
+            return candidates[:self.k]
+        return self._rerank(query, candidates)
+
+    async def _aget_relevant_documents(self,query: str,*,run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        started = time.perf_counter()
+        candidates = await self._base_retriever.ainvoke(query)
+        if not self._within_budget(len(candidates), started):
+            return candidates[:self.k]
+        timeout = None
+        if self.latency_budget_ms:
+            timeout = self.latency_budget_ms / 1000 - (time.perf_counter() - started)
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(self._rerank, query, candidates), timeout)
+        except asyncio.TimeoutError:
+            # the worker thread finishes on its own and still updates the estimate
+            logger.warning(f"Re-ranking {len(candidates)} candidates exceeded the {self.latency_budget_ms} ms budget, skipped")
+            return candidates[:self.k]
+
+    def _within_budget(self, n_candidates: int, started: float) -> bool:
+        if n_candidates <= self.k:
+            return False  # nothing to choose from
+        if not self.latency_budget_ms or self._seconds_per_doc is None:
+            return True
+        remaining = self.latency_budget_ms / 1000 - (time.perf_counter() - started)
+        if self._seconds_per_doc * n_candidates > remaining:
+            logger.info(
+                f"Skipping re-ranking: {remaining * 1000:.0f} ms left, "
+                f"~{self._seconds_per_doc * n_candidates * 1000:.0f} ms needed"
+            )
+            return False
+        return True
+
+    def _rerank(self, query: str, candidates: List[Document]) -> List[Document]:
+        started = time.perf_counter()
+        scores = self._reranker.score(query, candidates)
+        seconds = time.perf_counter() - started
+        STAGE_SECONDS.observe(seconds, "rerank")
+        per_doc = seconds / len(candidates)
+        self._seconds_per_doc = per_doc if self._seconds_per_doc is None else 0.8 * self._seconds_per_doc + 0.2 * per_doc
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[:self.k]
+        return [
+            Document(id=candidates[i].id, page_content=candidates[i].page_content,
+                     metadata={**candidates[i].metadata, "rerank_score": float(scores[i])})
+            for i in order
+        ]
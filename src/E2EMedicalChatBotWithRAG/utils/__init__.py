@@ -1,3 +1,8 @@
 from .helper import read_yaml_file, get_prompt_text, load_env_variable
+from .cache import LRUTTLCache
+from .index_generation import IndexGeneration
+from .metrics import MetricsRegistry, REGISTRY, STAGE_SECONDS
+from .query_vectors import capture_query_vectors, record_query_vector
 
-__all__ = ["read_yaml_file", "get_prompt_text", "load_env_variable"]
+__all__ = ["read_yaml_file", "get_prompt_text", "load_env_variable", "LRUTTLCache", "IndexGeneration",
+           "MetricsRegistry", "REGISTRY", "STAGE_SECONDS", "capture_query_vectors", "record_query_vector"]
@@ -0,0 +1,52 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from pathlib import Path
+import json
+import os
+import threading
+
+
+class IndexGeneration:
+    """
+    Per-index "generation" counter persisted in a small JSON file.
+
+    Every write to a vector index (full ingestion or single document)
+    bumps the generation. Caches built on top of an index remember the
+    generation they were filled under and drop their entries once it
+    changes. Because the counter lives on disk, an ingestion run in
+    another process (e.g. main.py) invalidates the caches of a running
+    server too. Reads are cached in memory and only re-parse the file
+    when its modification time changes.
+    """
+    _lock = threading.Lock()
+    # path -> (mtime_ns, counters)
+    _cache: dict = {}
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def current(self, index_name: str) -> int:
+        return self._read().get(index_name, 0)
+
+    def bump(self, index_name: str) -> int:
+        with IndexGeneration._lock:
+            counters = dict(self._read())
+            counters[index_name] = counters.get(index_name, 0) + 1
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as file:
+                json.dump(counters, file)
+            os.replace(tmp_path, self.path)
+        logger.info(f"Index '{index_name}' is now at generation {counters[index_name]}")
+        return counters[index_name]
+
+    def _read(self) -> dict:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        cached = IndexGeneration._cache.get(self.path)
+        if cached is None or cached[0] != mtime:
+            with open(self.path) as file:
+                cached = (mtime, json.load(file))
+            IndexGeneration._cache[self.path] = cached
+        return cached[1]
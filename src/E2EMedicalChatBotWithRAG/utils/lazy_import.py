@@ -0,0 +1,27 @@
+from importlib import import_module
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """
+    Module-level __getattr__ / __dir__ (PEP 562) for a package whose public
+    names live in heavy submodules.
+
+    `exports` maps each public name to the submodule defining it, relative
+    to `package`. A submodule is only imported when one of its names is
+    first accessed, so importing the package itself does not pull in
+    pinecone, redis or torch.
+    """
+    namespace = import_module(package).__dict__
+
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(exports[name], package), name)
+        namespace[name] = value  # later lookups skip __getattr__
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,30 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+# question -> vector, for the retrieval running in this context (tasks it starts share the dict)
+_QUERY_VECTORS: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("query_vectors", default=None)
+
+
+@contextmanager
+def capture_query_vectors() -> Iterator[Dict[str, List[float]]]:
+    """
+    Collects the query vectors the retrievers compute inside the block, so
+    the rest of the request (e.g. the answer cache) can reuse them instead
+    of embedding the question again.
+    """
+    vectors: Dict[str, List[float]] = {}
+    token = _QUERY_VECTORS.set(vectors)
+    try:
+        yield vectors
+    finally:
+        _QUERY_VECTORS.reset(token)
+
+
+def record_query_vector(query: str, vector: List[float]) -> None:
+    """
+    Called by retrievers after embedding `query`; a no-op outside capture_query_vectors().
+    """
+    vectors = _QUERY_VECTORS.get()
+    if vectors is not None and vector is not None:
+        vectors.setdefault(query, vector)
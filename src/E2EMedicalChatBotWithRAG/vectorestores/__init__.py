@@ -1,5 +1,13 @@
-from .pinecone_db import PineconeDB
-from .redis_db import RedisDB
-from .async_pinecone_db import AsyncPineconeDB
+from E2EMedicalChatBotWithRAG.utils.lazy_import import lazy_exports
 
-__all__ = ["RedisDB", "PineconeDB","AsyncPineconeDB"]
\ No newline at end of file
+# backends are imported on first use, see lazy_exports
+_EXPORTS = {
+    "PineconeDB": ".pinecone_db",
+    "RedisDB": ".redis_db",
+    "AsyncPineconeDB": ".async_pinecone_db",
+    "LocalVectorDB": ".local_db",
+}
+
+__all__ = ["RedisDB", "PineconeDB", "AsyncPineconeDB", "LocalVectorDB"]
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
\ No newline at end of file
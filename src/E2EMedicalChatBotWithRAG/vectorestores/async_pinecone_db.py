@@ -1,17 +1,55 @@
 from E2EMedicalChatBotWithRAG.logger import logger
-from E2EMedicalChatBotWithRAG.utils import load_env_variable
+from E2EMedicalChatBotWithRAG.utils import load_env_variable, IndexGeneration, LRUTTLCache
 from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
 from E2EMedicalChatBotWithRAG.exceptions import AppException
 from E2EMedicalChatBotWithRAG.models import EmbeddingModel
 from E2EMedicalChatBotWithRAG.retrievers import PineconeAsyncRetriever
-from pinecone import ServerlessSpec, PineconeAsyncio
+from E2EMedicalChatBotWithRAG.vectorestores.bulk_upsert import PineconeBulkUpserter
+from pinecone import ServerlessSpec, PineconeAsyncio, NotFoundException
+from pinecone.exceptions import PineconeProtocolError
 from langchain_pinecone import PineconeVectorStore
+from contextlib import asynccontextmanager
+import aiohttp
+import asyncio
+import time
+
+DELETE_BATCH_SIZE = 1000  # Pinecone's limit on ids per delete request
+
+
+def is_connection_error(error):
+    """
+    Whether a failed request points at the handle itself (a dead
+    connection, or a host that no longer exists) rather than at the request.
+
+    Timeouts, bad requests and server errors are not: a fresh handle would
+    not fix them, and refreshing would disturb the requests still using it.
+    """
+    for e in (error, error.__cause__):
+        if e is None or isinstance(e, TimeoutError):
+            continue
+        if isinstance(e, (aiohttp.ClientConnectionError, ConnectionError, PineconeProtocolError, NotFoundException)):
+            return True
+    return False
 
 
 class AsyncPineconeDB(EmbeddingModel):
     """ 
     A class for interacting with Pinecone vector database.
+
+    The index host and its IndexAsyncio handle are cached per index name
+    for the whole process, so only the first get_index() pays for a
+    describe_index round trip. The cached handle (and its connection pool)
+    is shared by every instance using the same client, and rebuilt by
+    get_index(refresh=True) when a request through it fails on the
+    connection. Requests hold the handle with lease_index(); a handle
+    swapped out while leased is closed once its last lease ends.
     """
+    # index name -> (client, host, IndexAsyncio handle)
+    _handles = {}
+    # id(handle) -> requests using it; swapped-out handles waiting for their requests to finish
+    _leases = {}
+    _retired = {}
+
     def __init__(self,client,config=ConfigurationManager()):
         try:
             self.config = config.get_chatbot_config()
@@ -19,6 +57,9 @@ class AsyncPineconeDB(EmbeddingModel):
             self.dimension = self.config.dimension  # Dimension of the embedding model
             super().__init__()
             self.pinecone_client = client
+            self.retrieval_cache_config = config.get_retrieval_cache_config()
+            self.bulk_upsert_config = config.get_bulk_upsert_config()
+            self.connection_config = config.get_pinecone_connection_config()
             
 
         except Exception as e:
@@ -38,15 +79,22 @@ class AsyncPineconeDB(EmbeddingModel):
             AppException: If the index does not exist or cannot be loaded.
         """
         try:
-            if not await self.pinecone_client.has_index(self.index_name):
+            try:
+                index = await self.get_index()
+            except NotFoundException:
                 logger.warning(
                     f"Pinecone index '{self.index_name}' not found. "
                     "You must call create_vector_store_and_retriever()."
                 )
-            
-            retriever = PineconeAsyncRetriever(embedding_model=EmbeddingModel(),
-                                            index=await self.get_index(),
-                                            k=k)
+                raise
+
+            # this store is itself an EmbeddingModel: reuse its HTTP batcher and query cache
+            retriever = PineconeAsyncRetriever(embedding_model=self,
+                                            index=index,
+                                            k=k,
+                                            refresh_index=self._refresh_index,
+                                            lease_index=self.lease_index,
+                                            **self._retrieval_cache_kwargs())
         except Exception as e:
             raise AppException(e)
         else:
@@ -76,16 +124,15 @@ class AsyncPineconeDB(EmbeddingModel):
             logger.info(f"Creating Pinecone vector store with index: {self.index_name}")
             logger.info(f"Using embedding model: {self.embedding_model}")
 
-            # create a new Pinecone vector store from the documents
-            await PineconeVectorStore.afrom_documents(
-                documents=chunked_text,  # list of documents to create the vector store from
-                embedding=self.embedding_model,  # the embedding model to use for creating the vector store
-                index_name=self.index_name,  # the name of the index to use for the vector store
-            )
+            # embed and upsert in bounded batches; resumes from the checkpoint after a crash
+            await self.bulk_upsert(chunked_text)
 
             retriever = PineconeAsyncRetriever(embedding_model=self.embedding_model,
                                             index= await self.get_index(),
-                                            k=3)
+                                            k=3,
+                                            refresh_index=self._refresh_index,
+                                            lease_index=self.lease_index,
+                                            **self._retrieval_cache_kwargs())
 
         except Exception as e:
             # if there is an error during the creation of the vector store, raise an AppException
@@ -107,17 +154,107 @@ class AsyncPineconeDB(EmbeddingModel):
         """
         try:
             await doc_vector_store.aadd_documents(documents=[new_doc])
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
         except Exception as e:
             raise AppException(e)
         
         logger.info(f"Added new document to Pinecone vector store")
 
-    async def get_index(self):
+    async def aupsert_documents(self, docs, ids):
+        """
+        Writes documents under the given ids, overwriting existing vectors.
+
+        Args:
+            docs (List[Document]): Documents to write.
+            ids (List[str]): One id per document.
+        """
+        try:
+            await self.bulk_upsert(docs, ids=ids, resumable=False)
+        except Exception as e:
+            raise AppException(e)
+
+    async def bulk_upsert(self, docs, ids=None, resumable=True):
+        """
+        Embeds and upserts documents with bounded concurrency and retries.
+
+        Args:
+            docs (List[Document]): Documents to write.
+            ids (List[str], optional): One id per document; derived from source and text when omitted.
+            resumable (bool): Checkpoint progress so that re-running an interrupted load skips finished batches.
+
+        Returns:
+            int: Number of vectors upserted.
+        """
+        await self._create_index()
+        await self.set_embedding_model()
+        bulk_config = self.bulk_upsert_config
+        index = await self.get_index()
+        upserter = PineconeBulkUpserter(
+            index=index,
+            embedding_model=self.embedding_model,
+            embed_batch_size=bulk_config.embed_batch_size,
+            upsert_batch_size=bulk_config.upsert_batch_size,
+            max_in_flight=bulk_config.max_in_flight,
+            max_payload_bytes=bulk_config.max_payload_bytes,
+            max_retries=bulk_config.max_retries,
+            backoff_base=bulk_config.backoff_base,
+            backoff_max=bulk_config.backoff_max,
+            checkpoint_path=bulk_config.checkpoint_path if resumable else None,
+        )
+        async with self.lease_index(index):
+            upserted = await upserter.upsert(docs, ids=ids)
+        IndexGeneration(self.config.index_generation_path).bump(self.index_name)
+        return upserted
+
+    async def adelete_documents(self, ids):
+        """
+        Deletes the vectors with the given ids from the Pinecone index.
+        """
+        try:
+            index = await self.get_index()
+            async with self.lease_index(index):
+                for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                    await index.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
+        except Exception as e:
+            raise AppException(e)
+
+    def _retrieval_cache_kwargs(self):
         """
-        You can find host name by calling get_list_of_indexes() function
+        Retrieval result cache wiring for PineconeAsyncRetriever, tied to
+        this index's generation so that writes invalidate it.
         """
+        if not self.retrieval_cache_config.enabled:
+            return {}
+        return {
+            "cache": LRUTTLCache(maxsize=self.retrieval_cache_config.max_entries,
+                                 ttl=self.retrieval_cache_config.ttl_seconds),
+            "index_generation": IndexGeneration(self.config.index_generation_path),
+            "index_name": self.index_name,
+        }
+
+    async def get_index(self, refresh=False):
+        """
+        The cached IndexAsyncio handle of this index, created on first use.
+
+        Args:
+            refresh (bool): Replace the cached handle, looking the host up again,
+                e.g. after a request through it failed on the connection. The
+                old handle is closed once no request leases it any more.
+        """
+        cached = AsyncPineconeDB._handles.get(self.index_name)
+        if cached is not None and cached[0] is self.pinecone_client and not refresh:
+            return cached[2]
         host_name = await self.get_host_name()
-        index = self.pinecone_client.IndexAsyncio(host=host_name)
+        latest = AsyncPineconeDB._handles.get(self.index_name)
+        if latest is not None and latest is not cached and latest[0] is self.pinecone_client:
+            # a concurrent caller opened a handle while we were looking up the host
+            return latest[2]
+        if latest is not None:
+            await self._close_handle(self.index_name)
+        index = self.pinecone_client.IndexAsyncio(host=host_name,
+                                                  connection_pool_maxsize=self.connection_config.pool_size)
+        AsyncPineconeDB._handles[self.index_name] = (self.pinecone_client, host_name, index)
         return index
 
     async def get_host_name(self):
@@ -125,6 +262,117 @@ class AsyncPineconeDB(EmbeddingModel):
         host_name = index_info.host
         return host_name
 
+    async def warm_up(self, connections=None):
+        """
+        Opens keep-alive connections to the index host (and one to the
+        embedding endpoint) so the first question does not pay for DNS, TCP
+        and TLS setup. Failures are logged, never raised.
+
+        Args:
+            connections (int, optional): Concurrent requests to open; defaults to WARMUP_CONNECTIONS.
+        """
+        connections = connections or self.connection_config.warmup_connections
+        started = time.perf_counter()
+        try:
+            index = await self.get_index()
+            async with self.lease_index(index):
+                await asyncio.gather(*(index.describe_index_stats() for _ in range(connections)))
+        except Exception as e:
+            logger.warning(f"Pinecone warm-up failed: {e}")
+            return
+        try:
+            await self._aembed_remote("warm up")
+        except Exception as e:
+            logger.warning(f"Embedding endpoint warm-up failed: {e}")
+        logger.info(f"Warmed {connections} Pinecone connections in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    async def keep_warm(self):
+        """
+        Re-warms the pool every KEEPALIVE_SECONDS, below aiohttp's idle
+        keep-alive timeout, so connections are still open after quiet periods.
+        Run it as a task and cancel it on shutdown; returns at once when
+        KEEPALIVE_SECONDS is 0.
+        """
+        interval = self.connection_config.keepalive_seconds
+        connections = self.connection_config.warmup_connections
+        while interval > 0:
+            await asyncio.sleep(interval)
+            index = None
+            try:
+                index = await self.get_index()
+                async with self.lease_index(index):
+                    await asyncio.gather(*(index.describe_index_stats() for _ in range(connections)))
+            except Exception as e:
+                if index is None or not is_connection_error(e):
+                    logger.warning(f"Pinecone keep-alive failed: {e}")
+                    continue
+                logger.warning(f"Pinecone keep-alive failed, refreshing the index handle: {e}")
+                try:
+                    await self._refresh_index(index)
+                except Exception as e:
+                    logger.warning(f"Pinecone index refresh failed: {e}")
+
+    @staticmethod
+    @asynccontextmanager
+    async def lease_index(index):
+        """
+        Marks `index` as in use for the duration of a request, so that a
+        refresh swapping it out waits for the request before closing it.
+        """
+        key = id(index)
+        AsyncPineconeDB._leases[key] = AsyncPineconeDB._leases.get(key, 0) + 1
+        try:
+            yield index
+        finally:
+            AsyncPineconeDB._leases[key] -= 1
+            if not AsyncPineconeDB._leases[key]:
+                del AsyncPineconeDB._leases[key]
+                retired = AsyncPineconeDB._retired.pop(key, None)
+                if retired is not None:
+                    await AsyncPineconeDB._close_index(retired)
+
+    @staticmethod
+    async def close_indexes():
+        """
+        Closes every cached and retired index handle; call on shutdown,
+        before closing the client.
+        """
+        for index_name in list(AsyncPineconeDB._handles):
+            await AsyncPineconeDB._close_handle(index_name)
+        for key in list(AsyncPineconeDB._retired):
+            await AsyncPineconeDB._close_index(AsyncPineconeDB._retired.pop(key))
+
+    @staticmethod
+    async def _close_handle(index_name):
+        _, _, index = AsyncPineconeDB._handles.pop(index_name)
+        if AsyncPineconeDB._leases.get(id(index)):
+            # requests are still using it: the last one to finish closes it
+            AsyncPineconeDB._retired[id(index)] = index
+            return
+        await AsyncPineconeDB._close_index(index)
+
+    @staticmethod
+    async def _close_index(index):
+        try:
+            await index.close()
+        except Exception as e:
+            logger.warning(f"Error closing Pinecone index handle: {e}")
+
+    async def _refresh_index(self, stale_index, error=None):
+        """
+        Replaces `stale_index` in the cache, unless another caller already did.
+
+        Returns None, leaving the handle alone, when `error` (the failure of a
+        request through it) is not a connection error.
+        """
+        if error is not None and not is_connection_error(error):
+            return None
+        cached = AsyncPineconeDB._handles.get(self.index_name)
+        if cached is not None and cached[0] is self.pinecone_client and cached[2] is not stale_index:
+            return cached[2]
+        logger.warning(f"Refreshing the Pinecone index handle of '{self.index_name}'")
+        return await self.get_index(refresh=True)
+
 
     async def _init_connection(self):
         try:
@@ -157,5 +405,5 @@ class AsyncPineconeDB(EmbeddingModel):
 
     async def set_embedding_model(self):
         if not self.embedding_model:
-            self.embedding_model = self._get_model()
+            self.embedding_model = self.batch_local_model(self._get_model())
         return self
@@ -0,0 +1,239 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.models.embedding_client import RETRYABLE_STATUS_CODES
+from langchain.schema import Document
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+import aiohttp
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+
+# rough JSON size of one float in an upsert request body
+BYTES_PER_FLOAT = 12
+
+
+def document_id(doc: Document) -> str:
+    """
+    The document's own id, or a stable one derived from its source and text,
+    so that a resumed load writes the same ids as the interrupted one.
+    """
+    if doc.id:
+        return doc.id
+    content = f"{doc.metadata.get('source')}|{doc.page_content}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class PineconeBulkUpserter:
+    """
+    Bulk loader for a Pinecone IndexAsyncio.
+
+    Documents are embedded `embed_batch_size` at a time in a worker thread
+    while the previous batch is being upserted. Each embedded batch is cut
+    into requests of at most `upsert_batch_size` vectors and
+    `max_payload_bytes` of estimated body, and at most `max_in_flight`
+    requests run at once. Throttled (429), 5xx and network failures are
+    retried with exponential backoff and full jitter.
+
+    With a `checkpoint_path`, the numbers of the fully upserted embed batches
+    are written after each one, keyed on a fingerprint of the input ids, so
+    running the same load again after a crash skips the finished batches.
+    The checkpoint is deleted once the load completes.
+
+    Parameters
+    ----------
+    index : Any
+        Pinecone IndexAsyncio with an async `upsert(vectors=...)`.
+    embedding_model : Any
+        LangChain embeddings exposing `embed_documents(texts)`.
+    embed_batch_size, upsert_batch_size, max_in_flight, max_payload_bytes : int
+        Batching and concurrency limits.
+    max_retries : int, default 5
+        Retries per request before the load fails.
+    backoff_base, backoff_max : float
+        Backoff parameters in seconds.
+    checkpoint_path : str, optional
+        Where to persist progress; None disables resuming.
+    text_key : str, default "text"
+        Metadata key holding the chunk text, as PineconeVectorStore expects.
+    """
+
+    def __init__(self,
+        index: Any,
+        embedding_model: Any,
+        embed_batch_size: int = 256,
+        upsert_batch_size: int = 200,
+        max_in_flight: int = 4,
+        max_payload_bytes: int = 2_000_000,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        checkpoint_path: Optional[str] = None,
+        text_key: str = "text",
+    ) -> None:
+        self.index = index
+        self.embedding_model = embedding_model
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.max_in_flight = max_in_flight
+        self.max_payload_bytes = max_payload_bytes
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.text_key = text_key
+
+        self.vectors_upserted = 0
+        self.requests = 0
+        self.retries = 0
+
+    async def upsert(self, docs: List[Document], ids: Optional[List[str]] = None) -> int:
+        """
+        Embeds and upserts every document.
+
+        Returns:
+            int: Number of vectors upserted by this call (skipped batches excluded).
+        """
+        if ids is None:
+            ids = [document_id(doc) for doc in docs]
+        if not docs:
+            return 0
+        batches = [
+            (start // self.embed_batch_size, docs[start:start + self.embed_batch_size], ids[start:start + self.embed_batch_size])
+            for start in range(0, len(docs), self.embed_batch_size)
+        ]
+        fingerprint = hashlib.sha1("\n".join(ids).encode("utf-8")).hexdigest()
+        done = self._load_checkpoint(fingerprint)
+        if done:
+            logger.info(f"Resuming bulk upsert: {len(done)}/{len(batches)} batches already done")
+
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        pending: Set[asyncio.Task] = set()
+        failures: List[BaseException] = []
+
+        started = time.perf_counter()
+        self.vectors_upserted = 0
+        try:
+            for number, batch_docs, batch_ids in batches:
+                if number in done:
+                    continue
+                texts = [doc.page_content for doc in batch_docs]
+                embeddings = await asyncio.to_thread(self.embedding_model.embed_documents, texts)
+                records = [self._record(doc_id, doc, vector) for doc_id, doc, vector in zip(batch_ids, batch_docs, embeddings)]
+                requests = self._split(records)
+                remaining = {"count": len(requests)}
+                for request in requests:
+                    await semaphore.acquire()
+                    if failures:
+                        semaphore.release()
+                        raise failures[0]
+                    task = asyncio.create_task(
+                        self._send(request, semaphore, failures, number, remaining, done, fingerprint, started)
+                    )
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+            if failures:
+                raise failures[0]
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            raise
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Bulk upsert of {self.vectors_upserted} vectors in {elapsed:.1f}s "
+            f"({self.vectors_upserted / elapsed if elapsed else 0.0:.1f} vectors/sec, "
+            f"{self.requests} requests, {self.retries} retries)"
+        )
+        if self.checkpoint_path is not None:
+            self.checkpoint_path.unlink(missing_ok=True)
+        return self.vectors_upserted
+
+    async def _send(self, request, semaphore, failures, number, remaining, done, fingerprint, started):
+        try:
+            await self._upsert_with_retry(request)
+        except Exception as e:
+            # recorded before the slot is released, so the loop waiting for it sends nothing more
+            failures.append(e)
+            return
+        finally:
+            semaphore.release()
+        self.vectors_upserted += len(request)
+        remaining["count"] -= 1
+        if remaining["count"] == 0:
+            done.add(number)
+            self._save_checkpoint(fingerprint, done)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Upserted batch {number}: {self.vectors_upserted} vectors so far, "
+                f"{self.vectors_upserted / elapsed if elapsed else 0.0:.1f} vectors/sec"
+            )
+
+    async def _upsert_with_retry(self, request: List[dict]):
+        attempt = 0
+        while True:
+            try:
+                self.requests += 1
+                await self.index.upsert(vectors=request)
+                return
+            except Exception as e:
+                status = getattr(e, "status", None)
+                if status is None:
+                    retryable = isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError, OSError))
+                else:
+                    retryable = status in RETRYABLE_STATUS_CODES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                logger.warning(f"Upsert of {len(request)} vectors failed ({status or type(e).__name__}), retrying")
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def _record(self, doc_id: str, doc: Document, vector) -> dict:
+        metadata = {key: value for key, value in doc.metadata.items() if value is not None}
+        metadata[self.text_key] = doc.page_content
+        return {"id": doc_id, "values": [float(x) for x in vector], "metadata": metadata}
+
+    def _split(self, records: List[dict]) -> List[List[dict]]:
+        """
+        Cuts records into requests bounded by count and estimated body size.
+        """
+        requests, current, current_bytes = [], [], 0
+        for record in records:
+            size = len(record["values"]) * BYTES_PER_FLOAT + len(json.dumps(record["metadata"], default=str)) + len(record["id"]) + 64
+            if current and (len(current) >= self.upsert_batch_size or current_bytes + size > self.max_payload_bytes):
+                requests.append(current)
+                current, current_bytes = [], 0
+            current.append(record)
+            current_bytes += size
+        if current:
+            requests.append(current)
+        return requests
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _load_checkpoint(self, fingerprint: str) -> Set[int]:
+        if self.checkpoint_path is None or not self.checkpoint_path.exists():
+            return set()
+        with open(self.checkpoint_path, encoding="utf-8") as file:
+            data: Dict[str, Any] = json.load(file)
+        if data.get("fingerprint") != fingerprint:
+            logger.info("Bulk upsert checkpoint is for a different input, starting over")
+            return set()
+        return set(data.get("done", []))
+
+    def _save_checkpoint(self, fingerprint: str, done: Set[int]):
+        if self.checkpoint_path is None:
+            return
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"fingerprint": fingerprint, "done": sorted(done)}, file)
+        os.replace(tmp_path, self.checkpoint_path)
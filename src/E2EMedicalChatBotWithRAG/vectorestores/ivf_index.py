@@ -0,0 +1,300 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.vectorestores.local_index import normalize_rows, top_k
+from pathlib import Path
+from typing import List, Optional, Tuple
+import os
+import time
+import numpy as np
+
+# Rows assigned to centroids per block, bounds the size of the score matrix
+ASSIGN_BLOCK_SIZE = 65536
+
+
+def sidecar_path(path: Path, name: str) -> Path:
+    """
+    Path of an auxiliary array stored next to the main `.npy` file.
+    """
+    return path.with_name(f"{path.stem}.{name}.npy")
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF-Flat) approximate cosine-similarity index.
+
+    Vectors are clustered around `nlist` k-means centroids and stored
+    contiguously, grouped by cluster. A search scores the query against the
+    centroids, then exactly scores only the `nprobe` closest clusters, so
+    its cost grows with N * nprobe / nlist instead of N.
+
+    Until at least `nlist * min_points_per_list` vectors have been added the
+    index is untrained and searches every vector exactly. Vectors added
+    after training are assigned to their nearest centroid and kept in a
+    small pending buffer that is merged into the grouped layout on save()
+    or once it grows past `merge_fraction` of the index; centroids are not
+    retrained, so call train() again after a large change in the corpus.
+
+    Row numbers follow FlatIndex: the i-th vector ever added (minus removed
+    rows before it) is row i.
+
+    Parameters
+    ----------
+    dimension : int
+        Embedding dimension.
+    nlist : int, default 256
+        Number of clusters (inverted lists).
+    nprobe : int, default 8
+        Number of clusters scanned per query; trades recall for latency.
+    train_iterations : int, default 20
+        k-means iterations when training.
+    max_training_points : int, default 100000
+        Size of the random sample k-means is trained on.
+    min_points_per_list : int, default 39
+        Vectors needed per cluster before the index trains itself.
+    """
+
+    def __init__(self,
+        dimension: int,
+        nlist: int = 256,
+        nprobe: int = 8,
+        train_iterations: int = 20,
+        max_training_points: int = 100000,
+        min_points_per_list: int = 39,
+        merge_fraction: float = 0.1,
+        seed: int = 42,
+    ) -> None:
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.max_training_points = max_training_points
+        self.min_points_per_list = min_points_per_list
+        self.merge_fraction = merge_fraction
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        # Grouped layout: vectors of list i are vectors[offsets[i]:offsets[i+1]]
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.offsets = np.zeros(2, dtype=np.int64)
+        # Vectors added since the last merge
+        self.pending_vectors = np.empty((0, dimension), dtype=np.float32)
+        self.pending_rows = np.empty(0, dtype=np.int64)
+        self.pending_lists = np.empty(0, dtype=np.int64)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return self.rows.shape[0] + self.pending_rows.shape[0]
+
+    def add(self, vectors) -> None:
+        vectors = normalize_rows(vectors)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dim vectors, got {vectors.shape[1]}")
+        rows = np.arange(len(self), len(self) + vectors.shape[0], dtype=np.int64)
+        lists = self._assign(vectors) if self.is_trained else np.zeros(len(rows), dtype=np.int64)
+        self.pending_vectors = np.concatenate([self.pending_vectors, vectors])
+        self.pending_rows = np.concatenate([self.pending_rows, rows])
+        self.pending_lists = np.concatenate([self.pending_lists, lists])
+
+        if not self.is_trained and len(self) >= self.nlist * self.min_points_per_list:
+            self.train()
+        elif self.pending_rows.shape[0] > self.merge_fraction * max(self.rows.shape[0], 1024):
+            self._merge()
+
+    def remove(self, rows) -> None:
+        drop = np.unique(np.asarray(list(rows), dtype=np.int64))
+        if drop.size == 0:
+            return
+        keep = ~np.isin(self.rows, drop)
+        lists = np.repeat(np.arange(self._n_lists()), np.diff(self.offsets))
+        list_sizes = np.bincount(lists[keep], minlength=self._n_lists())
+        self.vectors = np.asarray(self.vectors)[keep]
+        self.rows = self.rows[keep]
+        self.offsets = np.concatenate([[0], np.cumsum(list_sizes)]).astype(np.int64)
+
+        keep = ~np.isin(self.pending_rows, drop)
+        self.pending_vectors = self.pending_vectors[keep]
+        self.pending_rows = self.pending_rows[keep]
+        self.pending_lists = self.pending_lists[keep]
+
+        # Renumber so rows stay dense, matching the caller's compacted records
+        self.rows = self.rows - np.searchsorted(drop, self.rows)
+        self.pending_rows = self.pending_rows - np.searchsorted(drop, self.pending_rows)
+
+    def train(self) -> None:
+        """
+        Runs k-means over (a sample of) all vectors and regroups them by cluster.
+        """
+        started = time.perf_counter()
+        vectors, rows = self._all_vectors()
+        nlist = min(self.nlist, vectors.shape[0])
+        rng = np.random.default_rng(self.seed)
+        sample = vectors
+        if vectors.shape[0] > self.max_training_points:
+            sample = vectors[rng.choice(vectors.shape[0], self.max_training_points, replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+        for _ in range(self.train_iterations):
+            assignment = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            empty = counts == 0
+            # Re-seed empty clusters with random points
+            sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()))]
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+        self._build(vectors, rows, self._assign(vectors))
+        logger.info(
+            f"Trained IVF index with {nlist} lists on {sample.shape[0]} vectors "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def search(self, queries, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k rows for each query.
+
+        Returns:
+            (scores, rows): two (n_queries x k) arrays, best match first,
+            padded with -inf / -1 when fewer than k vectors were scanned.
+        """
+        queries = normalize_rows(queries)
+        if not self.is_trained:
+            vectors, rows = self._all_vectors()
+            scores, positions = top_k(queries @ vectors.T, k)
+            return scores, rows[positions]
+
+        nprobe = min(nprobe or self.nprobe, self._n_lists())
+        _, probes = top_k(queries @ self.centroids.T, nprobe)  # type: ignore
+        out_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        out_rows = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        for i, (query, lists) in enumerate(zip(queries, probes)):
+            positions = np.concatenate(
+                [np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists]
+            )
+            pending = np.flatnonzero(np.isin(self.pending_lists, lists))
+            candidates = np.concatenate([self.vectors[positions], self.pending_vectors[pending]])
+            candidate_rows = np.concatenate([self.rows[positions], self.pending_rows[pending]])
+            if candidate_rows.size == 0:
+                continue
+            scores, best = top_k((candidates @ query)[None, :], k)
+            out_scores[i, :best.shape[1]] = scores[0]
+            out_rows[i, :best.shape[1]] = candidate_rows[best[0]]
+        return out_scores, out_rows
+
+    def recall_report(self, queries, k: int = 10, nprobes: Optional[List[int]] = None) -> List[dict]:
+        """
+        Recall@k and latency of approximate search against exact search
+        over the same vectors, for several nprobe values.
+
+        Returns:
+            One dict per nprobe with recall, mean and p95 latency in ms per
+            query, plus the exact-search baseline latency.
+        """
+        queries = normalize_rows(queries)
+        vectors, rows = self._all_vectors()
+
+        exact_latencies = []
+        exact = []
+        for query in queries:
+            started = time.perf_counter()
+            _, positions = top_k((vectors @ query)[None, :], k)
+            exact_latencies.append(time.perf_counter() - started)
+            exact.append(set(rows[positions[0]].tolist()))
+
+        report = []
+        for nprobe in nprobes or [1, 2, 4, 8, 16, 32, 64]:
+            latencies, hits = [], 0
+            for query, truth in zip(queries, exact):
+                started = time.perf_counter()
+                _, found = self.search(query[None, :], k, nprobe=nprobe)
+                latencies.append(time.perf_counter() - started)
+                hits += len(truth & set(found[0].tolist()))
+            report.append({
+                "nprobe": nprobe,
+                "recall": hits / (k * len(queries)),
+                "mean_ms": 1000 * float(np.mean(latencies)),
+                "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+                "exact_mean_ms": 1000 * float(np.mean(exact_latencies)),
+            })
+        return report
+
+    def save(self, path) -> None:
+        """
+        Persists the grouped layout as `.npy` files that load() memory-maps.
+        """
+        self._merge()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            path: np.ascontiguousarray(self.vectors, dtype=np.float32),
+            sidecar_path(path, "rows"): self.rows,
+            sidecar_path(path, "offsets"): self.offsets,
+        }
+        if self.is_trained:
+            arrays[sidecar_path(path, "centroids")] = self.centroids
+        for array_path, array in arrays.items():
+            tmp_path = array_path.with_name(array_path.name + ".tmp.npy")
+            np.save(tmp_path, array)
+            os.replace(tmp_path, array_path)
+        if not self.is_trained:
+            sidecar_path(path, "centroids").unlink(missing_ok=True)
+        self.vectors = np.load(path, mmap_mode="r")
+
+    @classmethod
+    def load(cls, path, dimension: int, **params) -> "IVFIndex":
+        index = cls(dimension, **params)
+        path = Path(path)
+        if not path.exists():
+            return index
+        index.vectors = np.load(path, mmap_mode="r")
+        rows_path = sidecar_path(path, "rows")
+        if not rows_path.exists():
+            # A FlatIndex file: rows are in insertion order, untrained
+            index.rows = np.arange(index.vectors.shape[0], dtype=np.int64)
+            index.offsets = np.array([0, index.vectors.shape[0]], dtype=np.int64)
+            return index
+        index.rows = np.load(rows_path)
+        index.offsets = np.load(sidecar_path(path, "offsets"))
+        centroids_path = sidecar_path(path, "centroids")
+        if centroids_path.exists():
+            index.centroids = np.load(centroids_path)
+        return index
+
+    def _n_lists(self) -> int:
+        return self.centroids.shape[0] if self.is_trained else 1  # type: ignore
+
+    def _all_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        vectors = np.concatenate([np.asarray(self.vectors), self.pending_vectors])
+        rows = np.concatenate([self.rows, self.pending_rows])
+        return vectors, rows
+
+    def _assign(self, vectors, centroids=None) -> np.ndarray:
+        centroids = self.centroids if centroids is None else centroids
+        assignment = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], ASSIGN_BLOCK_SIZE):
+            block = vectors[start:start + ASSIGN_BLOCK_SIZE]
+            assignment[start:start + ASSIGN_BLOCK_SIZE] = np.argmax(block @ centroids.T, axis=1)  # type: ignore
+        return assignment
+
+    def _merge(self) -> None:
+        if self.pending_rows.size == 0:
+            return
+        if not self.is_trained:
+            vectors, rows = self._all_vectors()
+            self._build(vectors, rows, np.zeros(rows.shape[0], dtype=np.int64))
+            return
+        lists = np.concatenate([np.repeat(np.arange(self._n_lists()), np.diff(self.offsets)), self.pending_lists])
+        vectors, rows = self._all_vectors()
+        self._build(vectors, rows, lists)
+
+    def _build(self, vectors, rows, lists) -> None:
+        order = np.argsort(lists, kind="stable")
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.rows = rows[order]
+        counts = np.bincount(lists, minlength=self._n_lists())
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.pending_vectors = np.empty((0, self.dimension), dtype=np.float32)
+        self.pending_rows = np.empty(0, dtype=np.int64)
+        self.pending_lists = np.empty(0, dtype=np.int64)
@@ -0,0 +1,319 @@
+from E2EMedicalChatBotWithRAG.logger import logger
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.exceptions import AppException
+from E2EMedicalChatBotWithRAG.models.embedding_model import EmbeddingModel
+from E2EMedicalChatBotWithRAG.retrievers.local_retriever import LocalAsyncRetriever
+from E2EMedicalChatBotWithRAG.utils import IndexGeneration
+from E2EMedicalChatBotWithRAG.vectorestores.local_index import FlatIndex
+from E2EMedicalChatBotWithRAG.vectorestores.ivf_index import IVFIndex, sidecar_path
+from langchain.schema import Document
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+
+
+class LocalVectorDB(EmbeddingModel):
+    """
+    A class for an in-process NumPy vector store.
+
+    Chunk embeddings are kept in a contiguous float32 matrix persisted as a
+    memory-mapped `.npy` file, with chunk text and source in a JSON-lines
+    sidecar. Retrieval needs no network hop.
+
+    INDEX_TYPE selects exact search (`flat`) or the approximate IVF index
+    (`ivf`, tuned with NLIST / NPROBE / TRAIN_ITERATIONS) for large corpora.
+
+    Every write persists the index and bumps its generation, unless made
+    inside `batch_writes()`, which does both once at the end; an ingestion
+    run of many batches then rewrites the files once instead of per batch.
+    A store whose files another process rewrote reloads them in
+    `reload_if_changed()`, which its retrievers call before each search.
+    """
+    def __init__(self,config=ConfigurationManager()):
+        try:
+            super().__init__()
+
+            self.config = config.get_chatbot_config()
+            self.local_config = config.get_local_vector_store_config()
+            self.index_name = self.config.index_name
+            self.dimension = self.config.dimension  # Dimension of the embedding model
+            self.store_dir = Path(self.local_config.path)
+            self.embedding_model = self.batch_local_model(self._get_model())
+            self._lock = threading.RLock()
+            self._batch_depth = 0
+            self._dirty = False
+
+            self._init_connection()
+
+        except Exception as e:
+            logger.error(f"Error in ConfigurationManager: {e}")
+            raise AppException(e) from e
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.store_dir / f"{self.index_name}.npy"
+
+    @property
+    def metadata_path(self) -> Path:
+        return self.store_dir / f"{self.index_name}.meta.jsonl"
+
+    def get_retriever(self,k=3):
+        """
+        Load a retriever for similarity search on the local index.
+
+        Returns:
+            LocalAsyncRetriever: Retriever for cosine similarity with the given k.
+        """
+        try:
+            if len(self.records) == 0:
+                logger.warning(
+                    f"Local index '{self.index_name}' is empty. "
+                    "You must call create_vector_store()."
+                )
+            retriever = LocalAsyncRetriever(store=self, embedding_model=self.embedding_model, k=k)
+        except Exception as e:
+            raise AppException(e)
+        else:
+            return retriever
+
+    def create_vector_store(self,chunked_text):
+        """
+        Creates a new local vector store from the given list of documents,
+        replacing whatever the index held before.
+
+        Args:
+            chunked_text (List[Document]): A list of documents to create the vector store from.
+        """
+        try:
+            with self.batch_writes(), self._lock:
+                self.index = self._new_index()
+                self.records = []
+                self.row_of = {}
+                self._dirty = True
+                self.add_documents(chunked_text)
+            logger.info("Your data has been stored in the vectore store")
+        except Exception as e:
+            raise AppException(e)
+
+    def add_document_to_store(self,new_doc):
+        """
+        Adds a new document to the local vector store.
+
+        Args:
+            new_doc (Document): The document to add to the vector store.
+
+        Raises:
+            AppException: If there is an error during the addition of the document to the vector store.
+        """
+        try:
+            self.add_documents([new_doc])
+        except Exception as e:
+            raise AppException(e)
+
+        logger.info(f"Added new document to local vector store")
+
+    def add_documents(self, docs: List[Document], ids: Optional[List[str]] = None, embeddings=None):
+        """
+        Embeds and appends documents, then persists the index (at the end
+        of the enclosing batch_writes() block, if any).
+
+        Documents whose id is already present are replaced. Precomputed
+        `embeddings` (one per document) skip the embedding step.
+        """
+        if not docs:
+            return
+        if ids is None:
+            ids = [doc.id or self._content_id(doc) for doc in docs]
+        if embeddings is None:
+            unique = dict(zip(ids, docs))  # later duplicates win
+            ids, docs = list(unique), list(unique.values())
+            embeddings = self.embedding_model.embed_documents([doc.page_content for doc in docs])
+        else:
+            unique = {doc_id: (doc, vector) for doc_id, doc, vector in zip(ids, docs, embeddings)}
+            ids = list(unique)
+            docs = [doc for doc, _ in unique.values()]
+            embeddings = [vector for _, vector in unique.values()]
+        with self._lock:
+            self._remove_rows([self.row_of[i] for i in ids if i in self.row_of])
+            self.index.add(embeddings)
+            for doc_id, doc in zip(ids, docs):
+                self.row_of[doc_id] = len(self.records)
+                self.records.append({
+                    "id": doc_id,
+                    "text": doc.page_content,
+                    "source": doc.metadata.get("source"),
+                })
+            self._dirty = True
+        self._commit_unless_batched()
+
+    def upsert_documents(self, docs: List[Document], ids: List[str], embeddings=None):
+        self.add_documents(docs, ids=ids, embeddings=embeddings)
+
+    def delete_documents(self, ids: List[str]):
+        """
+        Removes the documents with the given ids, then persists the index
+        (at the end of the enclosing batch_writes() block, if any).
+        """
+        with self._lock:
+            rows = [self.row_of[i] for i in ids if i in self.row_of]
+            self._remove_rows(rows)
+            self._dirty = self._dirty or bool(rows)
+        self._commit_unless_batched()
+
+    @contextmanager
+    def batch_writes(self):
+        """
+        Defers persisting the writes made inside the block to its end, where
+        the index is saved and its generation bumped once. Searches see the
+        writes at once. Blocks may nest; the outermost one commits, also
+        when the block raises, so the files match what is in memory.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+            self._commit_unless_batched()
+
+    def commit(self):
+        """
+        Persists the index and bumps its generation if it changed since the
+        last commit.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._save()
+            self._dirty = False
+        IndexGeneration(self.config.index_generation_path).bump(self.index_name)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reloads the index when another process rewrote its files since they
+        were loaded or saved here; a stat per call otherwise. Writes not yet
+        committed here are kept rather than overwritten.
+
+        Returns:
+            bool: True if the index was reloaded.
+        """
+        mtime = self._files_mtime()
+        if mtime == self._loaded_mtime or self._dirty:
+            return False
+        with self._lock:
+            if mtime == self._loaded_mtime or self._dirty:
+                return False
+            try:
+                self._init_connection()
+            except AppException as e:
+                # caught between the two files of a rewrite: keep the old index, retry on the next call
+                logger.warning(f"Local index '{self.index_name}' not reloaded: {e}")
+                return False
+        return True
+
+    def _commit_unless_batched(self):
+        if not self._batch_depth:
+            self.commit()
+
+    def search(self, query_vectors, k: int = 3) -> List[List[Tuple[Document, float]]]:
+        """
+        Top-k documents for a batch of query vectors with one matrix product.
+        """
+        with self._lock:
+            index, records = self.index, self.records
+            if len(records) == 0:
+                return [[] for _ in range(len(query_vectors))]
+            scores, rows = index.search(query_vectors, k)
+        results = []
+        for row_scores, row_ids in zip(scores, rows):
+            hits = []
+            for score, row in zip(row_scores, row_ids):
+                if row < 0:
+                    continue  # fewer than k vectors scanned
+                record = records[row]
+                doc = Document(
+                    id=record["id"],
+                    page_content=record["text"],
+                    metadata={"source": record["source"], "similarity_score": float(score)},
+                )
+                hits.append((doc, float(score)))
+            results.append(hits)
+        return results
+
+    def _remove_rows(self, rows):
+        if not rows:
+            return
+        drop = set(rows)
+        self.index.remove(drop)
+        self.records = [record for row, record in enumerate(self.records) if row not in drop]
+        self.row_of = {record["id"]: row for row, record in enumerate(self.records)}
+
+    def _save(self):
+        self.index.save(self.vectors_path)
+        if isinstance(self.index, FlatIndex):
+            for name in ("rows", "offsets", "centroids"):
+                sidecar_path(self.vectors_path, name).unlink(missing_ok=True)
+        tmp_path = self.metadata_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for record in self.records:
+                file.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, self.metadata_path)
+        self._loaded_mtime = self._files_mtime()
+
+    def _files_mtime(self) -> Optional[int]:
+        try:
+            # the metadata file is replaced last by _save
+            return os.stat(self.metadata_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _init_connection(self):
+        try:
+            mtime = self._files_mtime()
+            index = self._load_index()
+            records = []
+            if self.metadata_path.exists():
+                with open(self.metadata_path, encoding="utf-8") as file:
+                    records = [json.loads(line) for line in file if line.strip()]
+            if len(records) != len(index):
+                raise ValueError(
+                    f"Local index '{self.index_name}' is corrupt: "
+                    f"{len(index)} vectors but {len(records)} metadata records"
+                )
+            self.index, self.records, self._loaded_mtime = index, records, mtime
+            self.row_of = {record["id"]: row for row, record in enumerate(self.records)}
+            logger.info(f"Loaded local index '{self.index_name}' with {len(self.records)} vectors")
+        except Exception as e:
+            raise AppException(e)
+
+    def _index_params(self):
+        return {
+            "nlist": self.local_config.nlist,
+            "nprobe": self.local_config.nprobe,
+            "train_iterations": self.local_config.train_iterations,
+        }
+
+    def _new_index(self):
+        if self.local_config.index_type == "ivf":
+            return IVFIndex(self.dimension, **self._index_params())
+        return FlatIndex(self.dimension)
+
+    def _load_index(self):
+        if self.local_config.index_type == "ivf":
+            return IVFIndex.load(self.vectors_path, self.dimension, **self._index_params())
+        if sidecar_path(self.vectors_path, "rows").exists():
+            raise ValueError(
+                f"Local index '{self.index_name}' was built as an IVF index; "
+                "set INDEX_TYPE: ivf or rebuild it with create_vector_store()"
+            )
+        return FlatIndex.load(self.vectors_path, self.dimension)
+
+    @staticmethod
+    def _content_id(doc: Document) -> str:
+        content = f"{doc.metadata.get('source')}|{doc.page_content}"
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
@@ -0,0 +1,101 @@
+from pathlib import Path
+from typing import Tuple
+import os
+import numpy as np
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """
+    L2-normalizes each row so that dot products are cosine similarities.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise top-k of a (queries x candidates) score matrix, best first.
+
+    Uses argpartition so the cost is linear in the number of candidates.
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.float32), empty.astype(np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part_scores, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+class FlatIndex:
+    """
+    Exact cosine-similarity index over a contiguous float32 matrix.
+
+    Rows are stored L2-normalized, so a search for a batch of queries is a
+    single matrix product followed by an argpartition. The matrix is
+    persisted as a plain `.npy` file and memory-mapped on load, so a worker
+    starts without reading the whole file into memory.
+    """
+
+    def __init__(self, dimension: int, vectors=None):
+        self.dimension = dimension
+        if vectors is None:
+            vectors = np.empty((0, dimension), dtype=np.float32)
+        self.vectors = vectors
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._pending:
+            # appends are joined on first use, so a run of add() calls copies the matrix once
+            self._vectors = np.concatenate([np.asarray(self._vectors), *self._pending])
+            self._pending = []
+        return self._vectors
+
+    @vectors.setter
+    def vectors(self, vectors) -> None:
+        self._vectors = vectors
+        self._pending = []
+
+    def __len__(self) -> int:
+        return self._vectors.shape[0] + sum(batch.shape[0] for batch in self._pending)
+
+    def add(self, vectors) -> None:
+        vectors = normalize_rows(vectors)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dim vectors, got {vectors.shape[1]}")
+        self._pending.append(vectors)
+
+    def remove(self, rows) -> None:
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(list(rows), dtype=np.int64)] = False
+        self.vectors = np.asarray(self.vectors)[keep]
+
+    def search(self, queries, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows for each query.
+
+        Returns:
+            (scores, rows): two (n_queries x k) arrays, best match first.
+        """
+        queries = normalize_rows(queries)
+        scores = queries @ self.vectors.T
+        return top_k(scores, k)
+
+    def save(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp.npy")
+        np.save(tmp_path, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        os.replace(tmp_path, path)
+        # Re-map from the file that now holds the data
+        self.vectors = np.load(path, mmap_mode="r")
+
+    @classmethod
+    def load(cls, path, dimension: int) -> "FlatIndex":
+        path = Path(path)
+        if not path.exists():
+            return cls(dimension)
+        return cls(dimension, np.load(path, mmap_mode="r"))
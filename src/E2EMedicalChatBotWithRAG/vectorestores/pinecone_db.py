@@ -1,13 +1,14 @@
 from E2EMedicalChatBotWithRAG.logger import logger
-from E2EMedicalChatBotWithRAG.utils import load_env_variable
+from E2EMedicalChatBotWithRAG.utils import load_env_variable, IndexGeneration
 from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
 from E2EMedicalChatBotWithRAG.exceptions import AppException
 from E2EMedicalChatBotWithRAG.models.embedding_model import EmbeddingModel
+from E2EMedicalChatBotWithRAG.models.embedding_batcher import PrecomputedEmbeddings
 from pinecone import Pinecone
 from pinecone import ServerlessSpec
 from langchain_pinecone import PineconeVectorStore
 
-pinecone_api_key = load_env_variable("PINECONE_API_KEY")
+DELETE_BATCH_SIZE = 1000  # Pinecone's limit on ids per delete request
 
 class PineconeDB(EmbeddingModel):
     """ 
@@ -83,6 +84,7 @@ class PineconeDB(EmbeddingModel):
                 embedding=embedding_model,  # the embedding model to use for creating the vector store
                 index_name=self.index_name,  # the name of the index to use for the vector store
             )
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
             retriever = doc_vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
         except Exception as e:
             # if there is an error during the creation of the vector store, raise an AppException
@@ -104,11 +106,42 @@ class PineconeDB(EmbeddingModel):
         """
         try:
             doc_vector_store.add_documents(documents=[new_doc])
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
         except Exception as e:
             raise AppException(e)
         
         logger.info(f"Added new document to Pinecone vector store")
 
+    def upsert_documents(self, docs, ids, embeddings=None):
+        """
+        Writes documents under the given ids, overwriting existing vectors.
+
+        Args:
+            docs (List[Document]): Documents to write.
+            ids (List[str]): One id per document.
+            embeddings (List[List[float]], optional): Precomputed vectors, one per document.
+        """
+        try:
+            self._create_index()
+            embedding = self.embedding_model if embeddings is None else PrecomputedEmbeddings(embeddings, self.embedding_model)
+            vector_store = PineconeVectorStore(index=self.get_index(), embedding=embedding)
+            vector_store.add_documents(docs, ids=ids)
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
+        except Exception as e:
+            raise AppException(e)
+
+    def delete_documents(self, ids):
+        """
+        Deletes the vectors with the given ids from the Pinecone index.
+        """
+        try:
+            index = self.get_index()
+            for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                index.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
+        except Exception as e:
+            raise AppException(e)
+
     def get_index(self):
         index = self.pinecone_client.Index(self.index_name)
         return index
@@ -117,6 +150,7 @@ class PineconeDB(EmbeddingModel):
 
     def _init_connection(self):
         try:
+            pinecone_api_key = load_env_variable("PINECONE_API_KEY")
             self.pinecone_client = Pinecone(api_key=pinecone_api_key)
         except Exception as e:
             raise AppException(e)
@@ -2,6 +2,9 @@ from E2EMedicalChatBotWithRAG.logger import logger
 from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
 from E2EMedicalChatBotWithRAG.exceptions import AppException
 from E2EMedicalChatBotWithRAG.models.embedding_model import EmbeddingModel
+from E2EMedicalChatBotWithRAG.utils import IndexGeneration
+from E2EMedicalChatBotWithRAG.models.embedding_batcher import PrecomputedEmbeddings
+from E2EMedicalChatBotWithRAG.retrievers import RedisAsyncRetriever
 from langchain_redis import RedisVectorStore
 
 
@@ -25,7 +28,7 @@ class RedisDB(EmbeddingModel):
             logger.error(f"Error in ConfigurationManager: {e}")
             raise AppException(e) from e
         
-    def get_retriever(self):
+    def get_retriever(self,k=3):
         """
         Load a retriever for similarity search on an existing Redis index.
 
@@ -34,7 +37,7 @@ class RedisDB(EmbeddingModel):
 
         Returns:
             langchain.vectorstores.base.VectorStoreRetriever:
-                Retriever configured for cosine similarity with k=3.
+                Retriever configured for cosine similarity with the given k.
 
         Raises:
             AppException: If the index does not exist or cannot be loaded.
@@ -45,9 +48,9 @@ class RedisDB(EmbeddingModel):
                 index_name=self.index_name,
                 redis_url=self.redis_url
             )
-            retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+            retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": k})
             sample_data = retriever.invoke("what is acne?")
-            if len(sample_data) < 3:
+            if len(sample_data) < k:
                 logger.warning(f"Index {self.index_name} is empty or does not exist.")
                 
         except Exception as e:
@@ -55,6 +58,36 @@ class RedisDB(EmbeddingModel):
         else:
             return retriever
 
+    @staticmethod
+    def get_async_retriever(embedding_model, k=3, config=ConfigurationManager()):
+        """
+        Load a retriever on the existing Redis index that embeds queries with
+        `embedding_model` (the serving model, e.g. the remote endpoint) and
+        searches by vector. No RedisDB is built, so the local embedding model
+        is not loaded. Connecting is a blocking call.
+
+        Returns:
+            RedisAsyncRetriever: The retriever.
+
+        Raises:
+            AppException: If the index does not exist or cannot be loaded.
+        """
+        try:
+            chatbot_config = config.get_chatbot_config()
+            # the store never embeds: document vectors are already in Redis, queries come as vectors,
+            # and the dimension is given so it does not embed a sample text to find it
+            vector_store = RedisVectorStore.from_existing_index(
+                embedding=PrecomputedEmbeddings([]),
+                index_name=chatbot_config.index_name,
+                redis_url=chatbot_config.redis_url,
+                embedding_dimensions=chatbot_config.dimension
+            )
+            retriever = RedisAsyncRetriever(store=vector_store, embedding_model=embedding_model, k=k)
+        except Exception as e:
+            raise AppException(e)
+        else:
+            return retriever
+
 
     def create_vector_store(self,chunked_text):
         """
@@ -80,6 +113,7 @@ class RedisDB(EmbeddingModel):
                 index_name=self.index_name,  # the name of the index to use for the vector store
                 redis_url=self.redis_url
             )
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
             logger.info("Your data has been stored in the vectore store")
         except Exception as e:
             # if there is an error during the creation of the vector store, raise an AppException
@@ -105,12 +139,45 @@ class RedisDB(EmbeddingModel):
                 redis_url=self.redis_url
             )
             vector_store.add_documents(documents=[new_doc])
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
             logger.info("Data stored successfully ")
         except Exception as e:
             raise AppException(e)
         
         logger.info(f"Added new document to redis vector store")
 
+    def upsert_documents(self, docs, ids, embeddings=None):
+        """
+        Writes documents under the given ids, overwriting existing keys.
+
+        Args:
+            docs (List[Document]): Documents to write.
+            ids (List[str]): One id per document.
+            embeddings (List[List[float]], optional): Precomputed vectors, one per document.
+        """
+        try:
+            if embeddings is None:
+                self.redis_client.add_documents(docs, ids=ids)
+            else:
+                vector_store = RedisVectorStore(
+                    index_name=self.index_name,
+                    redis_url=self.redis_url,
+                    embeddings=PrecomputedEmbeddings(embeddings, self.embedding_model)
+                )
+                vector_store.add_documents(docs, ids=ids)
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
+        except Exception as e:
+            raise AppException(e)
+
+    def delete_documents(self, ids):
+        """
+        Deletes the documents with the given ids from the redis vector store.
+        """
+        try:
+            self.redis_client.delete(ids=ids)
+            IndexGeneration(self.config.index_generation_path).bump(self.index_name)
+        except Exception as e:
+            raise AppException(e)
 
 
 
@@ -0,0 +1,71 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT)]
+# the configuration manager reads these at import time; no test talks to either service
+os.environ.setdefault("PINECONE_API_KEY", "test")
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+
+class _HashedEmbeddings:
+    """Deterministic stand-in for the local embedding model."""
+
+    def embed_documents(self, texts):
+        from E2EMedicalChatBotWithRAG.fakes import hashed_embedding
+        return [hashed_embedding(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    """Opens LocalVectorDB instances, as separate processes would, on one index under tmp_path."""
+    from dataclasses import replace
+    from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+    from E2EMedicalChatBotWithRAG.models.embedding_model import EmbeddingModel
+    from E2EMedicalChatBotWithRAG.vectorestores.local_db import LocalVectorDB
+
+    get_chatbot_config = ConfigurationManager.get_chatbot_config
+    get_local_config = ConfigurationManager.get_local_vector_store_config
+    monkeypatch.setattr(ConfigurationManager, "get_chatbot_config", lambda self: replace(
+        get_chatbot_config(self), index_generation_path=str(tmp_path / "generations.json")))
+    monkeypatch.setattr(ConfigurationManager, "get_local_vector_store_config", lambda self: replace(
+        get_local_config(self), path=str(tmp_path / "local_index")))
+    monkeypatch.setattr(EmbeddingModel, "_get_model", lambda self: _HashedEmbeddings())
+    return lambda: LocalVectorDB(config=ConfigurationManager())
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    A DATA_PATH of text files named *.pdf, "parsed" into one page each, with
+    the manifest and BM25 index of ingestion kept under tmp_path.
+    """
+    from dataclasses import replace
+    from langchain.schema import Document
+    from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+    from E2EMedicalChatBotWithRAG.preprocess.document_preprocesser import DocumentPreprocesser
+
+    get_ingestion_config = ConfigurationManager.get_ingestion_config
+    get_hybrid_config = ConfigurationManager.get_hybrid_retrieval_config
+    monkeypatch.setattr(ConfigurationManager, "get_ingestion_config", lambda self: replace(
+        get_ingestion_config(self), manifest_path=str(tmp_path / "manifest.json")))
+    monkeypatch.setattr(ConfigurationManager, "get_hybrid_retrieval_config", lambda self: replace(
+        get_hybrid_config(self), lexical_index_path=str(tmp_path / "bm25" / "index")))
+
+    def iter_load_files(self, files):
+        for file in files:
+            yield file, [Document(page_content=Path(file).read_text(), metadata={"source": file, "page": 0})]
+
+    monkeypatch.setattr(DocumentPreprocesser, "iter_load_files", iter_load_files)
+    path = tmp_path / "data"
+    path.mkdir()
+    return path
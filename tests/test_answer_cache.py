@@ -0,0 +1,119 @@
+import asyncio
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_core.messages import AIMessageChunk
+
+from E2EMedicalChatBotWithRAG.chains.answer_cache import SemanticAnswerCache
+from E2EMedicalChatBotWithRAG.chains.rag_chain import RAGChain
+from E2EMedicalChatBotWithRAG.exceptions import AppException
+from E2EMedicalChatBotWithRAG.fakes import FakeStreamingLLM, InMemoryVectorStore, hashed_embedding
+
+
+def _unit(*values):
+    vector = np.zeros(8, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector / np.linalg.norm(vector)
+
+
+def test_lookup_hits_only_above_the_threshold_and_for_the_same_context():
+    cache = SemanticAnswerCache(dimension=8, capacity=4, threshold=0.95)
+    cache.store(_unit(1.0, 0.0), ("doc-1",), ["Acne ", "is ", "common."])
+
+    assert cache.lookup(_unit(1.0, 0.1), ("doc-1",)) == ["Acne ", "is ", "common."]  # cosine 0.995
+    assert cache.lookup(_unit(1.0, 0.5), ("doc-1",)) is None  # cosine 0.894
+    assert cache.lookup(_unit(1.0, 0.0), ("doc-2",)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_a_new_index_generation_drops_every_entry():
+    cache = SemanticAnswerCache(dimension=8, capacity=4)
+    cache.check_generation(3)
+    cache.store(_unit(1.0), ("doc-1",), ["cached"])
+    cache.check_generation(3)
+    assert cache.lookup(_unit(1.0), ("doc-1",)) == ["cached"]
+
+    cache.check_generation(4)
+
+    assert cache.lookup(_unit(1.0), ("doc-1",)) is None
+    assert cache.stats()["size"] == 0
+    assert cache.invalidations == 1
+
+
+class _ScriptedLLM:
+    """Streams `tokens`, raising `error` after them if given, and counts calls."""
+
+    def __init__(self, tokens, error=None):
+        self.tokens = tokens
+        self.error = error
+        self.calls = 0
+
+    async def astream(self, prompt_value):
+        self.calls += 1
+        for token in self.tokens:
+            yield AIMessageChunk(content=token)
+        if self.error is not None:
+            raise self.error
+
+
+class _Embeddings:
+    def embed_query(self, text):
+        return hashed_embedding(text)
+
+    async def aembed_query(self, text):
+        return hashed_embedding(text)
+
+
+@pytest.fixture
+def chain():
+    store = InMemoryVectorStore(_Embeddings())
+    store.add_texts(["acne is a skin condition", "eczema makes the skin itchy"])
+    chain = asyncio.run(RAGChain.make_async(client=None, llm=FakeStreamingLLM(), vector_store=store))
+    assert chain.answer_cache is not None
+    return chain
+
+
+def _answer(chain, question, context, stop_after=None):
+    async def run():
+        tokens = []
+        stream = chain.agenerate(question, context, query_vector=hashed_embedding(question))
+        async for token in stream:
+            tokens.append(token)
+            if len(tokens) == stop_after:
+                await stream.aclose()
+                break
+        return tokens
+    return asyncio.run(run())
+
+
+CONTEXT = [Document(id="doc-1", page_content="acne is a skin condition", metadata={"source": "book"})]
+
+
+def test_cached_answer_is_replayed_in_order_without_the_llm(chain):
+    chain.allm = _ScriptedLLM(["Acne ", "is ", "a ", "skin ", "condition."])
+
+    first = _answer(chain, "what is acne?", CONTEXT)
+    second = _answer(chain, "what is acne?", CONTEXT)
+
+    assert first == second == ["Acne ", "is ", "a ", "skin ", "condition."]
+    assert chain.allm.calls == 1
+
+
+def test_failed_answer_is_not_cached(chain):
+    chain.allm = _ScriptedLLM(["Acne ", "is "], error=RuntimeError("connection reset"))
+    with pytest.raises(AppException):
+        _answer(chain, "what is acne?", CONTEXT)
+
+    chain.allm = _ScriptedLLM(["Acne ", "is ", "common."])
+    assert _answer(chain, "what is acne?", CONTEXT) == ["Acne ", "is ", "common."]
+    assert chain.allm.calls == 1
+
+
+def test_abandoned_answer_is_not_cached(chain):
+    chain.allm = _ScriptedLLM(["Acne ", "is ", "common."])
+    assert _answer(chain, "what is acne?", CONTEXT, stop_after=1) == ["Acne "]
+
+    assert _answer(chain, "what is acne?", CONTEXT) == ["Acne ", "is ", "common."]
+    assert chain.allm.calls == 2
+    assert chain.answer_cache.stats()["size"] == 1
@@ -0,0 +1,119 @@
+import asyncio
+import math
+import os
+
+import pytest
+from langchain.schema import Document
+
+from E2EMedicalChatBotWithRAG.retrievers import BM25Index, HybridRetriever
+from E2EMedicalChatBotWithRAG.retrievers.bm25_index import tokenize
+from E2EMedicalChatBotWithRAG.retrievers.hybrid_retriever import fusion_key, reciprocal_rank_fusion
+
+TEXTS = {
+    "a": "Co-amoxiclav treats bacterial infections of the skin.",
+    "b": "Amoxiclav dose for children depends on weight; amoxiclav is taken twice daily.",
+    "c": "Eczema makes the skin red and itchy.",
+    "d": "Acne forms when skin pores are plugged with oil.",
+}
+
+
+def _chunks(source, ids):
+    return [Document(id=i, page_content=TEXTS[i], metadata={"source": source}) for i in ids]
+
+
+def _index():
+    index = BM25Index(k1=1.2, b=0.75)
+    index.replace_source("one.pdf", _chunks("one.pdf", "ab"))
+    index.replace_source("two.pdf", _chunks("two.pdf", "cd"))
+    return index
+
+
+def _reference_scores(query, k1=1.2, b=0.75):
+    docs = {i: tokenize(text) for i, text in TEXTS.items()}
+    avgdl = sum(map(len, docs.values())) / len(docs)
+    scores = {}
+    for doc_id, terms in docs.items():
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in docs.values())
+            tf = terms.count(term)
+            if tf:
+                idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(terms) / avgdl))
+        if score:
+            scores[doc_id] = score
+    return scores
+
+
+@pytest.mark.parametrize("query", ["amoxiclav dose", "co-amoxiclav", "itchy skin"])
+def test_scores_follow_the_bm25_formula(query):
+    results = _index().search(query, k=4)
+    expected = _reference_scores(query)
+
+    assert [doc.id for doc, _ in results] == sorted(expected, key=expected.get, reverse=True)
+    for doc, score in results:
+        assert score == pytest.approx(expected[doc.id], rel=1e-5)
+
+
+def test_compound_terms_match_their_parts_and_rank_the_exact_term_first():
+    results = _index().search("co-amoxiclav", k=2)
+    assert [doc.id for doc, _ in results] == ["a", "b"]
+
+
+def test_save_load_round_trip_and_edits_after_load(tmp_path):
+    index = _index()
+    index.save(tmp_path / "bm25")
+
+    loaded = BM25Index.load(tmp_path / "bm25")
+
+    assert loaded.search("skin", k=4) == index.search("skin", k=4)
+    assert loaded.sources == {"one.pdf": None, "two.pdf": None}
+    loaded.remove_source("two.pdf")
+    loaded.replace_source("one.pdf", _chunks("one.pdf", "a"), sha256="abc")
+    assert [doc.id for doc, _ in loaded.search("skin amoxiclav", k=4)] == ["a"]
+    assert loaded.source_hash("one.pdf") == "abc"
+
+
+def _doc(text, doc_id=None, source="one.pdf"):
+    return Document(id=doc_id, page_content=text, metadata={"source": source})
+
+
+def test_rrf_merges_the_same_chunk_from_both_rankings():
+    shared_dense = _doc("acne forms in pores", doc_id="random-uuid")
+    shared_lexical = _doc("acne forms in pores", doc_id="deterministic-id")
+    dense_only, lexical_only = _doc("eczema is itchy"), _doc("co-amoxiclav dose")
+
+    fused = reciprocal_rank_fusion([[dense_only, shared_dense], [shared_lexical, lexical_only]], k=3, rrf_k=60)
+
+    assert fusion_key(shared_dense) == fusion_key(shared_lexical)
+    assert [doc.page_content for doc in fused] == ["acne forms in pores", "eczema is itchy", "co-amoxiclav dose"]
+    assert fused[0].id == "random-uuid"
+    assert fused[0].metadata["rrf_score"] == pytest.approx(1 / 62 + 1 / 61)
+    assert reciprocal_rank_fusion([[dense_only], [lexical_only]], k=1)[0].page_content == "eczema is itchy"
+
+
+class _NoDense:
+    tags = None
+
+    def invoke(self, query):
+        return []
+
+    async def ainvoke(self, query):
+        return []
+
+
+def test_hybrid_retriever_reloads_an_index_rewritten_after_it_started(tmp_path):
+    path = tmp_path / "bm25"
+    _index().save(path)
+    retriever = HybridRetriever(dense_retriever=_NoDense(), lexical_index=BM25Index.load(path),
+                                k=2, index_path=str(path))
+    assert asyncio.run(retriever.ainvoke("psoriasis")) == []
+
+    rewritten = _index()
+    rewritten.replace_source("three.pdf", [_doc("Psoriasis causes scaly patches.", "e", "three.pdf")])
+    rewritten.save(path)
+    docs_path = path.with_name("bm25.json")
+    stat = os.stat(docs_path)
+    os.utime(docs_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # coarse clocks
+
+    assert [doc.id for doc in asyncio.run(retriever.ainvoke("psoriasis"))] == ["e"]
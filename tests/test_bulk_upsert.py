@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+from langchain.schema import Document
+
+from E2EMedicalChatBotWithRAG.vectorestores.bulk_upsert import PineconeBulkUpserter
+
+
+class _Embeddings:
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class _StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class _FakeIndex:
+    """IndexAsyncio stand-in recording requests and the peak number in flight."""
+
+    def __init__(self, failures=None, latency=0.01):
+        self.failures = failures or {}  # id -> statuses raised, one per attempt, for requests holding it
+        self.latency = latency
+        self.requests = []
+        self.stored = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def upsert(self, vectors):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            for record in vectors:
+                statuses = self.failures.get(record["id"])
+                if statuses:
+                    raise _StatusError(statuses.pop(0))
+            self.requests.append([record["id"] for record in vectors])
+            self.stored.update((record["id"], record) for record in vectors)
+        finally:
+            self.in_flight -= 1
+
+
+def _docs(n):
+    return [Document(id=f"doc-{i}", page_content=f"chunk {i}", metadata={"source": "book.pdf", "page": None})
+            for i in range(n)]
+
+
+def _upserter(index, **kwargs):
+    params = dict(embed_batch_size=20, upsert_batch_size=7, max_in_flight=3, backoff_base=0.001, backoff_max=0.01)
+    return PineconeBulkUpserter(index, _Embeddings(), **{**params, **kwargs})
+
+
+def test_requests_are_cut_to_size_and_capped_in_flight():
+    index = _FakeIndex()
+
+    upserted = asyncio.run(_upserter(index).upsert(_docs(50)))
+
+    assert upserted == 50
+    assert sorted(len(request) for request in index.requests) == sorted([7, 7, 6, 7, 7, 6, 7, 3])
+    assert index.peak_in_flight == 3
+    assert index.stored["doc-3"]["metadata"] == {"source": "book.pdf", "text": "chunk 3"}
+
+
+def test_payload_limit_splits_requests():
+    index = _FakeIndex()
+    record_bytes = 2 * 12 + len(json.dumps({"source": "book.pdf", "text": "chunk 0"})) + len("doc-0") + 64
+
+    asyncio.run(_upserter(index, max_payload_bytes=3 * record_bytes).upsert(_docs(9)))
+
+    assert [len(request) for request in index.requests] == [3, 3, 3]
+
+
+def test_throttled_requests_are_retried():
+    index = _FakeIndex(failures={"doc-2": [429, 503]})
+    upserter = _upserter(index)
+
+    assert asyncio.run(upserter.upsert(_docs(10))) == 10
+    assert upserter.retries == 2
+    assert len(index.stored) == 10
+
+
+def test_a_failed_request_fails_the_load_and_resumes_from_the_checkpoint(tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    docs = _docs(60)
+    index = _FakeIndex(failures={"doc-45": [400]})
+
+    upserter = _upserter(index, max_in_flight=1, checkpoint_path=str(checkpoint))
+    with pytest.raises(_StatusError):
+        asyncio.run(upserter.upsert(docs))
+
+    assert upserter.vectors_upserted == 40
+    assert json.loads(checkpoint.read_text())["done"] == [0, 1]
+    assert "doc-45" not in index.stored
+
+    retry = _FakeIndex()
+    assert asyncio.run(_upserter(retry, checkpoint_path=str(checkpoint)).upsert(docs)) == 20
+    assert sorted(retry.stored) == sorted(f"doc-{i}" for i in range(40, 60))
+    assert not checkpoint.exists()
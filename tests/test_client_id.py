@@ -0,0 +1,49 @@
+import ipaddress
+
+import pytest
+from starlette.requests import HTTPConnection
+
+from app.routers import chatbot
+
+
+def _connection(peer, forwarded_for=None):
+    headers = [] if forwarded_for is None else [(b"x-forwarded-for", forwarded_for.encode())]
+    return HTTPConnection({"type": "http", "client": (peer, 40000), "headers": headers})
+
+
+@pytest.fixture
+def proxies(monkeypatch):
+    def configure(*networks, any_peer=False):
+        monkeypatch.setattr(chatbot, "trusted_proxies", [ipaddress.ip_network(n) for n in networks])
+        monkeypatch.setattr(chatbot, "trust_any_proxy", any_peer)
+    return configure
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(proxies):
+    proxies()
+    assert chatbot._client_id(_connection("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+
+
+def test_client_behind_a_chain_of_trusted_proxies(proxies):
+    proxies("10.0.0.0/8")
+    connection = _connection("10.0.0.1", "198.51.100.1, 10.0.0.2")
+    assert chatbot._client_id(connection) == "198.51.100.1"
+
+
+def test_spoofed_hops_left_of_the_client_are_not_believed(proxies):
+    proxies("10.0.0.0/8")
+    # the client sent "1.2.3.4, 10.9.9.9" itself; the proxy appended its address
+    connection = _connection("10.0.0.1", "1.2.3.4, 10.9.9.9, 198.51.100.1")
+    assert chatbot._client_id(connection) == "198.51.100.1"
+
+
+def test_any_peer_trusts_only_the_hop_it_appended(proxies):
+    proxies(any_peer=True)
+    connection = _connection("172.16.5.5", "1.2.3.4, 198.51.100.1")
+    assert chatbot._client_id(connection) == "198.51.100.1"
+
+
+def test_client_inside_the_trusted_network(proxies):
+    proxies("10.0.0.0/8")
+    assert chatbot._client_id(_connection("10.0.0.1", "10.0.0.9")) == "10.0.0.9"
+    assert chatbot._client_id(_connection("10.0.0.1")) == "10.0.0.1"
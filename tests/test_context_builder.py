@@ -0,0 +1,26 @@
+from langchain.schema import Document
+
+from E2EMedicalChatBotWithRAG.chains.context_builder import ContextBuilder
+
+
+def _doc(doc_id, text, source):
+    return Document(id=doc_id, page_content=text, metadata={"source": source})
+
+
+def test_bridged_chunks_keep_the_best_rank():
+    a = "Acne is a skin condition that occurs when hair follicles become plugged with oil and dead skin cells."
+    b = "plugged with oil and dead skin cells. It often causes whiteheads, blackheads or pimples on the face"
+    c = "whiteheads, blackheads or pimples on the face and is most common among teenagers of all skin types."
+    other = "Eczema is a condition that makes the skin red and itchy, and it is common in children everywhere."
+    documents = [
+        _doc("a", a, "book-1"),        # rank 0
+        _doc("x", other, "book-2"),    # rank 1
+        _doc("c", c, "book-1"),        # rank 2, does not overlap A on its own
+        _doc("b", b, "book-1"),        # rank 3, bridges A and C
+    ]
+
+    passages = ContextBuilder(mmr_lambda=1.0)._merge(documents)
+
+    assert [p.id for p in passages] == ["a", "x"]
+    assert passages[0].page_content.startswith("Acne is")
+    assert passages[0].page_content.endswith("all skin types.")
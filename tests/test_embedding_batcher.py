@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from E2EMedicalChatBotWithRAG.models.embedding_batcher import BatchedEmbeddings, EmbeddingBatcher
+
+
+class _RecordingEmbedder:
+    """Embeds each text as [len(text)] and records the batches it was called with."""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+def test_concurrent_queries_share_one_call():
+    class _Model:
+        def __init__(self):
+            self.calls = []
+
+        def embed_documents(self, texts):
+            self.calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+    model = _Model()
+    embeddings = BatchedEmbeddings(model, max_batch_size=32, max_wait_ms=20)
+    texts = ["a" * n for n in range(1, 11)]
+
+    async def run():
+        vectors = await asyncio.gather(*(embeddings.aembed_query(text) for text in texts))
+        await embeddings.batcher.close()
+        return vectors
+
+    vectors = asyncio.run(run())
+    assert model.calls == [texts]
+    assert vectors == [[float(n)] for n in range(1, 11)]
+
+
+def test_batches_are_split_at_the_maximum_size():
+    embed = _RecordingEmbedder()
+    batcher = EmbeddingBatcher(embed, max_batch_size=4, max_wait_ms=20)
+
+    async def run():
+        vectors = await asyncio.gather(*(batcher.embed(f"q{i}") for i in range(10)))
+        await batcher.close()
+        return vectors
+
+    vectors = asyncio.run(run())
+    assert [len(batch) for batch in embed.batches] == [4, 4, 2]
+    assert [text for batch in embed.batches for text in batch] == [f"q{i}" for i in range(10)]
+    assert vectors == [[2.0]] * 10
+    assert batcher.stats()["max_batch_size"] == 4
+
+
+def test_a_lone_query_is_flushed_after_the_maximum_wait():
+    embed = _RecordingEmbedder()
+    batcher = EmbeddingBatcher(embed, max_batch_size=32, max_wait_ms=50)
+
+    async def run():
+        started = time.perf_counter()
+        first = await batcher.embed("alone")
+        waited = time.perf_counter() - started
+        second = await batcher.embed("later")
+        await batcher.close()
+        return first, second, waited
+
+    first, second, waited = asyncio.run(run())
+    assert (first, second) == ([5.0], [5.0])
+    assert 0.04 <= waited < 1.0
+    assert embed.batches == [["alone"], ["later"]]
+
+
+def test_a_failed_batch_fails_every_waiter():
+    embed = _RecordingEmbedder(error=RuntimeError("endpoint returned 503"))
+    batcher = EmbeddingBatcher(embed, max_batch_size=32, max_wait_ms=20)
+
+    async def run():
+        results = await asyncio.gather(*(batcher.embed(f"q{i}") for i in range(5)), return_exceptions=True)
+        embed.error = None
+        after = await batcher.embed("retry")
+        await batcher.close()
+        return results, after
+
+    results, after = asyncio.run(run())
+    assert len(embed.batches[0]) == 5
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len({id(result) for result in results}) == 1
+    assert after == [5.0]
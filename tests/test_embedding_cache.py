@@ -0,0 +1,80 @@
+import asyncio
+
+from E2EMedicalChatBotWithRAG.models.embedding_cache import EmbeddingCache
+from E2EMedicalChatBotWithRAG.utils import REGISTRY
+
+
+class _FakeRedis:
+    def __init__(self, fail=False):
+        self.data = {}
+        self.fail = fail
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis is down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def _cache(redis=None):
+    cache = EmbeddingCache("model", maxsize=8, redis_url=None if redis is None else "redis://fake")
+    cache._redis = redis
+    return cache
+
+
+def _lookups():
+    counts = {}
+    for line in REGISTRY.render().splitlines():
+        if line.startswith("medchat_embedding_cache_lookups_total{"):
+            labels, value = line.rsplit(" ", 1)
+            counts[labels.split("{", 1)[1].rstrip("}")] = float(value)
+    return counts
+
+
+def _delta(before, after):
+    return {labels: after[labels] - before.get(labels, 0) for labels in after if after[labels] != before.get(labels, 0)}
+
+
+def test_a_redis_hit_after_a_local_miss_counts_as_a_hit():
+    redis = _FakeRedis()
+    writer, reader = _cache(redis), _cache(redis)  # two workers sharing Redis
+    asyncio.run(writer.aset("What is acne?", [1.0, 0.0]))
+    before = _lookups()
+
+    async def lookups():
+        return [await reader.aget("what is acne"), await reader.aget("what is acne"), await reader.aget("eczema")]
+
+    assert asyncio.run(lookups()) == [[1.0, 0.0], [1.0, 0.0], None]
+    stats = reader.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert (stats["local_hits"], stats["local_misses"]) == (1, 2)
+    assert (stats["redis_hits"], stats["redis_misses"], stats["redis_errors"]) == (1, 1, 0)
+    assert _delta(before, _lookups()) == {
+        'tier="local",outcome="hit"': 1,
+        'tier="local",outcome="miss"': 2,
+        'tier="redis",outcome="hit"': 1,
+        'tier="redis",outcome="miss"': 1,
+    }
+
+
+def test_redis_errors_are_misses():
+    cache = _cache(_FakeRedis(fail=True))
+
+    assert asyncio.run(cache.aget("what is acne")) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["redis_errors"]) == (0, 1, 1)
+
+
+def test_without_redis_only_the_local_tier_is_counted():
+    cache = _cache()
+    cache.set("what is acne", [0.5])
+    before = _lookups()
+
+    assert cache.get("What is acne?") == [0.5]
+    assert asyncio.run(cache.aget("eczema")) is None
+
+    assert cache.stats()["hit_rate"] == 0.5
+    assert _delta(before, _lookups()) == {'tier="local",outcome="hit"': 1, 'tier="local",outcome="miss"': 1}
@@ -0,0 +1,44 @@
+import asyncio
+from dataclasses import replace
+
+import langchain_redis.vectorstores
+
+from E2EMedicalChatBotWithRAG.chains.rag_chain import RAGChain
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.fakes import FakeStreamingLLM, InMemoryVectorStore, hashed_embedding
+from E2EMedicalChatBotWithRAG.retrievers import HedgedRetriever, RedisAsyncRetriever
+
+
+class _Embeddings:
+    def embed_query(self, text):
+        return hashed_embedding(text)
+
+    async def aembed_query(self, text):
+        return hashed_embedding(text)
+
+
+class _SearchIndex:
+    """Stands in for the redisvl index, so no Redis server is contacted."""
+
+    @classmethod
+    def from_existing(cls, name, redis_client=None, **kwargs):
+        return cls()
+
+    def create(self, overwrite=False):
+        pass
+
+
+def test_hedged_chain_hedges_to_the_redis_index(monkeypatch):
+    get_hedged_config = ConfigurationManager.get_hedged_retrieval_config
+    monkeypatch.setattr(ConfigurationManager, "get_hedged_retrieval_config",
+                        lambda self: replace(get_hedged_config(self), enabled=True, secondary="redis"))
+    monkeypatch.setattr(langchain_redis.vectorstores, "SearchIndex", _SearchIndex)
+    embeddings = _Embeddings()
+    store = InMemoryVectorStore(embeddings)
+    store.add_texts(["acne is a skin condition", "eczema makes the skin itchy"])
+
+    chain = asyncio.run(RAGChain.make_async(client=None, llm=FakeStreamingLLM(), vector_store=store))
+
+    assert isinstance(chain.hedged_retriever, HedgedRetriever)
+    assert isinstance(chain.hedged_retriever._secondary, RedisAsyncRetriever)
+    assert chain.hedged_retriever._secondary.embedding_model is embeddings
@@ -0,0 +1,75 @@
+from langchain.schema import Document
+
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.preprocess.incremental import IncrementalIngestion
+from E2EMedicalChatBotWithRAG.preprocess.manifest import assign_chunk_ids
+
+
+class _RecordingStore:
+    def __init__(self):
+        self.ids = set()
+
+    def upsert_documents(self, docs, ids):
+        self.ids.update(ids)
+
+    def delete_documents(self, ids):
+        self.ids.difference_update(ids)
+
+
+def _paragraph(topic, n):
+    # ~900 characters, so that the splitter keeps every paragraph as its own chunk
+    return f"{topic} section {n}. " + " ".join(f"{topic}-{n}-{i}" for i in range(100))[:880].strip()
+
+
+def _write(data_dir, name, *paragraphs):
+    (data_dir / f"{name}.pdf").write_text("\n\n".join(paragraphs))
+
+
+def _changes(data_dir):
+    ingestion = IncrementalIngestion(_RecordingStore(), config=ConfigurationManager())
+    return {change.source: change for change in ingestion.plan(str(data_dir))}
+
+
+def test_plan_upserts_and_deletes_only_what_changed(data_dir):
+    _write(data_dir, "acne", *(_paragraph("acne", n) for n in range(3)))
+    _write(data_dir, "eczema", *(_paragraph("eczema", n) for n in range(2)))
+    store = _RecordingStore()
+    first = IncrementalIngestion(store, config=ConfigurationManager()).run(str(data_dir))
+    assert first == {"files_changed": 2, "files_removed": 0, "chunks_upserted": 5, "chunks_deleted": 0}
+    before = set(store.ids)
+    assert _changes(data_dir) == {}
+
+    _write(data_dir, "acne", _paragraph("acne", 0), _paragraph("acne", 1), _paragraph("acne", 9))
+    (data_dir / "eczema.pdf").unlink()
+    _write(data_dir, "psoriasis", _paragraph("psoriasis", 0))
+    changes = _changes(data_dir)
+
+    acne, eczema, psoriasis = (changes[str(data_dir / f"{name}.pdf")] for name in ("acne", "eczema", "psoriasis"))
+    assert set(changes) == {acne.source, eczema.source, psoriasis.source}
+    assert [doc.page_content for doc in acne.upserts] == [_paragraph("acne", 9)]
+    assert len(acne.deletes) == 1 and acne.deletes[0] in before
+    assert set(acne.chunks) - {acne.upserts[0].id} <= before
+    assert eczema.sha256 is None and len(eczema.deletes) == 2
+    assert len(psoriasis.upserts) == 1 and not psoriasis.deletes
+
+    summary = IncrementalIngestion(store, config=ConfigurationManager()).run(str(data_dir))
+    assert summary == {"files_changed": 2, "files_removed": 1, "chunks_upserted": 2, "chunks_deleted": 3}
+    assert store.ids == set(acne.chunks) | set(psoriasis.chunks)
+    assert _changes(data_dir) == {}
+
+
+def _chunks(source, *texts):
+    return [Document(page_content=text, metadata={"source": source}) for text in texts]
+
+
+def test_chunk_ids_are_stable_and_unique():
+    first = assign_chunk_ids(_chunks("a.pdf", "intro", "dosage", "intro"))
+    again = assign_chunk_ids(_chunks("a.pdf", "intro", "dosage", "intro"))
+    edited = _chunks("a.pdf", "intro", "new dosage", "intro")
+    assign_chunk_ids(edited)
+
+    assert list(first) == list(again)
+    assert len(first) == 3  # the repeated chunk gets its own id
+    assert [doc.id for doc in edited][0::2] == list(first)[0::2]
+    assert edited[1].id not in first
+    assert not set(assign_chunk_ids(_chunks("b.pdf", "intro", "dosage"))) & set(first)
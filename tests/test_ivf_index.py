@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from E2EMedicalChatBotWithRAG.vectorestores.ivf_index import IVFIndex
+from E2EMedicalChatBotWithRAG.vectorestores.local_index import FlatIndex
+
+DIMENSION = 32
+NLIST = 16
+
+
+def _clustered(rng, n, centers):
+    labels = rng.integers(0, centers.shape[0], n)
+    return (centers[labels] + 0.3 * rng.standard_normal((n, DIMENSION))).astype(np.float32)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(7)
+    centers = rng.standard_normal((24, DIMENSION))
+    return _clustered(rng, 2000, centers), _clustered(rng, 50, centers)
+
+
+def _indexes(vectors):
+    ivf = IVFIndex(DIMENSION, nlist=NLIST, nprobe=4, min_points_per_list=20, seed=3)
+    flat = FlatIndex(DIMENSION)
+    for start in range(0, len(vectors), 250):  # trains part-way, then fills the pending buffer
+        ivf.add(vectors[start:start + 250])
+        flat.add(vectors[start:start + 250])
+    return ivf, flat
+
+
+def _recall(found, truth):
+    return np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+
+
+def test_approximate_top_k_matches_exact_search(data):
+    vectors, queries = data
+    ivf, flat = _indexes(vectors)
+    _, exact = flat.search(queries, 10)
+
+    assert ivf.is_trained
+    assert len(ivf) == len(flat) == 2000
+    assert _recall(ivf.search(queries, 10)[1], exact) >= 0.9
+    np.testing.assert_array_equal(ivf.search(queries, 10, nprobe=NLIST)[1], exact)
+
+
+def test_rows_stay_aligned_after_removal(data):
+    vectors, queries = data
+    ivf, flat = _indexes(vectors)
+    removed = np.random.default_rng(11).choice(len(vectors), 300, replace=False)
+
+    ivf.remove(removed)
+    flat.remove(removed)
+
+    assert len(ivf) == len(flat) == 1700
+    np.testing.assert_array_equal(ivf.search(queries, 10, nprobe=NLIST)[1], flat.search(queries, 10)[1])
+    kept = np.setdiff1d(np.arange(len(vectors)), removed)
+    for row in (0, 850, 1699):
+        _, found = ivf.search(vectors[kept[row]][None, :], 1, nprobe=NLIST)
+        assert found[0, 0] == row
+
+
+def test_save_and_load_round_trip(data, tmp_path):
+    vectors, queries = data
+    ivf, _ = _indexes(vectors)
+    ivf.remove([5, 6, 7])
+    before = ivf.search(queries, 10)
+
+    ivf.save(tmp_path / "index.npy")
+    loaded = IVFIndex.load(tmp_path / "index.npy", DIMENSION, nlist=NLIST, nprobe=4)
+
+    assert loaded.is_trained
+    assert len(loaded) == len(ivf)
+    np.testing.assert_array_equal(loaded.centroids, ivf.centroids)
+    np.testing.assert_array_equal(loaded.search(queries, 10)[1], before[1])
+    np.testing.assert_allclose(loaded.search(queries, 10)[0], before[0], rtol=1e-6)
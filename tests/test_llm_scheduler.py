@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from app.services import DeadlineExceeded, LLMScheduler, ServerBusy
+
+
+async def _collect(scheduler, client_id, answer, question, **kwargs):
+    return [token async for token in scheduler.stream(client_id, answer, question, **kwargs)]
+
+
+def _gated_answer(gate, started):
+    async def answer(question):
+        started.append(question)
+        await gate.wait()
+        yield question
+    return answer
+
+
+async def _submit(scheduler, client_id, answer, question, **kwargs):
+    task = asyncio.create_task(_collect(scheduler, client_id, answer, question, **kwargs))
+    await asyncio.sleep(0)  # let it be admitted or queued before the next one
+    return task
+
+
+def test_slots_go_to_waiting_clients_round_robin():
+    async def run():
+        scheduler = LLMScheduler(max_in_flight=1, per_client_in_flight=1, per_client_queue=8)
+        started = []
+
+        async def answer(question):
+            started.append(question)
+            await asyncio.sleep(0.01)
+            yield question
+
+        tasks = [await _submit(scheduler, client, answer, question)
+                 for client, question in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1")]]
+        await asyncio.gather(*tasks)
+        return scheduler, started
+
+    scheduler, started = asyncio.run(run())
+    assert started == ["a1", "a2", "b1", "a3"]
+    assert scheduler.counters["completed"] == 4
+    assert scheduler.in_flight == scheduler.queued == 0
+
+
+def test_full_queue_rejects_as_busy():
+    async def run():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue=1, per_client_queue=8)
+        gate, started = asyncio.Event(), []
+        answer = _gated_answer(gate, started)
+        running = await _submit(scheduler, "a", answer, "a1")
+        waiting = await _submit(scheduler, "b", answer, "b1")
+        with pytest.raises(ServerBusy):
+            await _collect(scheduler, "c", answer, "c1")
+        gate.set()
+        return scheduler, await running, await waiting
+
+    scheduler, first, second = asyncio.run(run())
+    assert (first, second) == (["a1"], ["b1"])
+    assert scheduler.counters["rejected_busy"] == 1
+
+
+def test_per_client_caps_leave_room_for_other_clients():
+    async def run():
+        scheduler = LLMScheduler(max_in_flight=4, per_client_in_flight=1, per_client_queue=1)
+        gate, started = asyncio.Event(), []
+        answer = _gated_answer(gate, started)
+        tasks = [await _submit(scheduler, "a", answer, "a1"), await _submit(scheduler, "a", answer, "a2")]
+        with pytest.raises(ServerBusy):
+            await _collect(scheduler, "a", answer, "a3")
+        tasks.append(await _submit(scheduler, "b", answer, "b1"))
+        load = (scheduler.in_flight, scheduler.queued, list(started))
+        gate.set()
+        await asyncio.gather(*tasks)
+        return load
+
+    in_flight, queued, started = asyncio.run(run())
+    assert (in_flight, queued) == (2, 1)
+    assert started == ["a1", "b1"]
+
+
+def test_deadline_expires_queued_and_streaming_questions():
+    async def run():
+        scheduler = LLMScheduler(max_in_flight=1)
+        gate, started = asyncio.Event(), []
+        running = await _submit(scheduler, "a", _gated_answer(gate, started), "a1", deadline_seconds=0.05)
+        with pytest.raises(DeadlineExceeded):
+            await _collect(scheduler, "b", _gated_answer(gate, started), "b1", deadline_seconds=0.02)
+        with pytest.raises(DeadlineExceeded):
+            await running
+        return scheduler, started
+
+    scheduler, started = asyncio.run(run())
+    assert started == ["a1"]
+    assert scheduler.counters["expired_queued"] == 1
+    assert scheduler.counters["expired_streaming"] == 1
+    assert scheduler.in_flight == scheduler.queued == 0
+
+
+def test_slot_is_released_when_the_consumer_stops_iterating():
+    closed = []
+
+    async def answer(question):
+        try:
+            for token in question.split():
+                yield token
+        finally:
+            closed.append(question)
+
+    async def run():
+        scheduler = LLMScheduler(max_in_flight=1)
+        tokens = scheduler.stream("a", answer, "one two three")
+        first = await anext(tokens)
+        waiting = await _submit(scheduler, "b", answer, "four five")
+        await tokens.aclose()
+        return scheduler, first, await waiting
+
+    scheduler, first, second = asyncio.run(run())
+    assert first == "one"
+    assert second == ["four", "five"]
+    assert closed == ["one two three", "four five"]
+    assert scheduler.counters["cancelled"] == 1
+    assert scheduler.in_flight == 0
@@ -0,0 +1,55 @@
+import asyncio
+
+from langchain.schema import Document
+
+from E2EMedicalChatBotWithRAG.utils import IndexGeneration
+
+
+def _docs(*texts):
+    return [Document(id=f"doc-{i}", page_content=text, metadata={"source": "book.pdf"})
+            for i, text in enumerate(texts)]
+
+
+def _generation(store):
+    return IndexGeneration(store.config.index_generation_path).current(store.index_name)
+
+
+def test_batched_writes_persist_and_bump_the_generation_once(local_store):
+    store = local_store()
+    docs = _docs("acne is a skin condition", "eczema makes the skin itchy", "psoriasis causes scaly patches")
+
+    with store.batch_writes():
+        for doc in docs:
+            store.upsert_documents([doc], [doc.id])
+        store.delete_documents(["doc-1"])
+        assert not store.vectors_path.exists()
+        assert [d.id for d, _ in store.search([store.embedding_model.embed_query("acne")], k=1)[0]] == ["doc-0"]
+
+    assert _generation(store) == 1
+    reopened = local_store()
+    assert [r["id"] for r in reopened.records] == ["doc-0", "doc-2"]
+    assert len(reopened.index) == 2
+
+
+def test_writes_outside_a_batch_commit_at_once(local_store):
+    store = local_store()
+    first, second = _docs("acne is a skin condition", "eczema makes the skin itchy")
+
+    store.upsert_documents([first], [first.id])
+    store.upsert_documents([second], [second.id])
+
+    assert _generation(store) == 2
+    assert len(local_store().records) == 2
+
+
+def test_retriever_picks_up_an_index_rewritten_by_another_process(local_store):
+    serving = local_store()
+    retriever = serving.get_retriever(k=1)
+    assert asyncio.run(retriever.ainvoke("eczema itchy skin")) == []
+
+    ingestion = local_store()
+    ingestion.create_vector_store(_docs("acne is a skin condition", "eczema makes the skin itchy"))
+
+    found = asyncio.run(retriever.ainvoke("eczema itchy skin"))
+    assert [doc.id for doc in found] == ["doc-1"]
+    assert not serving.reload_if_changed()
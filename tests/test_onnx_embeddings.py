@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+tokenizers = pytest.importorskip("tokenizers")
+
+from onnx import TensorProto, helper
+
+from E2EMedicalChatBotWithRAG.models.onnx_embeddings import OnnxEmbeddings
+
+
+def _write_model(model_dir):
+    # hidden state = [token id, 1.0] per token: enough to exercise tokenizing, padding and pooling
+    graph = helper.make_graph(
+        [
+            helper.make_node("Cast", ["input_ids"], ["ids"], to=TensorProto.FLOAT),
+            helper.make_node("Unsqueeze", ["ids", "axes"], ["column"]),
+            helper.make_node("Mul", ["column", "zero"], ["zeros"]),
+            helper.make_node("Add", ["zeros", "one"], ["ones"]),
+            helper.make_node("Concat", ["column", "ones"], ["hidden"], axis=2),
+        ],
+        "tiny",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"]),
+        ],
+        [helper.make_tensor_value_info("hidden", TensorProto.FLOAT, ["batch", "sequence", 2])],
+        initializer=[
+            helper.make_tensor("axes", TensorProto.INT64, [1], [2]),
+            helper.make_tensor("zero", TensorProto.FLOAT, [], [0.0]),
+            helper.make_tensor("one", TensorProto.FLOAT, [], [1.0]),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(model_dir / "model.onnx"))
+
+
+def _write_tokenizer(model_dir):
+    vocab = {"[PAD]": 0, "[UNK]": 1, **{f"w{i}": i + 2 for i in range(300)}}
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    # what the sentence-transformers MiniLM export ships with
+    tokenizer.enable_padding(pad_id=0, pad_token="[PAD]", length=128)
+    tokenizer.save(str(model_dir / "tokenizer.json"))
+
+
+def test_batch_mixes_short_and_longer_than_fixed_padding(tmp_path):
+    _write_model(tmp_path)
+    _write_tokenizer(tmp_path)
+    embeddings = OnnxEmbeddings(tmp_path / "model.onnx", max_length=256)
+
+    long_text = " ".join(f"w{i}" for i in range(200))
+    vectors = np.array(embeddings.embed_documents(["w1 w2", long_text]))
+
+    assert vectors.shape == (2, 2)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    # padding is masked out of the mean: the short text pools ids 3 and 4 only
+    expected = np.array([3.5, 1.0]) / np.linalg.norm([3.5, 1.0])
+    assert np.allclose(vectors[0], expected, atol=1e-5)
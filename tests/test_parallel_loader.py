@@ -0,0 +1,82 @@
+import signal
+import time
+
+import pytest
+from langchain.schema import Document
+
+from E2EMedicalChatBotWithRAG.preprocess import parallel_loader
+from E2EMedicalChatBotWithRAG.preprocess.parallel_loader import ParallelPDFLoader, _FileAlarm, _load_pdf
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="the per-file timeout needs SIGALRM")
+
+
+def _stubborn_parser(path):
+    # like pypdf's recovery paths: every error is caught and parsing goes on
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            time.sleep(0.01)
+        except Exception:
+            pass
+    return [Document(page_content="parsed too late")]
+
+
+def test_timeout_is_not_swallowed_by_the_parser():
+    started = time.monotonic()
+    path, pages, _, _, error = _load_pdf("slow.pdf", 0.1, parse=_stubborn_parser)
+
+    assert time.monotonic() - started < 2
+    assert (path, pages) == ("slow.pdf", [])
+    assert error == "timed out after 0.1s"
+
+
+def test_parser_errors_are_reported():
+    def broken(path):
+        raise ValueError("bad xref")
+
+    _, pages, _, _, error = _load_pdf("bad.pdf", 1.0, parse=broken)
+
+    assert pages == []
+    assert error == "ValueError: bad xref"
+
+
+def test_alarm_going_off_as_the_parse_returns_is_reported(monkeypatch):
+    setitimer = signal.setitimer
+    calls = []
+
+    def alarm_on_disarm(which, seconds):
+        setitimer(which, 0)
+        calls.append(seconds)
+        if seconds == 0 and calls.count(0) == 1:
+            raise _FileAlarm()  # the signal landing between the parse's return and the disarm
+
+    monkeypatch.setattr(parallel_loader.signal, "setitimer", alarm_on_disarm)
+    _, pages, _, _, error = _load_pdf("late.pdf", 0.5, parse=lambda path: [Document(page_content="ok")])
+
+    assert pages == []
+    assert error == "timed out after 0.5s"
+
+
+def test_alarm_is_disarmed_once_the_parse_returns():
+    _, pages, _, _, error = _load_pdf("fast.pdf", 0.05, parse=lambda path: [Document(page_content="ok")])
+    time.sleep(0.1)  # an alarm still armed would raise here
+
+    assert error is None
+    assert [page.page_content for page in pages] == ["ok"]
+
+
+def test_spawned_workers_skip_unreadable_files(tmp_path):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    with open(tmp_path / "good.pdf", "wb") as file:
+        writer.write(file)
+    (tmp_path / "bad.pdf").write_bytes(b"not a pdf")
+    loader = ParallelPDFLoader(max_workers=2, file_timeout=30)
+
+    loaded = dict(loader.load_files([str(tmp_path / "bad.pdf"), str(tmp_path / "good.pdf")]))
+
+    assert list(loaded) == [str(tmp_path / "good.pdf")]
+    assert len(loaded[str(tmp_path / "good.pdf")]) == 1
+    assert [path for path, _ in loader.failed] == [str(tmp_path / "bad.pdf")]
@@ -0,0 +1,85 @@
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+
+from E2EMedicalChatBotWithRAG.config.configuration import ConfigurationManager
+from E2EMedicalChatBotWithRAG.exceptions import AppException
+from E2EMedicalChatBotWithRAG.preprocess.pipeline import StreamingIngestion
+from E2EMedicalChatBotWithRAG.utils import IndexGeneration
+
+
+def _small_queues(monkeypatch, batch_size=2, queue_size=1):
+    get_ingestion_config = ConfigurationManager.get_ingestion_config
+    monkeypatch.setattr(ConfigurationManager, "get_ingestion_config", lambda self: replace(
+        get_ingestion_config(self), stream_batch_size=batch_size, stream_queue_size=queue_size))
+
+
+def _write_pdfs(data_dir, **texts):
+    for name, text in texts.items():
+        (data_dir / f"{name}.pdf").write_text(text)
+
+
+def _paragraphs(topic, count):
+    return "\n\n".join(f"{topic} paragraph {i}: " + " ".join([topic] * 150) for i in range(count))
+
+
+def test_streamed_run_commits_the_local_store_once(data_dir, local_store, monkeypatch):
+    _small_queues(monkeypatch)
+    _write_pdfs(data_dir, acne=_paragraphs("acne", 6), eczema=_paragraphs("eczema", 5))
+    store = local_store()
+    generations = IndexGeneration(store.config.index_generation_path)
+
+    summary = StreamingIngestion(store, config=ConfigurationManager()).run(str(data_dir))
+
+    assert summary["files"] == 2
+    assert summary["chunks"] == len(store.records) > 4
+    assert generations.current(store.index_name) == 1
+    assert len(local_store().records) == summary["chunks"]
+
+    (data_dir / "eczema.pdf").unlink()
+    summary = StreamingIngestion(store, config=ConfigurationManager()).run(str(data_dir))
+
+    assert (summary["files_removed"], summary["chunks_deleted"]) > (0, 0)
+    assert generations.current(store.index_name) == 2
+    assert {record["source"] for record in local_store().records} == {str(data_dir / "acne.pdf")}
+
+
+class _FailingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(0.3)  # long enough for the chunk stage to fill its queue and block on put
+        raise RuntimeError("embedding endpoint unavailable")
+
+
+class _Store:
+    def __init__(self):
+        self.embedding_model = _FailingEmbeddings()
+        self.upserts = 0
+
+    def upsert_documents(self, docs, ids, embeddings=None):
+        self.upserts += 1
+
+    def delete_documents(self, ids):
+        raise AssertionError("a failed run must not prune")
+
+
+def test_embed_failure_stops_a_blocked_chunk_stage(data_dir, monkeypatch):
+    _small_queues(monkeypatch)
+    _write_pdfs(data_dir, **{f"book{i}": _paragraphs(f"topic{i}", 4) for i in range(5)})
+    store = _Store()
+    ingestion = StreamingIngestion(store, config=ConfigurationManager())
+
+    started = time.perf_counter()
+    with pytest.raises(AppException, match="embedding endpoint unavailable"):
+        ingestion.run(str(data_dir))
+
+    assert time.perf_counter() - started < 5
+    assert not [t for t in threading.enumerate() if t.name.startswith("ingest-")]
+    assert store.embedding_model.calls == 1
+    assert store.upserts == 0
+    assert not ingestion.manifest.files